@@ -0,0 +1,273 @@
+"""
+Benchmarks de desempenho do pipeline com corpus Java sintético.
+Mede cada estágio (extração, features, matching, ranking) e o fim-a-fim,
+compara com um baseline salvo e falha se a vazão regredir além do limite.
+A suíte de inicialização mede o tempo de partida do CLI (`--help` e varredura
+de um único arquivo) em processos novos. Roda totalmente offline (não clona nada).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add src to path
+SRC_DIR = str(Path(__file__).resolve().parent.parent / 'src')
+sys.path.insert(0, SRC_DIR)
+
+from pipelines.detection_pipeline import BugDetectionPipeline
+from matchers.signature_generator import SignatureGenerator
+from extractors.java_parser import JavaMethodExtractor
+from utils.synthetic_corpus import SyntheticCorpusGenerator
+
+
+STAGES = ['extract', 'features', 'match', 'rank']
+DEFAULT_BASELINE = 'benchmarks/baseline.json'
+# Estágios mais rápidos que isso no baseline são só ruído de medição: não entram no gate
+MIN_GATED_WALL_S = 0.05
+# Casos da suíte de inicialização sujeitos ao orçamento (--startup-budget-ms), medido como
+# acréscimo sobre o caso 'interpreter': o custo do próprio interpretador (site, .pth do
+# ambiente) varia de máquina para máquina e não depende do CLI
+BUDGETED_STARTUP = ['help', 'scan_file']
+
+
+def prepare_corpus(workdir: str, size: int, seed: int) -> str:
+    """Gera (ou reaproveita) o corpus sintético de um tamanho."""
+    corpus_dir = os.path.join(workdir, f'corpus_{size}_{seed}')
+    if not os.path.isdir(corpus_dir):
+        SyntheticCorpusGenerator(seed=seed).generate(corpus_dir, size)
+    return corpus_dir
+
+
+def run_pipeline_once(corpus_dir: str, signatures_path: str, threshold: float, top_k: int) -> dict:
+    """Executa passos 2-5 uma vez e retorna vazão (métodos/s) por estágio."""
+    pipeline = BugDetectionPipeline('', corpus_dir, signatures_path=signatures_path)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        methods = pipeline.step2_extract_methods()
+        with_features = pipeline.step3_compute_features(methods)
+        matches = pipeline.step4_match_patterns(with_features, threshold)
+        pipeline.step5_rank_and_filter(matches, top_k)
+        end_to_end = time.perf_counter() - start
+
+    n_methods = len(methods)
+    stages = pipeline.metrics.to_dict()['stages']
+    result = {'methods': n_methods, 'matched': len(matches), 'stages': {}}
+    for name in STAGES:
+        wall = stages[name]['wall_s']
+        result['stages'][name] = {
+            'wall_s': wall,
+            'cpu_s': stages[name]['cpu_s'],
+            'methods_per_s': round(n_methods / wall, 3) if wall > 0 else None
+        }
+    result['stages']['end_to_end'] = {
+        'wall_s': round(end_to_end, 6),
+        'methods_per_s': round(n_methods / end_to_end, 3) if end_to_end > 0 else None
+    }
+    return result
+
+
+def run_pipeline_suite(sizes, workdir: str, repeat: int, seed: int, threshold: float, top_k: int) -> dict:
+    """Benchmark de todos os tamanhos; guarda a melhor vazão entre as repetições."""
+    signatures_path = os.path.join(workdir, 'signatures.json')
+    with contextlib.redirect_stdout(io.StringIO()):
+        SignatureGenerator().save_signatures(signatures_path)
+
+    results = {}
+    for size in sizes:
+        corpus_dir = prepare_corpus(workdir, size, seed)
+        runs = [run_pipeline_once(corpus_dir, signatures_path, threshold, top_k) for _ in range(repeat)]
+
+        best = runs[0]
+        for stage in best['stages']:
+            best['stages'][stage] = max(
+                (r['stages'][stage] for r in runs),
+                key=lambda s: s['methods_per_s'] or 0
+            )
+        results[str(size)] = best
+
+        e2e = best['stages']['end_to_end']
+        print(f"✓ {size:>7} métodos: {e2e['methods_per_s']:>10.1f} métodos/s fim-a-fim ({e2e['wall_s']:.2f}s)")
+        for stage in STAGES:
+            print(f"    {stage:<10} {best['stages'][stage]['methods_per_s'] or 0:>10.1f} métodos/s")
+    return results
+
+
+def time_command(cmd: list, repeat: int) -> dict:
+    """Executa cmd em processos novos e retorna o menor e o mediano tempo de parede (ms)."""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'min_ms': round(min(samples), 2), 'median_ms': round(statistics.median(samples), 2)}
+
+
+def run_startup_suite(workdir: str, repeat: int, seed: int) -> dict:
+    """Tempo de partida do CLI: interpretador vazio, --help e scan de um arquivo."""
+    signatures_path = os.path.join(workdir, 'signatures.json')
+    if not os.path.exists(signatures_path):
+        with contextlib.redirect_stdout(io.StringIO()):
+            SignatureGenerator().save_signatures(signatures_path)
+    # Um método só: o que interessa é o custo fixo de partida, não o parsing
+    corpus_dir = prepare_corpus(workdir, 1, seed)
+    java_file = JavaMethodExtractor(corpus_dir).list_java_files()[0]
+
+    cli = [sys.executable, '-m', 'pipelines.cli']
+    cases = {
+        'interpreter': [sys.executable, '-c', 'pass'],
+        'help': cli + ['--help'],
+        'scan_file': cli + ['scan', '--file', java_file, '--signatures', signatures_path],
+    }
+    results = {}
+    for name, cmd in cases.items():
+        results[name] = time_command(cmd, repeat)
+        line = f"✓ {name:<12} {results[name]['min_ms']:>8.1f} ms (mediana {results[name]['median_ms']:.1f} ms)"
+        if name != 'interpreter':
+            overhead = results[name]['min_ms'] - results['interpreter']['min_ms']
+            results[name]['overhead_ms'] = round(overhead, 2)
+            line += f"  +{overhead:.1f} ms sobre o interpretador"
+        print(line)
+    return results
+
+
+def compare_startup(results: dict, baseline: dict, max_regression: float, budget_ms: float) -> list:
+    """Regressões de tempo de partida (menor tempo) e estouros do orçamento (acréscimo sobre o interpretador)."""
+    failures = []
+    reference = baseline.get('startup', {})
+    for name, values in results.items():
+        cur = values['min_ms']
+        overhead = values.get('overhead_ms')
+        if budget_ms and name in BUDGETED_STARTUP and overhead is not None and overhead > budget_ms:
+            failures.append(f"startup / {name}: +{overhead:.1f} ms sobre o interpretador, "
+                            f"acima do orçamento de {budget_ms:.0f} ms")
+        ref = reference.get(name, {}).get('min_ms')
+        if not ref:
+            continue
+        change = (cur - ref) / ref * 100
+        if change > max_regression:
+            failures.append(f"startup / {name}: {cur:.1f} vs baseline {ref:.1f} ms ({change:+.1f}%)")
+    return failures
+
+
+def compare_with_baseline(results: dict, baseline: dict, max_regression: float) -> list:
+    """Lista regressões de vazão acima de max_regression (%) em relação ao baseline."""
+    failures = []
+    for size, current in results.items():
+        reference = baseline.get('results', {}).get(size)
+        if not reference:
+            continue
+        for stage, values in current['stages'].items():
+            ref_stage = reference['stages'].get(stage, {})
+            ref_rate = ref_stage.get('methods_per_s')
+            cur_rate = values.get('methods_per_s')
+            if not ref_rate or cur_rate is None or ref_stage.get('wall_s', 0) < MIN_GATED_WALL_S:
+                continue
+            change = (cur_rate - ref_rate) / ref_rate * 100
+            if change < -max_regression:
+                failures.append(
+                    f"{size} métodos / {stage}: {cur_rate:.1f} vs baseline {ref_rate:.1f} métodos/s ({change:+.1f}%)"
+                )
+    return failures
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmarks offline do pipeline de detecção')
+    parser.add_argument('--suite', choices=['pipeline', 'startup', 'all'], default='all',
+                        help='Suítes a executar (padrão: all)')
+    parser.add_argument('--sizes', default='1000,10000',
+                        help='Tamanhos do corpus em métodos, separados por vírgula (ex.: 1000,10000,100000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições por tamanho (usa a melhor)')
+    parser.add_argument('--seed', type=int, default=0, help='Semente do gerador de corpus')
+    parser.add_argument('--threshold', type=float, default=0.3)
+    parser.add_argument('--top-k', type=int, default=50)
+    parser.add_argument('--workdir', default=None,
+                        help='Diretório para corpus e assinaturas (padrão: temporário)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Arquivo de baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='Grava os resultados como novo baseline')
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help='Regressão máxima de vazão tolerada, em %% (padrão: 20)')
+    parser.add_argument('--startup-repeat', type=int, default=10,
+                        help='Execuções por caso na suíte de inicialização (usa a menor)')
+    parser.add_argument('--startup-budget-ms', type=float, default=100.0,
+                        help='Acréscimo máximo sobre o interpretador vazio para --help e scan de '
+                             'um arquivo (0 desativa)')
+    parser.add_argument('--output', default=None, help='Grava os resultados em JSON')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+
+    print("\n" + "="*60)
+    print(" BENCHMARK DO PIPELINE (corpus sintético)")
+    print("="*60)
+
+    results, startup = {}, {}
+    with tempfile.TemporaryDirectory(prefix='bench_') as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        if args.suite in ('pipeline', 'all'):
+            results = run_pipeline_suite(sizes, workdir, args.repeat, args.seed, args.threshold, args.top_k)
+        if args.suite in ('startup', 'all'):
+            print("\n--- Inicialização do CLI (processos novos) ---")
+            startup = run_startup_suite(workdir, args.startup_repeat, args.seed)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': args.seed,
+        'results': results,
+        'startup': startup
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update({k: v for k, v in report.items() if k not in ('results', 'startup')})
+        baseline.setdefault('results', {}).update(results)
+        baseline.setdefault('startup', {}).update(startup)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n✓ Baseline salvo em {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    else:
+        print(f"\n[AVISO] Baseline {args.baseline} não encontrado; use --save-baseline para criá-lo")
+    failures = compare_with_baseline(results, baseline, args.max_regression)
+    failures += compare_startup(startup, baseline, args.max_regression, args.startup_budget_ms)
+    if failures:
+        print(f"\n✗ Falhas no gate de desempenho (regressão máxima: {args.max_regression:.0f}%):")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print(f"\n✓ Sem regressões acima de {args.max_regression:.0f}% em relação a {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
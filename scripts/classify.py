@@ -1,114 +1,246 @@
 """
 Script para classificar bugs detectados usando LLaMA via Ollama.
 Processa os 50 bugs encontrados e adiciona classificação IA.
+
+O modelo vem de OLLAMA_MODEL (padrão llama2) e o servidor de OLLAMA_HOST; o backend
+de LLM é plugável (src/llm/backends.py). Até OLLAMA_CONCURRENCY requisições ficam em andamento ao mesmo tempo (--concurrency);
+para que o servidor as processe em paralelo, inicie o Ollama com OLLAMA_NUM_PARALLEL
+maior ou igual a esse valor.
 """
+import argparse
 import os
 import json
 import sys
+from pathlib import Path
 
-os.environ['OLLAMA_HOST'] = 'http://localhost:11434'
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
 
-try:
-    import ollama
-except ImportError:
-    print("[ERRO] Biblioteca ollama não instalada. Execute: pip install ollama")
-    sys.exit(1)
+from llm.backends import create_backend
+from llm.cache import LLMCache
+from llm.classifier import Budget, ConcurrentClassifier
+from llm.dedup import cluster_candidates
+from llm.priority import priority_order
+from llm.progress import ProgressWriter, compact, load_progress
+from llm.prompts import TEMPLATE_HASH, build_batch_prompt, build_prompt, parse_batch_response, parse_response
+from matchers.static_confirmers import confirm
 
 OLLAMA_HOST = os.environ.get('OLLAMA_HOST', 'http://localhost:11434')
 OLLAMA_TIMEOUT = float(os.environ.get('OLLAMA_TIMEOUT', '120'))
 OLLAMA_RETRIES = int(os.environ.get('OLLAMA_RETRIES', '2'))
-client = ollama.Client(host=OLLAMA_HOST, timeout=OLLAMA_TIMEOUT)
+OLLAMA_CONCURRENCY = int(os.environ.get('OLLAMA_CONCURRENCY', '4'))
+OLLAMA_BATCH_SIZE = int(os.environ.get('OLLAMA_BATCH_SIZE', '1'))
+OLLAMA_MODEL = os.environ.get('OLLAMA_MODEL', 'llama2')
+CLASSIFY_TIME_BUDGET = os.environ.get('CLASSIFY_TIME_BUDGET')
+CLASSIFY_TOKEN_BUDGET = os.environ.get('CLASSIFY_TOKEN_BUDGET')
+LLM_CACHE = os.environ.get('LLM_CACHE', 'outputs/llm_cache.jsonl')
+
+GENERATE_OPTIONS = {
+    'num_predict': 200,  # Limite de tokens para resposta rápida
+    'temperature': 0.3   # Menos criatividade, mais determinístico
+}
+
+# Respostas em lote ficam no cache separadas das de um item por prompt
+BATCH_CACHE_OPTIONS = dict(GENERATE_OPTIONS, batched=True)
+
+# Cache persistente de respostas (aberto em main; None desativa)
+cache = None
+# Backend do LLM (criado no primeiro uso; o teste de carga injeta o seu)
+backend = None
+# Consultada antes de cada requisição (main liga ao orçamento do classificador)
+budget_exhausted = None
+
+
+def get_backend():
+    global backend
+    if backend is None:
+        backend = create_backend(model=OLLAMA_MODEL, host=OLLAMA_HOST, timeout=OLLAMA_TIMEOUT)
+    return backend
 
 
 def classify_bug_with_llama(snippet: str, pattern_name: str, class_name: str) -> dict:
     """Classifica um bug detectado usando LLaMA."""
-    try:
-        prompt = f"""Você é um especialista em detecção de bugs em Java. Analise este código da classe {class_name} e confirme se realmente contém o bug "{pattern_name}".
+    classification, _ = _classify_with_usage(snippet, pattern_name, class_name)
+    return classification
 
-Código:
-```java
-{snippet[:300]}
-```
 
-Padrão procurado: {pattern_name}
+def _add_usage(total: dict, usage: dict) -> dict:
+    for key, value in (usage or {}).items():
+        if key not in ('cached', 'skipped'):
+            total[key] = total.get(key, 0) + value
+    return total
 
-Responda APENAS em JSON:
-{{
-    "is_real_bug": true or false,
-    "confidence": número entre 0.0 e 1.0,
-    "reason": breve explicação
-}}"""
-        
-        response = None
-        for attempt in range(1, OLLAMA_RETRIES + 1):
-            try:
-                response = client.generate(
-                    model="llama2",
-                    prompt=prompt,
-                    stream=False,
-                    options={
-                        'num_predict': 200,  # Limite de tokens para resposta rápida
-                        'temperature': 0.3   # Menos criatividade, mais determinístico
-                    }
-                )
-                break
-            except Exception as e:
-                print(f"[ERRO] Falha na requisição (tentativa {attempt}/{OLLAMA_RETRIES}): {e}")
-                if attempt == OLLAMA_RETRIES:
-                    return None
-        
-        text = response.get('response', '').strip()
-        
-        # Remover blocos de código markdown se presentes
-        if '```json' in text:
-            text = text.split('```json')[1].split('```')[0].strip()
-        elif '```' in text:
-            text = text.split('```')[1].split('```')[0].strip()
-        
-        # Tentar extrair JSON
-        import json
-        import re
-        
-        # Procurar JSON entre chaves
-        json_match = re.search(r'\{.*\}', text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
-            try:
-                result = json.loads(json_str)
-                # Validar estrutura
-                if 'is_real_bug' in result and 'confidence' in result and 'reason' in result:
-                    # Mapear nomes de campos
-                    return {
-                        'eh_bug_real': result.get('is_real_bug', False),
-                        'confianca': float(result.get('confidence', 0)),
-                        'motivo': str(result.get('reason', 'N/A'))
-                    }
-            except:
-                pass
-        
-        # Se não conseguir fazer parse perfeito, tente extrair informações
-        is_bug = 'sim' in text.lower() or 'verdadeiro' in text.lower() or 'bug' in text.lower() or 'yes' in text.lower() or 'true' in text.lower()
-        
-        # Tentar extrair confiança (procurar números)
-        conf_match = re.search(r'(\d+\.?\d*)\s*(?:%|confidence|confiança)', text.lower())
-        confidence = float(conf_match.group(1)) / 100 if conf_match else 0.5
+
+def _generate(prompt: str, options: dict, parse, attempts: int = None):
+    """
+    Requisição com retentativas até parse(texto) aceitar a resposta.
+    Retorna (resposta interpretada ou None, texto bruto, uso somado das tentativas).
+    Com o orçamento esgotado nenhuma tentativa nova começa e o uso volta com 'skipped'.
+    """
+    attempts = attempts or OLLAMA_RETRIES
+    usage = {}
+    raw = ''
+    for attempt in range(1, attempts + 1):
+        if budget_exhausted is not None and budget_exhausted():
+            usage['skipped'] = True
+            break
+        try:
+            raw, attempt_usage = get_backend().generate_json(prompt, options)
+            _add_usage(usage, attempt_usage)
+            parsed = parse(raw)
+            if parsed:
+                return parsed, raw, usage
+            print(f"[ERRO] Resposta fora do esquema JSON (tentativa {attempt}/{attempts})")
+        except Exception as e:
+            _add_usage(usage, {'requests': 1})
+            print(f"[ERRO] Falha na requisição (tentativa {attempt}/{attempts}): {e}")
+    return None, raw, usage
+
+
+def _classify_with_usage(snippet: str, pattern_name: str, class_name: str):
+    """Como classify_bug_with_llama, mas retorna também o uso de tokens da requisição."""
+    try:
+        prompt = build_prompt(snippet, pattern_name, class_name)
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.key(get_backend().model, GENERATE_OPTIONS, prompt)
+            entry = cache.get(cache_key)
+            if entry is not None:
+                # Acerto no cache: nenhuma requisição, nenhum token gasto
+                return entry['classification'], {'cached': True}
         
-        return {
-            'eh_bug_real': is_bug,
-            'confianca': min(1.0, max(0.0, confidence)),
-            'motivo': text[:100] if text else 'Resposta LLaMA'
-        }
+        classification, raw, usage = _generate(prompt, GENERATE_OPTIONS, parse_response)
+        if cache is not None and classification is not None:
+            cache.put(cache_key, get_backend().model, classification, raw, usage)
+        return classification, usage
             
     except KeyboardInterrupt:
         print("[ERRO] Classificação interrompida durante a requisição")
-        return None
+        return None, None
     except Exception as e:
         print(f"[ERRO] Classificação: {e}")
-        return None
+        return None, None
+
+
+def _classify_item(result: dict):
+    return _classify_with_usage(result.get('snippet', ''),
+                                result.get('match', {}).get('pattern_name', ''),
+                                result.get('class', ''))
+
+
+def _classify_batch(results: list) -> list:
+    """
+    Classifica vários itens em uma única requisição (respostas em um array JSON).
+    Itens sem resposta válida no array são refeitos um a um por _classify_item.
+    Retorna (classificação, uso) por item; o uso da requisição em lote vai no primeiro.
+    """
+    outcomes = [None] * len(results)
+    keys = {}
+    todo = []
+    for pos, result in enumerate(results):
+        if cache is not None:
+            prompt = build_prompt(result.get('snippet', ''), result.get('match', {}).get('pattern_name', ''),
+                                  result.get('class', ''))
+            keys[pos] = cache.key(get_backend().model, BATCH_CACHE_OPTIONS, prompt)
+            # Vale também a resposta de um item por prompt (ex.: de um fallback anterior)
+            entry = cache.get(keys[pos], cache.key(get_backend().model, GENERATE_OPTIONS, prompt))
+            if entry is not None:
+                outcomes[pos] = (entry['classification'], {'cached': True})
+                continue
+        todo.append(pos)
+    if not todo:
+        return outcomes
 
+    options = dict(GENERATE_OPTIONS, num_predict=GENERATE_OPTIONS['num_predict'] * len(todo))
+    # Uma tentativa só: o que faltar é refeito item a item
+    answers, _, batch_usage = _generate(build_batch_prompt([results[pos] for pos in todo]), options,
+                                        lambda raw: parse_batch_response(raw, len(todo)), attempts=1)
+    answers = answers or {}
+
+    for n, pos in enumerate(todo, 1):
+        if n in answers:
+            classification, raw = answers[n]
+            usage = {'requests': 0}
+            if cache is not None:
+                cache.put(keys[pos], get_backend().model, classification, raw)
+        else:
+            # Ausente ou inválido no array: refaz sozinho
+            classification, usage = _classify_item(results[pos])
+        outcomes[pos] = (classification, usage)
+
+    first = todo[0]
+    classification, usage = outcomes[first]
+    merged = _add_usage(dict(batch_usage), usage)
+    if usage and usage.get('skipped'):
+        merged['skipped'] = True
+    outcomes[first] = (classification, merged)
+    return outcomes
+
+
+def benchmark_batching(results: list, n_items: int, batch_size: int, concurrency: int) -> dict:
+    """
+    Vazão (itens/min) do caminho de um item por requisição contra o caminho em lote,
+    nos mesmos n_items candidatos, sem cache e sem gravar saídas.
+    """
+    global cache
+    cache = None
+    eligible = [r for r in results if r.get('snippet') and r.get('match', {}).get('pattern_name')]
+    sample = [eligible[i % len(eligible)] for i in range(n_items)]
+
+    report = {}
+    for size in sorted({1, batch_size}):
+        classifier = ConcurrentClassifier(_classify_item, max_in_flight=concurrency,
+                                          classify_batch_fn=_classify_batch, batch_size=size)
+        classifier.run(sample)
+        report[size] = classifier.stats.to_dict()
+        print(f"✓ {size:>3} por prompt: {classifier.stats.summary()}")
+    if batch_size > 1 and report[1]['items_per_min']:
+        speedup = report[batch_size]['items_per_min'] / report[1]['items_per_min']
+        print(f"✓ Lotes de {batch_size}: {speedup:.2f}x itens/min em relação a um item por prompt")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Classifica os bugs detectados com LLaMA via Ollama')
+    parser.add_argument('--concurrency', type=int, default=OLLAMA_CONCURRENCY,
+                        help='Requisições simultâneas ao Ollama (padrão: OLLAMA_CONCURRENCY ou 4)')
+    parser.add_argument('--cache', default=LLM_CACHE,
+                        help='Cache persistente de respostas (padrão: LLM_CACHE ou outputs/llm_cache.jsonl)')
+    parser.add_argument('--no-cache', action='store_true', help='Sempre consulta o modelo')
+    parser.add_argument('--batch-size', type=int, default=OLLAMA_BATCH_SIZE,
+                        help='Itens por prompt (padrão: OLLAMA_BATCH_SIZE ou 1, um item por requisição)')
+    parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                        help='Só mede itens/min de N itens com um por prompt e com --batch-size')
+    parser.add_argument('--no-static', action='store_true',
+                        help='Não resolve pela AST os casos definitivos (todos vão para o LLM)')
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='Classifica cada candidato, mesmo os quase idênticos')
+    parser.add_argument('--dedup-threshold', type=float, default=0.9,
+                        help='Similaridade (Jaccard por MinHash) mínima para agrupar snippets (1 = só idênticos)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Retoma pelo diário JSONL, pulando os itens já classificados')
+    parser.add_argument('--time-budget', type=float, default=CLASSIFY_TIME_BUDGET,
+                        help='Segundos de classificação; depois disso nenhum item novo é enviado')
+    parser.add_argument('--token-budget', type=int, default=CLASSIFY_TOKEN_BUDGET,
+                        help='Tokens (prompt + resposta) de classificação; idem')
+    parser.add_argument('--order', choices=['priority', 'file'], default='priority',
+                        help='priority: maior score x confidence primeiro, com diversidade de padrões; '
+                             'file: ordem de results.json')
+    parser.add_argument('--diversity', type=float, default=0.9,
+                        help='Fator aplicado a cada candidato a mais do mesmo padrão (1 ignora o padrão)')
+    args = parser.parse_args(argv)
+
+    try:
+        get_backend()
+    except ImportError as e:
+        print(f"[ERRO] {e}")
+        sys.exit(1)
+
+    global cache, budget_exhausted
+    cache = None if args.no_cache else LLMCache(args.cache, TEMPLATE_HASH)
 
-def main():
     results_path = 'outputs/results.json'
+    output_path = 'outputs/results_with_llm.json'
+    progress_path = 'outputs/results_with_llm.jsonl'
     
     if not os.path.exists(results_path):
         print(f"[ERRO] Arquivo {results_path} não encontrado")
@@ -122,35 +254,95 @@ def main():
     with open(results_path, 'r', encoding='utf-8') as f:
         results = json.load(f)
     
+    if args.benchmark:
+        benchmark_batching(results, args.benchmark, args.batch_size, args.concurrency)
+        return
+
+    done_before = {}
+    if args.resume:
+        done_before = {idx: r for idx, r in load_progress(progress_path, results).items()
+                       if r.get('llm_classification')}
+    pending_idx = [idx for idx, r in enumerate(results)
+                   if r.get('snippet') and r.get('match', {}).get('pattern_name') and idx not in done_before]
     print(f"\n[INFO] Carregados {len(results)} bugs")
-    print("[INFO] Classificando com LLaMA... (pode levar ~30-50 minutos)")
+    if args.resume:
+        print(f"[INFO] Retomando: {len(done_before)} já classificados em {progress_path}")
     
-    # Classificar cada bug
-    for idx, result in enumerate(results, 1):
-        snippet = result.get('snippet', '')
-        pattern = result.get('match', {}).get('pattern_name', '')
-        class_name = result.get('class', '')
-        
-        if snippet and pattern:
-            print(f"\n[{idx}/{len(results)}] {class_name} - {pattern}...", end=" ", flush=True)
-            
-            classification = classify_bug_with_llama(snippet, pattern, class_name)
-            
-            if classification:
-                result['llm_classification'] = classification
-                is_real = classification.get('eh_bug_real', False)
-                confidence = classification.get('confianca', 0)
-                
-                status = "BUG CONFIRMADO" if is_real else "NÃO É UM BUG"
-                print(f"[{status}] (conf: {confidence:.2f})")
-            else:
-                result['llm_classification'] = None
-                print("[ERRO]")
+    progress = ProgressWriter(progress_path, resume=args.resume)
+    progress.write_event('inicio', total=len(done_before) + len(pending_idx), ja_classificados=len(done_before))
+    if not args.no_static:
+        # Veredictos exatos pela AST: esses itens não vão para o LLM
+        static = 0
+        for idx in list(pending_idx):
+            result = results[idx]
+            classification = confirm(result['snippet'], result['match'].get('pattern_id'))
+            if classification is not None:
+                progress.write(idx, result, classification, 0.0)
+                pending_idx.remove(idx)
+                static += 1
+        print(f"[INFO] {static} resolvidos pela análise estática da AST")
+    clusters = {idx: [idx] for idx in pending_idx}
+    if not args.no_dedup:
+        # Só o representante de cada grupo de quase duplicatas vai ao LLM
+        clusters = cluster_candidates(results, pending_idx, args.dedup_threshold)
+        pending_idx = [idx for idx in pending_idx if idx in clusters]
+        print(f"[INFO] {len(clusters)} grupos de snippets; "
+              f"{sum(len(m) - 1 for m in clusters.values())} duplicatas recebem o veredicto do representante")
+    if args.order == 'priority':
+        pending_idx = priority_order(results, pending_idx, args.diversity)
+    pending = [results[idx] for idx in pending_idx]
+    budget = None
+    if args.time_budget is not None or args.token_budget is not None:
+        budget = Budget(time_s=args.time_budget, tokens=args.token_budget)
+        print(f"[INFO] Orçamento: {args.time_budget or '-'} s, {args.token_budget or '-'} tokens")
+    print(f"[INFO] Classificando {len(pending)} com LLaMA ({args.concurrency} requisições simultâneas, "
+          f"{args.batch_size} por prompt)...")
     
-    # Salvar resultados atualizados
-    output_path = 'outputs/results_with_llm.json'
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    done = [0]
+    finished = set()
+
+    def on_result(pos, result, classification, latency):
+        # Chamado na thread principal, na ordem em que as requisições terminam
+        done[0] += 1
+        finished.add(pos)
+        representative = pending_idx[pos]
+        progress.write(representative, result, classification, latency)
+        if classification:
+            source = f"{result.get('file')}::{result.get('method')}"
+            for member in clusters[representative]:
+                if member != representative:
+                    progress.write(member, results[member], dict(classification, propagada_de=source), 0.0)
+        prefix = f"[{done[0]}/{len(pending)}] {result.get('class')} - {result['match']['pattern_name']}..."
+        if classification:
+            status = "BUG CONFIRMADO" if classification.get('eh_bug_real', False) else "NÃO É UM BUG"
+            print(f"{prefix} [{status}] (conf: {classification.get('confianca', 0):.2f})")
+        else:
+            print(f"{prefix} [ERRO]")
+
+    classifier = ConcurrentClassifier(_classify_item, max_in_flight=args.concurrency,
+                                      classify_batch_fn=_classify_batch, batch_size=args.batch_size,
+                                      budget=budget)
+    budget_exhausted = classifier.budget_exhausted if budget is not None else None
+    interrupted = False
+    try:
+        classifier.run(pending, on_result=on_result)
+        if classifier.stopped_by:
+            left = sum(len(clusters[idx]) for pos, idx in enumerate(pending_idx) if pos not in finished)
+            print(f"\n[AVISO] Orçamento de {classifier.stopped_by} esgotado: {left} itens "
+                  f"de menor prioridade ficaram sem classificação (retome com --resume)")
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\n[AVISO] Interrompido; retome com --resume")
+        return
+    finally:
+        progress.write_event('fim', interrompido=interrupted, orcamento_esgotado=classifier.stopped_by)
+        progress.close()
+        print(f"\n[INFO] {classifier.stats.summary()}")
+        if cache is not None:
+            print(f"[INFO] {cache.summary()}")
+        # Compactação: mesmo interrompido, o JSON final reflete tudo o que foi classificado
+        compact(results, load_progress(progress_path, results), output_path)
+        print(f"[INFO] {output_path} atualizado")
     
     print("\n" + "="*60)
     print(f"[OK] Resultados salvos em: {output_path}")
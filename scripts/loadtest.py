@@ -0,0 +1,129 @@
+"""
+Teste de carga do classificador LLM contra o servidor de teste (API Ollama simulada).
+Roda o mesmo caminho de scripts/classify.py (concorrência, retentativas, lotes,
+modo JSON com streaming) para cada combinação de --concurrency x --batch-sizes e
+informa percentis de latência e vazão, sem precisar de um modelo de verdade.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import urllib.request
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import classify
+from llm.backends import OllamaBackend
+from llm.classifier import ConcurrentClassifier
+from llm.stub_server import config_arguments, config_from_args, start_in_thread
+
+
+def load_items(results_path: str, n_items: int) -> list:
+    """n_items candidatos de results.json (repetidos se faltar), ou sintéticos sem o arquivo."""
+    items = []
+    if os.path.exists(results_path):
+        with open(results_path, 'r', encoding='utf-8') as f:
+            items = [r for r in json.load(f) if r.get('snippet') and r.get('match', {}).get('pattern_name')]
+    if not items:
+        items = [{'class': 'Exemplo', 'snippet': 'public void run() {\n    in.read();\n}',
+                  'match': {'pattern_id': 'resource-leak', 'pattern_name': 'Resource Leak'}}]
+    # Cópias distintas: o lote mapeia respostas por posição, não por identidade
+    return [dict(items[i % len(items)]) for i in range(n_items)]
+
+
+def stub_counters(url: str) -> dict:
+    try:
+        with urllib.request.urlopen(f'{url}/stats', timeout=5) as response:
+            return json.loads(response.read())['counters']
+    except Exception:
+        # Servidor externo (ex.: Ollama de verdade) não tem /stats
+        return {}
+
+
+def run_case(items: list, url: str, model: str, concurrency: int, batch_size: int, timeout: float,
+             verbose: bool) -> dict:
+    classify.backend = OllamaBackend(model=model, host=url, timeout=timeout)
+    classify.cache = None
+    classifier = ConcurrentClassifier(classify._classify_item, max_in_flight=concurrency,
+                                      classify_batch_fn=classify._classify_batch, batch_size=batch_size)
+    before = stub_counters(url)
+    # Mensagens de erro/retentativa do classificador só com --verbose
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        classifier.run(items)
+    after = stub_counters(url)
+    result = classifier.stats.to_dict()
+    result['server'] = {k: after[k] - before.get(k, 0) for k in after}
+    return result
+
+
+def print_row(concurrency: int, batch_size: int, data: dict):
+    server = data.get('server', {})
+    print(f"{concurrency:>5} {batch_size:>5} {data['items_per_min'] or 0:>10.1f} {data['requests_per_s'] or 0:>7.2f} "
+          f"{data['tokens_per_s'] or 0:>8.1f} {data['latency_p50_s'] or 0:>7.2f} {data['latency_p90_s'] or 0:>7.2f} "
+          f"{data['latency_p99_s'] or 0:>7.2f} {data['errors']:>6} {server.get('cancelled', '-'):>9}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Teste de carga do classificador LLM')
+    parser.add_argument('--host', default=None,
+                        help='Servidor compatível com Ollama já em execução (padrão: sobe o de teste)')
+    parser.add_argument('--model', default='stub')
+    parser.add_argument('--items', type=int, default=100, help='Itens classificados por combinação')
+    parser.add_argument('--concurrency', default='1,4,8', help='Requisições simultâneas, separadas por vírgula')
+    parser.add_argument('--batch-sizes', default='1', help='Itens por prompt, separados por vírgula')
+    parser.add_argument('--retries', type=int, default=classify.OLLAMA_RETRIES)
+    parser.add_argument('--timeout', type=float, default=30.0, help='Timeout por requisição (s)')
+    parser.add_argument('--results', default='outputs/results.json', help='Origem dos snippets')
+    parser.add_argument('--output', default=None, help='Grava os resultados em JSON')
+    parser.add_argument('--verbose', action='store_true', help='Mostra erros e retentativas')
+    config_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    classify.OLLAMA_RETRIES = args.retries
+    items = load_items(args.results, args.items)
+
+    server = None
+    url = args.host
+    if url is None:
+        server, url = start_in_thread(config_from_args(args))
+
+    print("\n" + "="*60)
+    print(" TESTE DE CARGA DO CLASSIFICADOR")
+    print("="*60)
+    print(f"Servidor: {url}  Itens: {len(items)}  Retentativas: {args.retries}")
+    if server is not None:
+        print(f"Simulação: {args.latency_ms:.0f} ms + {args.tokens_per_s:.0f} tokens/s, "
+              f"{args.parallel} gerações simultâneas, erros {args.error_rate:.0%}, "
+              f"fora do esquema {args.malformed_rate:.0%}")
+    print(f"\n{'conc':>5} {'lote':>5} {'itens/min':>10} {'req/s':>7} {'tok/s':>8} "
+          f"{'p50 s':>7} {'p90 s':>7} {'p99 s':>7} {'erros':>6} {'cancel.':>9}")
+
+    report = []
+    try:
+        for concurrency in [int(c) for c in args.concurrency.split(',') if c.strip()]:
+            for batch_size in [int(b) for b in args.batch_sizes.split(',') if b.strip()]:
+                data = run_case(items, url, args.model, concurrency, batch_size, args.timeout, args.verbose)
+                print_row(concurrency, batch_size, data)
+                report.append(dict(data, concurrency=concurrency, batch_size=batch_size))
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Resultados salvos em {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,127 +1,136 @@
 """
-Script para monitorar e mostrar progresso da classificação com relatório em tempo real
+Script para monitorar e mostrar progresso da classificação com relatório em tempo real.
+Acompanha o diário outputs/results_with_llm.jsonl gravado pelo classify.py, lendo só
+as linhas novas (inotify ou consulta periódica), com itens/s, latência média móvel,
+ETA e confirmados por padrão.
 """
-import json
+import argparse
+import sys
 import time
-import os
 from datetime import datetime
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from llm.progress_monitor import ProgressStats, ProgressTail
+from utils.file_watch import create_watcher
+
+PROGRESS_PATH = 'outputs/results_with_llm.jsonl'
+
+
+def _format_duration(seconds) -> str:
+    if seconds is None:
+        return '--:--'
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+def print_progress(stats: ProgressStats):
+    """Barra de progresso com vazão, latência e ETA (reescreve a mesma linha)."""
+    data = stats.to_dict()
+    total = data['total'] or data['completed'] or 1
+    bar_length = 40
+    filled = min(bar_length, int(bar_length * data['completed'] / total))
+    bar = '█' * filled + '░' * (bar_length - filled)
+    rate = f"{data['items_per_s']:.2f}/s" if data['items_per_s'] else '-/s'
+    latency = f"{data['latency_ewma_s']:.2f}s" if data['latency_ewma_s'] is not None else '-'
+    print(f"\r[{bar}] {data['completed']}/{data['total'] or '?'} ({data['completed'] / total * 100:5.1f}%) "
+          f"{rate}  lat {latency}  ETA {_format_duration(data['eta_s'])}  "
+          f"conf {data['confirmed']}  erros {data['errors']}", end="", flush=True)
+
+
+def print_pattern_stats(stats: ProgressStats):
+    """Confirmados por padrão na execução atual."""
+    done = stats.done
+    print(f"\n\nDados processados até agora: {stats.completed}/{stats.total or '?'} "
+          f"({stats.static} pela AST, {stats.propagated} propagados)")
+    if done:
+        print(f"Taxa de confirmação: {stats.confirmed}/{done} ({stats.confirmed / done * 100:.1f}%)\n")
+    print(f"{'Padrão':<25} {'Confirmados':<15} {'Taxa':<10} {'Erros':<6}")
+    print("-" * 58)
+    for pattern in sorted(stats.patterns):
+        data = stats.patterns[pattern]
+        taxa = data['confirmed'] / data['total'] * 100 if data['total'] else 0
+        print(f"{pattern:<25} {data['confirmed']}/{data['total']:<13} {taxa:>6.1f}%   {data['errors']:<6}")
+    print()
+
+
+def monitor_classification(path: str = PROGRESS_PATH, watch: str = 'auto', interval: float = 1.0,
+                           refresh: float = 0.5, pattern_every: int = 0, follow: bool = False):
+    """
+    Acompanha o diário até o evento 'fim' (ou indefinidamente com follow).
+    pattern_every > 0 mostra a tabela por padrão a cada tantos itens novos.
+    """
+    tail = ProgressTail(path)
+    stats = ProgressStats()
+    watcher = create_watcher(path, watch, interval)
 
-def monitor_classification():
-    """Monitora o progresso da classificação com estatísticas em tempo real."""
-    
-    results_path = 'outputs/results_with_llm.json'
-    last_count = 0
-    
     print("\n" + "="*80)
-    print(" MONITORAMENTO DE CLASSIFICAÇÃO COM LLAMA 2")
-    print("="*80 + "\n")
-    
-    while True:
-        try:
-            if not os.path.exists(results_path):
-                print("[AGUARDANDO] Arquivo de resultados ainda não gerado...")
-                time.sleep(5)
-                continue
-            
-            with open(results_path, 'r', encoding='utf-8') as f:
-                results = json.load(f)
-            
-            # Contar classificações completas
-            classified = sum(1 for r in results if r.get('llm_classification') and 
-                           r.get('llm_classification', {}).get('confianca') != 0)
-            total = len(results)
-            
-            # Mostrar progresso se houver mudança
-            if classified != last_count:
-                percentage = classified / total * 100
-                bar_length = 50
-                filled = int(bar_length * classified / total)
-                bar = '█' * filled + '░' * (bar_length - filled)
-                
-                print(f"\r[{bar}] {classified}/{total} ({percentage:5.1f}%)", end="", flush=True)
-                
-                # A cada 5 bugs, mostrar estatísticas
-                if classified % 5 == 0:
-                    print(f"\n  Tempo decorrido: ~{classified * 0.8:.0f}s (estimado)")
-                    
-                    # Estatísticas parciais
-                    confirmed = sum(1 for r in results[:classified] 
-                                  if r.get('llm_classification', {}).get('eh_bug_real'))
-                    if classified > 0:
-                        print(f"  Bugs confirmados até agora: {confirmed}/{classified} ({confirmed/classified*100:.0f}%)")
-                
-                last_count = classified
-            
-            # Se terminou
-            if classified == total:
-                print(f"\n\n[CONCLUIDO] Classificação finalizada em {datetime.now().strftime('%H:%M:%S')}")
+    print(" MONITORAMENTO DE CLASSIFICAÇÃO COM LLAMA")
+    print("="*80)
+    print(f"[INFO] Acompanhando {path} ({watcher.name})\n")
+
+    last_render = 0.0
+    last_table = 0
+    # Uma execução anterior já concluída no diário não é reexibida: espera a próxima
+    records = tail.skip_finished_run()
+    if not records:
+        print("[AGUARDANDO] Aguardando o início de uma classificação...")
+    try:
+        while True:
+            for record in records:
+                stats.update(record)
+                if record.get('event') == 'inicio':
+                    print(f"\n[INFO] Nova execução: {stats.total} itens, {stats.already_done} já classificados")
+                    last_table = 0
+
+            if records and time.monotonic() - last_render >= refresh:
+                print_progress(stats)
+                last_render = time.monotonic()
+                if pattern_every and stats.done - last_table >= pattern_every:
+                    print_pattern_stats(stats)
+                    last_table = stats.done
+
+            if stats.finished is not None and not follow:
+                print_progress(stats)
+                print_pattern_stats(stats)
+                end = stats.finished
+                reason = 'interrompida' if end.get('interrompido') else \
+                    f"orçamento de {end['orcamento_esgotado']} esgotado" if end.get('orcamento_esgotado') else 'finalizada'
+                print(f"[CONCLUIDO] Classificação {reason} às {datetime.now().strftime('%H:%M:%S')}")
                 break
-            
-            time.sleep(2)
-            
-        except json.JSONDecodeError:
-            print("[AGUARDANDO] Arquivo sendo escrito...")
-            time.sleep(5)
-        except KeyboardInterrupt:
-            print("\n[CANCELADO] Monitoramento interrompido pelo usuário")
-            break
-        except Exception as e:
-            print(f"[ERRO] {e}")
-            time.sleep(5)
-
-def show_live_stats():
-    """Mostra estatísticas do arquivo JSON conforme é atualizado."""
-    
-    results_path = 'outputs/results_with_llm.json'
-    
-    print("\n" + "="*80)
-    print(" ESTATÍSTICAS EM TEMPO REAL")
-    print("="*80 + "\n")
-    
-    time.sleep(30)  # Aguardar um pouco de processamento
-    
-    while True:
-        try:
-            with open(results_path, 'r', encoding='utf-8') as f:
-                results = json.load(f)
-            
-            # Contar
-            classified = sum(1 for r in results if r.get('llm_classification', {}).get('motivo', '').lower() != 'erro ao parsear resposta')
-            confirmed = sum(1 for r in results if r.get('llm_classification', {}).get('eh_bug_real'))
-            
-            if classified > 0:
-                from collections import defaultdict
-                patterns_stats = defaultdict(lambda: {'confirmed': 0, 'total': 0})
-                
-                for r in results[:classified]:
-                    pattern = r.get('match', {}).get('pattern_name', '?')
-                    is_bug = r.get('llm_classification', {}).get('eh_bug_real', False)
-                    patterns_stats[pattern]['total'] += 1
-                    if is_bug:
-                        patterns_stats[pattern]['confirmed'] += 1
-                
-                print(f"\nDados processados até agora: {classified}/{len(results)}")
-                print(f"Taxa de confirmação: {confirmed}/{classified} ({confirmed/classified*100:.1f}%)\n")
-                
-                print(f"{'Padrão':<25} {'Confirmados':<15} {'Taxa':<10}")
-                print("-" * 50)
-                
-                for pattern in sorted(patterns_stats.keys()):
-                    stats = patterns_stats[pattern]
-                    total_p = stats['total']
-                    conf_p = stats['confirmed']
-                    taxa = conf_p / total_p * 100 if total_p > 0 else 0
-                    print(f"{pattern:<25} {conf_p}/{total_p:<13} {taxa:>6.1f}%")
-            
-            time.sleep(10)
-            
-        except:
-            time.sleep(5)
+            # Acorda na próxima escrita; o timeout mantém o ETA da tela atualizado
+            watcher.wait(timeout=max(refresh, interval))
+            records = tail.read_new()
+    except KeyboardInterrupt:
+        print("\n[CANCELADO] Monitoramento interrompido pelo usuário")
+    finally:
+        watcher.close()
+
+
+def show_live_stats(path: str = PROGRESS_PATH, watch: str = 'auto', interval: float = 1.0):
+    """Tabela por padrão a cada 10 itens classificados."""
+    monitor_classification(path, watch, interval, pattern_every=10)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Monitor da classificação com LLM')
+    parser.add_argument('mode', nargs='?', choices=['progress', 'stats'], default='progress',
+                        help="'stats' também mostra a tabela por padrão periodicamente")
+    parser.add_argument('--progress', default=PROGRESS_PATH, help='Diário JSONL do classify.py')
+    parser.add_argument('--watch', choices=['auto', 'inotify', 'poll'], default='auto',
+                        help='Como detectar escritas: inotify (Linux) ou consulta periódica')
+    parser.add_argument('--interval', type=float, default=1.0, help='Intervalo da consulta periódica (s)')
+    parser.add_argument('--refresh', type=float, default=0.5, help='Intervalo mínimo entre redesenhos (s)')
+    parser.add_argument('--pattern-every', type=int, default=0,
+                        help='Mostra a tabela por padrão a cada N itens (0 desliga)')
+    parser.add_argument('--follow', action='store_true', help='Continua após o fim, esperando novas execuções')
+    return parser.parse_args(argv)
+
 
 if __name__ == '__main__':
-    import sys
-    
-    if len(sys.argv) > 1 and sys.argv[1] == 'stats':
-        show_live_stats()
-    else:
-        monitor_classification()
+    args = parse_args()
+    pattern_every = args.pattern_every or (10 if args.mode == 'stats' else 0)
+    monitor_classification(args.progress, args.watch, args.interval, args.refresh, pattern_every, args.follow)
@@ -2,60 +2,37 @@
 Gera relatório visual em HTML com gráficos dos resultados
 """
 import json
+import os
+import sys
 from datetime import datetime
-from collections import defaultdict
+from pathlib import Path
 
-def _is_confirmed(result: dict) -> bool:
-    """Retorna True se a LLM confirmou o bug, aceitando chaves legadas."""
-    llm = result.get('llm_classification', {}) or {}
-    return bool(llm.get('eh_bug_real', llm.get('eh_realmente_bug', llm.get('is_real_bug', False))))
+# Add src to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
 
+from utils.report_stats import aggregate
 
-def generate_html_report():
-    """Gera relatório em HTML com estatísticas visuais."""
+RESULTS_PATH = 'outputs/results_with_llm.json'
+
+
+def generate_html_report(results_path: str = RESULTS_PATH):
+    """Gera relatório em HTML com estatísticas visuais (JSON ou JSONL, também .gz)."""
     
-    try:
-        with open('outputs/results_with_llm.json', 'r', encoding='utf-8') as f:
-            results = json.load(f)
-    except FileNotFoundError:
-        print("[ERRO] Arquivo results_with_llm.json nao encontrado")
+    if not os.path.exists(results_path):
+        print(f"[ERRO] Arquivo {results_path} nao encontrado")
         return
     
-    # Coletar estatísticas
-    total = len(results)
-    verified = sum(1 for r in results if _is_confirmed(r))
-    not_verified = total - verified
-    
-    # Confiança média
-    confidences = [r.get('llm_classification', {}).get('confianca', 0) 
-                  for r in results if r.get('llm_classification')]
-    avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-    
-    # Stats por padrão
-    patterns_stats = defaultdict(lambda: {'total': 0, 'verified': 0, 'avg_score': 0, 'scores': []})
-    
-    for result in results:
-        pattern = result.get('match', {}).get('pattern_name', 'Unknown')
-        is_verified = _is_confirmed(result)
-        score = result.get('match', {}).get('score', 0)
-        
-        patterns_stats[pattern]['total'] += 1
-        if is_verified:
-            patterns_stats[pattern]['verified'] += 1
-        patterns_stats[pattern]['scores'].append(score)
-    
-    for pattern in patterns_stats:
-        scores = patterns_stats[pattern]['scores']
-        patterns_stats[pattern]['avg_score'] = sum(scores) / len(scores) if scores else 0
+    # Coletar estatísticas em uma passada
+    stats = aggregate(results_path)
+    total = stats.total
+    verified = stats.verified
+    not_verified = stats.not_verified
+    avg_confidence = stats.avg_confidence
+    pattern_rows = stats.pattern_rows()
     
-    # Distribuição de confiança
-    confidence_buckets = {
-        '0% - 20%': len([c for c in confidences if c < 0.2]),
-        '20% - 40%': len([c for c in confidences if 0.2 <= c < 0.4]),
-        '40% - 60%': len([c for c in confidences if 0.4 <= c < 0.6]),
-        '60% - 80%': len([c for c in confidences if 0.6 <= c < 0.8]),
-        '80% - 100%': len([c for c in confidences if c >= 0.8]),
-    }
+    # Distribuição de confiança (só itens classificados)
+    confidence_buckets = {f"{low:.0%} - {high:.0%}": count
+                          for (low, high), count in zip(stats.bucket_bounds(), stats.buckets)}
     
     # Gerar HTML
     html = f"""<!DOCTYPE html>
@@ -261,12 +238,12 @@ def generate_html_report():
                     <div class="stat-card">
                         <h3>Bugs Confirmados</h3>
                         <div class="stat-value">{verified}</div>
-                        <div class="stat-percent">{verified/total*100:.1f}% de confirmação</div>
+                        <div class="stat-percent">{stats.rate(verified):.1f}% de confirmação</div>
                     </div>
                     <div class="stat-card">
                         <h3>Não Confirmados</h3>
                         <div class="stat-value">{not_verified}</div>
-                        <div class="stat-percent">{not_verified/total*100:.1f}%</div>
+                        <div class="stat-percent">{stats.rate(not_verified):.1f}%</div>
                     </div>
                     <div class="stat-card">
                         <h3>Confiança Média</h3>
@@ -292,20 +269,14 @@ def generate_html_report():
                     </tr>
 """
     
-    for pattern in sorted(patterns_stats.keys()):
-        stats = patterns_stats[pattern]
-        total_p = stats['total']
-        verified_p = stats['verified']
-        taxa = verified_p / total_p * 100 if total_p > 0 else 0
-        avg_score = stats['avg_score']
-        
+    for row in pattern_rows:
         html += f"""
                     <tr>
-                        <td>{pattern}</td>
-                        <td>{total_p}</td>
-                        <td><span class="badge badge-success">{verified_p}</span></td>
-                        <td>{taxa:.1f}%</td>
-                        <td>{avg_score:.4f}</td>
+                        <td>{row['pattern']}</td>
+                        <td>{row['total']}</td>
+                        <td><span class="badge badge-success">{row['verified']}</span></td>
+                        <td>{row['taxa']:.1f}%</td>
+                        <td>{row['avg_score']:.4f}</td>
                     </tr>
 """
     
@@ -323,7 +294,7 @@ def generate_html_report():
 """
     
     for bucket, count in confidence_buckets.items():
-        percentage = count / total * 100 if total > 0 else 0
+        percentage = stats.rate(count)
         html += f"""
                     <div style="margin-bottom: 20px;">
                         <div style="display: flex; justify-content: space-between; margin-bottom: 5px;">
@@ -355,32 +326,21 @@ def generate_html_report():
                     </tr>
 """
     
-    sorted_results = sorted(
-        results,
-        key=lambda x: x.get('llm_classification', {}).get('confianca', 0),
-        reverse=True
-    )
-    
-    for result in sorted_results[:10]:
-        pattern = result.get('match', {}).get('pattern_name', '?')
-        classname = result.get('class', '?')
-        method = result.get('method', '?')
-        conf = result.get('llm_classification', {}).get('confianca', 0)
-        is_bug = _is_confirmed(result)
-        badge_class = "badge-success" if is_bug else "badge-danger"
-        status = "BUG" if is_bug else "NÃO É BUG"
+    for item in stats.top_results():
+        badge_class = "badge-success" if item['confirmed'] else "badge-danger"
+        status = "BUG" if item['confirmed'] else "NÃO É BUG"
         
         html += f"""
                     <tr>
-                        <td>{pattern}</td>
-                        <td>{classname}</td>
-                        <td>{method}</td>
-                        <td><strong>{conf:.2%}</strong></td>
+                        <td>{item['pattern']}</td>
+                        <td>{item['class']}</td>
+                        <td>{item['method']}</td>
+                        <td><strong>{item['confianca']:.2%}</strong></td>
                         <td><span class="badge {badge_class}">{status}</span></td>
                     </tr>
 """
     
-    html += """
+    html += f"""
                 </table>
             </section>
         </div>
@@ -397,16 +357,16 @@ def generate_html_report():
         const patternChart = new Chart(patternCtx, {{
             type: 'bar',
             data: {{
-                labels: {json.dumps([p for p in sorted(patterns_stats.keys())])},
+                labels: {json.dumps([row['pattern'] for row in pattern_rows])},
                 datasets: [
                     {{
                         label: 'Confirmados',
-                        data: {json.dumps([patterns_stats[p]['verified'] for p in sorted(patterns_stats.keys())])},
+                        data: {json.dumps([row['verified'] for row in pattern_rows])},
                         backgroundColor: '#667eea'
                     }},
                     {{
                         label: 'Não Confirmados',
-                        data: {json.dumps([patterns_stats[p]['total'] - patterns_stats[p]['verified'] for p in sorted(patterns_stats.keys())])},
+                        data: {json.dumps([row['total'] - row['verified'] for row in pattern_rows])},
                         backgroundColor: '#e9ecef'
                     }}
                 ]
@@ -467,4 +427,4 @@ def generate_html_report():
     print("[OK] Relatório HTML gerado: outputs/relatorio_visual.html")
 
 if __name__ == '__main__':
-    generate_html_report()
+    generate_html_report(sys.argv[1] if len(sys.argv) > 1 else RESULTS_PATH)
@@ -0,0 +1,14 @@
+"""
+Sobe o serviço residente de varredura (HTTP local ou socket Unix).
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from service.scan_server import main
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+"""
+Varredura em shards: plan / worker / merge / run (processos locais).
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from pipelines.sharding import main
+
+
+if __name__ == '__main__':
+    main()
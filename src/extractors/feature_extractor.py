@@ -6,11 +6,7 @@ import re
 from typing import Dict, List
 from collections import Counter
 
-try:
-    import javalang
-    JAVALANG_AVAILABLE = True
-except ImportError:
-    JAVALANG_AVAILABLE = False
+from extractors.java_parser import load_javalang
 
 
 class FeatureExtractor:
@@ -48,8 +44,9 @@ class FeatureExtractor:
     def extract_ast_features(code: str) -> Dict[str, int]:
         """Extrai contagem de nós AST."""
         features = Counter()
+        javalang = load_javalang()
         
-        if JAVALANG_AVAILABLE:
+        if javalang is not None:
             try:
                 tree = javalang.parse.parse(code)
                 for path, node in tree:
@@ -70,7 +67,8 @@ class FeatureExtractor:
     @staticmethod
     def extract_tokens(code: str) -> List[str]:
         """Extrai sequência de tokens (identificadores, palavras-chave, operadores)."""
-        if JAVALANG_AVAILABLE:
+        javalang = load_javalang()
+        if javalang is not None:
             try:
                 tokens = []
                 for token in javalang.tokenizer.tokenize(code):
@@ -4,46 +4,81 @@ Usa javalang para análise AST com alternativa regex.
 """
 import os
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 from pathlib import Path
 
-try:
-    import javalang
-    JAVALANG_AVAILABLE = True
-except ImportError:
-    JAVALANG_AVAILABLE = False
-    print("Aviso: javalang não disponível, usando alternativa regex")
+_javalang = None
+_javalang_loaded = False
+
+
+def load_javalang():
+    """
+    Importa javalang na primeira análise (e não no import do módulo), para que
+    comandos que não fazem parsing iniciem rápido. Retorna None se indisponível.
+    """
+    global _javalang, _javalang_loaded
+    if not _javalang_loaded:
+        try:
+            import javalang
+            _javalang = javalang
+        except ImportError:
+            print("Aviso: javalang não disponível, usando alternativa regex")
+        _javalang_loaded = True
+    return _javalang
 
 
 class JavaMethodExtractor:
     """Extrai métodos de arquivos de código-fonte Java."""
     
-    def __init__(self, root_dir: str):
+    def __init__(self, root_dir: str, inventory: Optional[List] = None,
+                 source_reader: Optional[Callable[[str], str]] = None):
+        """
+        inventory: lista de SourceFile (utils/file_inventory.py) já montada no passo 1.
+        source_reader: lê o conteúdo de um arquivo no lugar do disco (ex.: blobs do git).
+        """
         self.root_dir = root_dir
+        self.inventory = inventory
+        self.source_reader = source_reader
+        self._blobs = {f.path: f.blob for f in inventory} if inventory is not None else {}
+        self.stats = {'files': 0, 'read_errors': 0, 'parse_fallbacks': 0, 'methods': 0}
     
     def extract_from_file(self, file_path: str) -> List[Dict[str, Any]]:
         """
         Extrai métodos de um único arquivo Java.
         
         Retorna:
-            Lista de dicionários com chaves: file, class, name, code
+            Lista de dicionários com chaves: file, class, name, code, start_line, end_line
         """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            if self.source_reader is not None:
+                content = self.source_reader(file_path)
+            else:
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read()
         except Exception:
+            self.stats['files'] += 1
+            self.stats['read_errors'] += 1
             return []
         
-        if JAVALANG_AVAILABLE:
-            return self._extract_with_javalang(file_path, content)
+        return self.extract_from_source(file_path, content)
+    
+    def extract_from_source(self, file_path: str, content: str) -> List[Dict[str, Any]]:
+        """Extrai métodos de código-fonte já em memória (file_path só identifica a origem)."""
+        self.stats['files'] += 1
+        if load_javalang() is not None:
+            methods = self._extract_with_javalang(file_path, content)
         else:
-            return self._extract_with_regex(file_path, content)
+            methods = self._extract_with_regex(file_path, content)
+        self.stats['methods'] += len(methods)
+        return methods
     
     def _extract_with_javalang(self, file_path: str, content: str) -> List[Dict[str, Any]]:
         """Extrai usando analisador AST."""
+        javalang = load_javalang()
         methods = []
         try:
             tree = javalang.parse.parse(content)
+            lines = content.split('\n')
             for path, node in tree.filter(javalang.tree.MethodDeclaration):
                 # Obter nome da classe
                 class_name = None
@@ -54,17 +89,19 @@ class JavaMethodExtractor:
                 
                 # Extrair código do método (aproximação)
                 start_pos = node.position.line if node.position else 0
-                lines = content.split('\n')
                 method_code = self._extract_method_body(lines, start_pos - 1)
                 
                 methods.append({
                     'file': file_path,
                     'class': class_name,
                     'name': node.name,
-                    'code': method_code
+                    'code': method_code,
+                    'start_line': start_pos,
+                    'end_line': start_pos + method_code.count('\n')
                 })
         except Exception:
             # Alternativa para regex em caso de erro de análise
+            self.stats['parse_fallbacks'] += 1
             return self._extract_with_regex(file_path, content)
         
         return methods
@@ -80,11 +117,17 @@ class JavaMethodExtractor:
             method_name = match.group(2)
             method_code = match.group(0)
             
+            # O prefixo (public|...|\s)+ pode capturar quebras de linha anteriores
+            leading = len(method_code) - len(method_code.lstrip())
+            start_line = content.count('\n', 0, match.start() + leading) + 1
+            
             methods.append({
                 'file': file_path,
                 'class': None,  # Difícil de extrair confiável com regex
                 'name': method_name,
-                'code': method_code
+                'code': method_code,
+                'start_line': start_line,
+                'end_line': start_line + method_code.lstrip().count('\n')
             })
         
         return methods
@@ -113,13 +156,33 @@ class JavaMethodExtractor:
         
         return '\n'.join(method_lines)
     
+    def list_java_files(self) -> List[str]:
+        """Lista arquivos .java do diretório em ordem determinística."""
+        if self.inventory is not None:
+            return [f.path for f in self.inventory]
+        return sorted(str(p) for p in Path(self.root_dir).rglob('*.java'))
+    
+    def blob_of(self, file_path: str) -> Optional[str]:
+        """
+        Hash do blob git do arquivo: o do índice, se veio de um inventário; senão o do
+        conteúdo atual no disco (arquivo modificado no worktree ou fora do git).
+        """
+        blob = self._blobs.get(file_path)
+        if blob is None and self.source_reader is None:
+            from utils.file_inventory import content_blob_hash
+            blob = content_blob_hash(file_path)
+        return blob
+    
+    def iter_from_directory(self) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Gera (arquivo, métodos) um arquivo por vez, sem materializar o repositório inteiro."""
+        for java_file in self.list_java_files():
+            yield java_file, self.extract_from_file(java_file)
+    
     def extract_from_directory(self) -> List[Dict[str, Any]]:
         """Extract methods from all Java files in directory."""
         all_methods = []
-        java_files = list(Path(self.root_dir).rglob('*.java'))
         
-        for java_file in java_files:
-            methods = self.extract_from_file(str(java_file))
+        for _, methods in self.iter_from_directory():
             all_methods.extend(methods)
         
         return all_methods
@@ -0,0 +1,89 @@
+"""
+Backends de LLM usados pelo classificador.
+Um backend só precisa gerar uma resposta JSON para um prompt; o Ollama é a
+implementação padrão (também serve para o servidor de teste em llm/stub_server.py,
+que imita a mesma API).
+"""
+import abc
+import os
+from typing import Dict, Tuple
+
+from llm.json_stream import JsonValueScanner
+
+
+class LLMBackend(abc.ABC):
+    """
+    Interface: generate_json(prompt, options) -> (texto JSON, uso de tokens).
+    Abstrata: um backend sem generate_json falha ao ser criado, não no meio da classificação.
+    """
+
+    name = 'base'
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @abc.abstractmethod
+    def generate_json(self, prompt: str, options: Dict) -> Tuple[str, Dict]:
+        """
+        Gera a resposta em JSON. O uso traz 'requests', 'prompt_tokens' e
+        'completion_tokens'; erros de transporte sobem como exceções.
+        """
+
+    def close(self):
+        pass
+
+
+class OllamaBackend(LLMBackend):
+    """
+    Ollama (ou compatível) via biblioteca ollama, em modo JSON e com streaming:
+    a geração é cancelada assim que o primeiro objeto JSON fecha.
+    """
+
+    name = 'ollama'
+
+    def __init__(self, model: str = 'llama2', host: str = 'http://localhost:11434', timeout: float = 120):
+        super().__init__(model)
+        try:
+            import ollama
+        except ImportError:
+            raise ImportError("Biblioteca ollama não instalada. Execute: pip install ollama")
+        self.host = host
+        self.client = ollama.Client(host=host, timeout=timeout)
+
+    def generate_json(self, prompt: str, options: Dict) -> Tuple[str, Dict]:
+        scanner = JsonValueScanner()
+        chunks = 0
+        final = {}
+        stream = self.client.generate(model=self.model, prompt=prompt, stream=True, format='json',
+                                      options=options)
+        try:
+            for chunk in stream:
+                chunks += 1
+                if chunk.get('done'):
+                    final = chunk
+                if scanner.feed(chunk.get('response') or '') is not None:
+                    break
+        finally:
+            # Fecha a conexão: o Ollama interrompe a geração do restante
+            stream.close()
+        usage = {
+            'requests': 1,
+            # Cancelada antes do fim não há contagens: estima ~4 caracteres por token
+            # no prompt e um token por pedaço recebido
+            'prompt_tokens': final.get('prompt_eval_count') or len(prompt) // 4,
+            'completion_tokens': final.get('eval_count') or chunks
+        }
+        return scanner.text, usage
+
+
+BACKENDS = {
+    'ollama': OllamaBackend,
+}
+
+
+def create_backend(name: str = None, **kwargs) -> LLMBackend:
+    """Backend pelo nome (padrão: LLM_BACKEND ou 'ollama')."""
+    name = name or os.environ.get('LLM_BACKEND', 'ollama')
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de LLM desconhecido: {name} (use {', '.join(BACKENDS)})")
+    return BACKENDS[name](**kwargs)
@@ -0,0 +1,101 @@
+"""
+Cache persistente de respostas do LLM.
+Cada entrada é indexada pelo modelo, pelas opções de geração e pelo hash do prompt
+renderizado, e guarda a classificação já interpretada junto com a resposta bruta.
+Entradas geradas com outra versão do template de prompt são descartadas na carga.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    Arquivo JSONL append-only: uma linha por resposta, carregado em memória na abertura.
+
+    template_hash identifica o template de prompt atual; linhas com outro hash não são
+    carregadas e são removidas do arquivo (compactação) na primeira gravação.
+    """
+
+    def __init__(self, path: str, template_hash: str):
+        self.path = path
+        self.template_hash = template_hash
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._stale = 0
+        self._load()
+
+    @staticmethod
+    def key(model: str, options: Dict, prompt: str) -> str:
+        """Chave estável de (modelo, opções de geração, prompt)."""
+        options_json = json.dumps(options or {}, sort_keys=True)
+        return text_hash(f'{model}\0{options_json}\0{text_hash(prompt)}')
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha truncada por uma interrupção
+                    self._stale += 1
+                    continue
+                if entry.get('template') != self.template_hash:
+                    self._stale += 1
+                    continue
+                self._entries[entry['key']] = entry
+        if self._stale:
+            print(f"[INFO] Cache LLM: {self._stale} entradas obsoletas descartadas")
+
+    def _compact(self):
+        """Reescreve o arquivo só com as entradas válidas."""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
+        self._stale = 0
+
+    def get(self, *keys: str) -> Optional[Dict]:
+        """Entrada com 'classification' e 'raw' da primeira chave presente, ou None."""
+        with self._lock:
+            entry = next((self._entries[key] for key in keys if key in self._entries), None)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, key: str, model: str, classification: Dict, raw: str, usage: Optional[Dict] = None):
+        entry = {
+            'key': key,
+            'template': self.template_hash,
+            'model': model,
+            'classification': classification,
+            'raw': raw,
+            'usage': usage
+        }
+        with self._lock:
+            self._entries[key] = entry
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            if self._stale:
+                self._compact()
+            else:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def __len__(self):
+        return len(self._entries)
+
+    def summary(self) -> str:
+        return f"cache LLM: {self.hits} acertos, {self.misses} faltas, {len(self)} entradas em {self.path}"
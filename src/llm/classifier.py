@@ -0,0 +1,208 @@
+"""
+Classificação concorrente com número limitado de requisições em andamento.
+Um pool de threads envia até max_in_flight requisições ao mesmo tempo ao servidor
+LLM (ex.: Ollama com OLLAMA_NUM_PARALLEL > 1); os resultados voltam na ordem original.
+Opcionalmente os itens vão em lotes de batch_size por requisição, e um orçamento de
+tempo ou de tokens interrompe o envio de novos itens quando se esgota.
+"""
+import concurrent.futures
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class ThroughputStats:
+    """
+    Itens, requisições, tokens e latências acumulados durante uma classificação.
+
+    O uso de cada item pode trazer 'requests' (requisições feitas para ele; 0 quando
+    respondido por um lote já contado, padrão 1), 'cached' (respondido pelo cache) e
+    'skipped' (não classificado porque o orçamento acabou: só requisições e tokens contam).
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.items = 0
+        self.requests = 0
+        self.errors = 0
+        self.cached = 0
+        self.skipped = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_s = 0.0
+        self.latencies: List[float] = []
+        self._timed_items = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency_s: float, usage: Optional[Dict], error: bool = False):
+        with self._lock:
+            if usage and usage.get('skipped'):
+                self.skipped += 1
+                self.requests += usage.get('requests', 0)
+                self.prompt_tokens += usage.get('prompt_tokens', 0)
+                self.completion_tokens += usage.get('completion_tokens', 0)
+                return
+            self.items += 1
+            self.errors += int(error)
+            if usage and usage.get('cached'):
+                # Respondido por cache: não conta como requisição ao servidor
+                self.cached += 1
+                return
+            self.requests += usage.get('requests', 1) if usage else 1
+            self._timed_items += 1
+            self.latency_s += latency_s
+            self.latencies.append(latency_s)
+            if usage:
+                self.prompt_tokens += usage.get('prompt_tokens', 0)
+                self.completion_tokens += usage.get('completion_tokens', 0)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latência no percentil q (0-100) dos itens não respondidos pelo cache."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+    def to_dict(self) -> Dict:
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'items': self.items,
+            'items_per_min': round(self.items * 60 / elapsed, 1) if elapsed > 0 else None,
+            'requests': self.requests,
+            'errors': self.errors,
+            'cached': self.cached,
+            'skipped': self.skipped,
+            'requests_per_s': round(self.requests / elapsed, 3) if elapsed > 0 else None,
+            'tokens_per_s': round(self.completion_tokens / elapsed, 3) if elapsed > 0 else None,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'avg_latency_s': round(self.latency_s / self._timed_items, 3) if self._timed_items else None,
+            'latency_p50_s': self._rounded(self.percentile(50)),
+            'latency_p90_s': self._rounded(self.percentile(90)),
+            'latency_p99_s': self._rounded(self.percentile(99))
+        }
+
+    @staticmethod
+    def _rounded(value: Optional[float]) -> Optional[float]:
+        return round(value, 3) if value is not None else None
+
+    def summary(self) -> str:
+        data = self.to_dict()
+        return (f"{data['items']} itens e {data['requests']} requisições em {data['elapsed_s']:.1f}s "
+                f"({data['items_per_min'] or 0:.1f} itens/min, {data['requests_per_s'] or 0:.2f} req/s, {data['tokens_per_s'] or 0:.1f} tokens/s, "
+                f"latência média {data['avg_latency_s'] or 0:.2f}s, {data['errors']} erros, "
+                f"{data['cached']} do cache)")
+
+
+class Budget:
+    """
+    Orçamento de uma classificação: tempo de parede (s) e/ou tokens (prompt + resposta).
+    Ao se esgotar, nenhuma requisição nova começa: nem itens novos, nem retentativas ou
+    refeitas de lote (ver ConcurrentClassifier.budget_exhausted); só as requisições já
+    em andamento terminam.
+    """
+
+    def __init__(self, time_s: Optional[float] = None, tokens: Optional[int] = None):
+        self.time_s = time_s
+        self.tokens = tokens
+        self.started_at = time.perf_counter()
+
+    def exhausted(self, stats: ThroughputStats) -> Optional[str]:
+        """Motivo do esgotamento, ou None se ainda há orçamento."""
+        if self.time_s is not None and time.perf_counter() - self.started_at >= self.time_s:
+            return f'tempo ({self.time_s:g}s)'
+        if self.tokens is not None and stats.prompt_tokens + stats.completion_tokens >= self.tokens:
+            return f'tokens ({self.tokens})'
+        return None
+
+
+class ConcurrentClassifier:
+    """
+    Executa classify_fn(item) -> (classificação ou None, uso ou None) para cada item
+    (uso {'cached': True} indica resposta vinda do cache), com no máximo max_in_flight
+    chamadas simultâneas.
+
+    Com batch_size > 1 e classify_batch_fn, os itens vão em lotes:
+    classify_batch_fn(itens) -> [(classificação, uso)] na ordem dos itens.
+    Timeouts e retentativas ficam a cargo dessas funções (por requisição).
+    Os itens são enviados na ordem recebida, sem passar de max_in_flight lotes em
+    andamento; com budget, o envio para quando ele se esgota (stopped_by diz o motivo)
+    e os itens não enviados ficam com classificação None. As funções de classificação
+    consultam budget_exhausted() antes de cada requisição e devolvem uso {'skipped': True}
+    para itens que deixaram de classificar; esses também ficam None, sem on_result.
+    on_result(índice, item, classificação, latência em s) é chamado na thread principal
+    assim que cada item termina, em ordem de conclusão.
+    """
+
+    def __init__(self, classify_fn: Callable[[Dict], Tuple[Optional[Dict], Optional[Dict]]],
+                 max_in_flight: int = 4,
+                 classify_batch_fn: Optional[Callable[[List[Dict]], List[Tuple[Optional[Dict], Optional[Dict]]]]] = None,
+                 batch_size: int = 1, budget: Optional[Budget] = None):
+        self.classify_fn = classify_fn
+        self.classify_batch_fn = classify_batch_fn
+        self.max_in_flight = max(1, max_in_flight)
+        self.batch_size = max(1, batch_size) if classify_batch_fn else 1
+        self.budget = budget
+        self.stats = ThroughputStats()
+        self.stopped_by: Optional[str] = None
+
+    def budget_exhausted(self) -> bool:
+        """True se o orçamento acabou (pode ser chamada das threads de classificação)."""
+        if self.budget is not None and self.stopped_by is None:
+            self.stopped_by = self.budget.exhausted(self.stats)
+        return self.stopped_by is not None
+
+    def _timed(self, batch: List[Dict]) -> Tuple[List[Tuple[Optional[Dict], Optional[Dict]]], float]:
+        start = time.perf_counter()
+        if len(batch) > 1:
+            outcomes = self.classify_batch_fn(batch)
+        else:
+            outcomes = [self.classify_fn(batch[0])]
+        return outcomes, time.perf_counter() - start
+
+    def run(self, items: Sequence[Dict],
+            on_result: Optional[Callable[[int, Dict, Optional[Dict], float], None]] = None) -> List[Optional[Dict]]:
+        """Classifica os itens e retorna as classificações na ordem de entrada."""
+        results: List[Optional[Dict]] = [None] * len(items)
+        batches = iter([list(range(start, min(start + self.batch_size, len(items))))
+                        for start in range(0, len(items), self.batch_size)])
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_in_flight)
+        in_flight = {}
+
+        def submit_next() -> bool:
+            if self.budget_exhausted():
+                return False
+            batch = next(batches, None)
+            if batch is None:
+                return False
+            in_flight[executor.submit(self._timed, [items[idx] for idx in batch])] = batch
+            return True
+
+        try:
+            while len(in_flight) < self.max_in_flight and submit_next():
+                pass
+            while in_flight:
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    try:
+                        outcomes, latency = future.result()
+                    except Exception:
+                        outcomes, latency = [(None, None)] * len(batch), 0.0
+                    for idx, (classification, usage) in zip(batch, outcomes):
+                        self.stats.record(latency, usage, error=classification is None)
+                        if usage and usage.get('skipped'):
+                            continue
+                        results[idx] = classification
+                        if on_result:
+                            on_result(idx, items[idx], classification, latency)
+                    submit_next()
+        except KeyboardInterrupt:
+            # Não espera as requisições pendentes: o que já terminou está em results
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+            raise
+        executor.shutdown(wait=True)
+        return results
@@ -0,0 +1,119 @@
+"""
+Agrupamento de candidatos quase idênticos antes da classificação.
+Candidatos do mesmo padrão com snippet igual após normalização (comentários e
+espaços removidos) ou com similaridade de Jaccard estimada por MinHash acima do
+limiar formam um grupo; só o representante vai ao LLM e o veredicto dele é
+propagado aos demais.
+"""
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+from llm.priority import candidate_value
+
+COMMENT = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+TOKEN = re.compile(r'\w+|[^\s\w]')
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize_snippet(snippet: str) -> str:
+    """Código sem comentários e com os espaços colapsados."""
+    return ' '.join(COMMENT.sub(' ', snippet or '').split())
+
+
+def _shingles(normalized: str, size: int) -> set:
+    tokens = TOKEN.findall(normalized)
+    if len(tokens) <= size:
+        return {' '.join(tokens)}
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHasher:
+    """Assinaturas MinHash (num_perm permutações) e bandas LSH para achar pares candidatos."""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError('num_perm deve ser múltiplo de bands')
+        rng = random.Random(seed)
+        self.perms = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME)) for _ in range(num_perm)]
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+    def signature(self, normalized: str) -> List[int]:
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+                  for s in _shingles(normalized, self.shingle_size)]
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self.perms]
+
+    def band_keys(self, signature: List[int]):
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        """Jaccard estimado: fração de permutações com o mesmo mínimo."""
+        return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+
+class _UnionFind:
+    def __init__(self, items):
+        self.parent = {item: item for item in items}
+
+    def find(self, item):
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Raiz de menor índice: grupos estáveis entre execuções
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def cluster_candidates(results: Sequence[Dict], indices: Sequence[int], threshold: float = 0.9,
+                       hasher: MinHasher = None) -> Dict[int, List[int]]:
+    """
+    Agrupa indices (posições em results) do mesmo padrão por snippet normalizado e MinHash.
+
+    Retorna {representante: [membros, incluindo o representante]}; o representante é o
+    membro de maior score x confidence (empate: menor índice). threshold >= 1 desliga o MinHash.
+    """
+    hasher = hasher or MinHasher()
+    uf = _UnionFind(indices)
+    normalized = {idx: normalize_snippet(results[idx].get('snippet', '')) for idx in indices}
+    pattern = {idx: results[idx].get('match', {}).get('pattern_id') for idx in indices}
+
+    # Duplicatas exatas após normalização
+    exact = {}
+    for idx in indices:
+        key = (pattern[idx], hashlib.sha1(normalized[idx].encode('utf-8')).hexdigest())
+        if key in exact:
+            uf.union(exact[key], idx)
+        else:
+            exact[key] = idx
+
+    # Quase duplicatas: um representante exato por chave entra no MinHash
+    if threshold < 1:
+        signatures = {idx: hasher.signature(normalized[idx]) for idx in exact.values()}
+        buckets = defaultdict(list)
+        for idx, signature in signatures.items():
+            for band_key in hasher.band_keys(signature):
+                buckets[(pattern[idx],) + band_key].append(idx)
+        for members in buckets.values():
+            for other in members[1:]:
+                if uf.find(members[0]) != uf.find(other) and \
+                        hasher.similarity(signatures[members[0]], signatures[other]) >= threshold:
+                    uf.union(members[0], other)
+
+    groups = defaultdict(list)
+    for idx in indices:
+        groups[uf.find(idx)].append(idx)
+    clusters = {}
+    for members in groups.values():
+        representative = min(members, key=lambda idx: (-candidate_value(results[idx]), idx))
+        clusters[representative] = sorted(members)
+    return clusters
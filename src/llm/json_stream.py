@@ -0,0 +1,47 @@
+"""
+Detecção incremental do fim de um valor JSON em uma resposta em streaming.
+Com o modo JSON do Ollama a resposta é um único objeto; assim que ele fecha, o resto
+da geração (espaços, tokens até num_predict) pode ser cancelado.
+"""
+from typing import Optional
+
+
+class JsonValueScanner:
+    """
+    Recebe os pedaços da resposta e informa quando o primeiro objeto/array de nível
+    mais alto está completo (chaves e colchetes balanceados fora de strings).
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.complete = False
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Acrescenta um pedaço; retorna o texto do valor quando ele termina, senão None."""
+        if self.complete:
+            return self.text
+        for pos, char in enumerate(chunk):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+                self._started = True
+            elif char in '}]':
+                self._depth -= 1
+                if self._started and self._depth == 0:
+                    self.text += chunk[:pos + 1]
+                    self.complete = True
+                    return self.text
+        self.text += chunk
+        return None
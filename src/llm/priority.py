@@ -0,0 +1,35 @@
+"""
+Ordem de classificação por valor esperado (modo anytime).
+Os candidatos de maior match.score e confidence vão primeiro, com diversidade de
+padrões: cada candidato a mais de um mesmo padrão vale um pouco menos, para que um
+orçamento curto não seja gasto inteiro em um único padrão.
+"""
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+
+def priority_order(results: Sequence[Dict], indices: Sequence[int], diversity: float = 0.9) -> List[int]:
+    """
+    Reordena indices (posições em results) do mais ao menos valioso.
+
+    O valor é score * confidence, multiplicado por diversity ** k, onde k é quantos
+    candidatos do mesmo padrão vêm antes (diversity=1 ignora o padrão).
+    """
+    by_pattern = defaultdict(list)
+    for idx in indices:
+        match = results[idx].get('match', {})
+        by_pattern[match.get('pattern_id')].append(idx)
+
+    ranked = []
+    for members in by_pattern.values():
+        members.sort(key=lambda idx: (-candidate_value(results[idx]), idx))
+        for rank, idx in enumerate(members):
+            ranked.append((candidate_value(results[idx]) * diversity ** rank, idx))
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    return [idx for _, idx in ranked]
+
+
+def candidate_value(result: Dict) -> float:
+    """match.score x match.confidence."""
+    match = result.get('match', {})
+    return float(match.get('score') or 0) * float(match.get('confidence') or 0)
@@ -0,0 +1,94 @@
+"""
+Saída incremental da classificação.
+Cada classificação vira uma linha JSONL assim que termina (diário append-only), de
+modo que uma execução interrompida pode ser retomada e acompanhada pelo monitor;
+a compactação final gera o results_with_llm.json no formato de sempre.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+def item_key(result: Dict) -> str:
+    """Identifica um candidato de results.json (arquivo, método e padrão)."""
+    return '\0'.join([str(result.get('file')), str(result.get('method')),
+                      str(result.get('match', {}).get('pattern_id'))])
+
+
+class ProgressWriter:
+    """
+    Diário de classificações:
+
+        {"index": 3, "key": "...", "pattern_id": "...", "llm_classification": {...},
+         "latency_s": 1.2, "ts": 1700000000.0}
+
+    index é a posição em results.json; key confere que o candidato ainda é o mesmo.
+    Linhas de evento ({"event": "inicio" | "fim", ...}) marcam cada execução para o
+    monitor e são ignoradas por load_progress.
+    Cada linha é gravada e descarregada por completo, então uma interrupção perde no
+    máximo a linha em andamento.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, index: int, result: Dict, classification: Optional[Dict], latency_s: float = None,
+              **extra):
+        record = {
+            'index': index,
+            'key': item_key(result),
+            'pattern_id': result.get('match', {}).get('pattern_id'),
+            'llm_classification': classification,
+            'latency_s': round(latency_s, 4) if latency_s is not None else None,
+            'ts': time.time()
+        }
+        record.update(extra)
+        self._append(record)
+
+    def write_event(self, event: str, **fields):
+        self._append(dict({'event': event, 'ts': time.time()}, **fields))
+
+    def _append(self, record: Dict):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def load_progress(path: str, results: List[Dict]) -> Dict[int, Dict]:
+    """
+    Última linha do diário por índice, só para candidatos que ainda coincidem com
+    results (results.json pode ter sido regenerado desde a execução anterior).
+    """
+    records: Dict[int, Dict] = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Última linha truncada por uma interrupção
+                continue
+            index = record.get('index')
+            if isinstance(index, int) and 0 <= index < len(results) \
+                    and record.get('key') == item_key(results[index]):
+                records[index] = record
+    return records
+
+
+def compact(results: List[Dict], records: Dict[int, Dict], output_path: str):
+    """Aplica as classificações do diário em results e grava o JSON final."""
+    for index, record in records.items():
+        results[index]['llm_classification'] = record.get('llm_classification')
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
@@ -0,0 +1,171 @@
+"""
+Acompanhamento incremental do diário de classificação (outputs/results_with_llm.jsonl).
+O ProgressTail lê só as linhas novas a partir do último deslocamento e o
+ProgressStats atualiza as estatísticas registro a registro, então cada atualização
+custa O(registros novos), não O(arquivo).
+"""
+import json
+import os
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+
+class ProgressTail:
+    """
+    Lê registros completos acrescentados ao diário desde a última chamada.
+    Uma linha ainda sem '\\n' fica para a próxima leitura; se o arquivo for recriado ou
+    reescrito (nova execução sem --resume: o início do arquivo muda), a leitura recomeça
+    do início.
+    """
+
+    HEAD_BYTES = 128
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self._inode = None
+        self._head = b''
+        self._partial = b''
+
+    def read_new(self) -> List[Dict]:
+        """Registros novos (um diário recomeçado traz de novo o evento 'inicio')."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return []
+        with open(self.path, 'rb') as f:
+            head = f.read(min(self.HEAD_BYTES, self.offset))
+            if st.st_ino != self._inode or st.st_size < self.offset or head != self._head[:len(head)]:
+                self.offset, self._inode, self._head, self._partial = 0, st.st_ino, b'', b''
+            f.seek(self.offset)
+            data = f.read()
+        if len(self._head) < self.HEAD_BYTES:
+            self._head += data[:self.HEAD_BYTES - len(self._head)]
+        self.offset += len(data)
+
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+    def skip_finished_run(self) -> List[Dict]:
+        """
+        Registros já existentes no diário; vazio se a última execução dele já terminou
+        (evento 'fim' depois do último 'inicio'), para esperar a próxima execução.
+        """
+        records = self.read_new()
+        events = [r.get('event') for r in records if r.get('event')]
+        return [] if events and events[-1] == 'fim' else records
+
+
+class ProgressStats:
+    """
+    Estatísticas da execução atual, atualizadas a cada registro do diário:
+    itens/s em uma janela móvel de tempo, latência média móvel (EWMA) das chamadas
+    ao LLM, ETA e confirmados por padrão.
+    """
+
+    def __init__(self, total: int = None, window_s: float = 60.0, alpha: float = 0.2):
+        self.window_s = window_s
+        self.alpha = alpha
+        self.started = False
+        self.reset(total)
+
+    def reset(self, total: int = None, already_done: int = 0):
+        self.total = total
+        self.already_done = already_done
+        self.done = 0
+        self.confirmed = 0
+        self.errors = 0
+        self.static = 0
+        self.propagated = 0
+        self.latency_ewma: Optional[float] = None
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.finished = None
+        self._window = deque()
+        self.patterns = defaultdict(lambda: {'total': 0, 'confirmed': 0, 'errors': 0})
+
+    def update(self, record: Dict):
+        event = record.get('event')
+        if event == 'inicio':
+            self.reset(record.get('total'), record.get('ja_classificados') or 0)
+            self.first_ts = record.get('ts')
+            self.started = True
+            return
+        if event == 'fim':
+            # Só o fim de uma execução cujo início foi visto
+            if self.started:
+                self.finished = record
+            return
+        if not isinstance(record.get('index'), int):
+            return
+
+        self.done += 1
+        pattern = self.patterns[record.get('pattern_id') or '?']
+        pattern['total'] += 1
+        classification = record.get('llm_classification') or {}
+        if not classification:
+            self.errors += 1
+            pattern['errors'] += 1
+        elif classification.get('eh_bug_real'):
+            self.confirmed += 1
+            pattern['confirmed'] += 1
+        if classification.get('origem') == 'estatica':
+            # Resolvidos de uma vez antes do LLM: não entram na vazão
+            self.static += 1
+            return
+
+        ts = record.get('ts') or 0.0
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+        self._window.append(ts)
+        while self._window and self._window[0] < ts - self.window_s:
+            self._window.popleft()
+        if classification.get('propagada_de'):
+            self.propagated += 1
+        elif record.get('latency_s'):
+            # Só chamadas ao LLM: propagados têm latência 0
+            latency = record['latency_s']
+            self.latency_ewma = latency if self.latency_ewma is None else \
+                self.alpha * latency + (1 - self.alpha) * self.latency_ewma
+
+    def items_per_s(self) -> Optional[float]:
+        """Vazão na janela móvel (ou desde o início, se a janela tiver um só registro)."""
+        if len(self._window) >= 2 and self._window[-1] > self._window[0]:
+            return (len(self._window) - 1) / (self._window[-1] - self._window[0])
+        if self.first_ts is not None and self.last_ts and self.last_ts > self.first_ts:
+            return (self.done - self.static) / (self.last_ts - self.first_ts)
+        return None
+
+    @property
+    def completed(self) -> int:
+        return self.already_done + self.done
+
+    def eta_s(self) -> Optional[float]:
+        rate = self.items_per_s()
+        if self.total is None or not rate:
+            return None
+        return max(0, self.total - self.completed) / rate
+
+    def to_dict(self) -> Dict:
+        rate = self.items_per_s()
+        eta = self.eta_s()
+        return {
+            'completed': self.completed,
+            'total': self.total,
+            'confirmed': self.confirmed,
+            'errors': self.errors,
+            'static': self.static,
+            'propagated': self.propagated,
+            'items_per_s': round(rate, 3) if rate else None,
+            'latency_ewma_s': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            'eta_s': round(eta, 1) if eta is not None else None,
+            'patterns': {k: dict(v) for k, v in self.patterns.items()}
+        }
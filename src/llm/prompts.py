@@ -0,0 +1,122 @@
+"""
+Templates de prompt e interpretação das respostas do LLM.
+Um item por prompt (PROMPT_TEMPLATE) ou vários itens por prompt com as respostas
+em um array JSON (BATCH_PROMPT_TEMPLATE), que paga o cabeçalho de instruções uma só vez.
+As respostas vêm no modo JSON do Ollama: só é aceito JSON que siga o esquema.
+"""
+import json
+from typing import Dict, List, Optional, Tuple
+
+from llm.cache import text_hash
+
+
+SNIPPET_CHARS = 300
+
+PROMPT_TEMPLATE = """Você é um especialista em detecção de bugs em Java. Analise este código da classe {class_name} e confirme se realmente contém o bug "{pattern_name}".
+
+Código:
+```java
+{snippet}
+```
+
+Padrão procurado: {pattern_name}
+
+Responda APENAS em JSON:
+{{
+    "is_real_bug": true or false,
+    "confidence": número entre 0.0 e 1.0,
+    "reason": breve explicação
+}}"""
+
+BATCH_PROMPT_TEMPLATE = """Você é um especialista em detecção de bugs em Java. Para cada item abaixo, confirme se o código realmente contém o bug indicado.
+
+{items}
+
+Responda APENAS em JSON, com um objeto por item no array "itens", na mesma ordem:
+{{
+    "itens": [
+        {{"id": número do item, "is_real_bug": true or false, "confidence": número entre 0.0 e 1.0, "reason": breve explicação}}
+    ]
+}}"""
+
+BATCH_ITEM_TEMPLATE = """### Item {id}
+Classe: {class_name}
+Padrão procurado: {pattern_name}
+```java
+{snippet}
+```"""
+
+# Muda sempre que algum template muda: invalida o cache de respostas
+TEMPLATE_HASH = text_hash(PROMPT_TEMPLATE + BATCH_PROMPT_TEMPLATE + BATCH_ITEM_TEMPLATE)
+
+
+def _fields(result: Dict) -> Dict:
+    return {
+        'class_name': result.get('class', ''),
+        'pattern_name': result.get('match', {}).get('pattern_name', ''),
+        'snippet': (result.get('snippet') or '')[:SNIPPET_CHARS]
+    }
+
+
+def build_prompt(snippet: str, pattern_name: str, class_name: str) -> str:
+    return PROMPT_TEMPLATE.format(class_name=class_name, pattern_name=pattern_name,
+                                  snippet=snippet[:SNIPPET_CHARS])
+
+
+def build_batch_prompt(results: List[Dict]) -> str:
+    """Prompt com os itens numerados a partir de 1."""
+    items = '\n\n'.join(BATCH_ITEM_TEMPLATE.format(id=n, **_fields(result))
+                        for n, result in enumerate(results, 1))
+    return BATCH_PROMPT_TEMPLATE.format(items=items)
+
+
+def to_classification(result) -> Optional[Dict]:
+    """Objeto {is_real_bug, confidence, reason} do modelo -> classificação, ou None se inválido."""
+    if not isinstance(result, dict) or not all(k in result for k in ('is_real_bug', 'confidence', 'reason')):
+        return None
+    if not isinstance(result['is_real_bug'], bool):
+        return None
+    try:
+        confidence = min(1.0, max(0.0, float(result['confidence'])))
+    except (TypeError, ValueError):
+        return None
+    # Mapear nomes de campos
+    return {
+        'eh_bug_real': result['is_real_bug'],
+        'confianca': confidence,
+        'motivo': str(result['reason'])
+    }
+
+
+def _load(raw: str):
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+def parse_response(raw: str) -> Optional[Dict]:
+    """Resposta JSON do modelo -> {'eh_bug_real', 'confianca', 'motivo'}, ou None se fora do esquema."""
+    return to_classification(_load(raw))
+
+
+def parse_batch_response(raw: str, size: int) -> Dict[int, Tuple[Dict, str]]:
+    """
+    Resposta {"itens": [...]} -> {id do item: (classificação, objeto bruto)}.
+    Só entram ids de 1 a size com objeto válido; o resto deve ser refeito sozinho.
+    """
+    answers = _load(raw)
+    if isinstance(answers, dict):
+        answers = answers.get('itens')
+    if not isinstance(answers, list):
+        return {}
+
+    parsed = {}
+    for answer in answers:
+        if not isinstance(answer, dict):
+            continue
+        item_id = answer.get('id')
+        classification = to_classification(answer)
+        if isinstance(item_id, int) and 1 <= item_id <= size and classification and item_id not in parsed:
+            parsed[item_id] = (classification, json.dumps(answer, ensure_ascii=False))
+    return parsed
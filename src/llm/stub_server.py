@@ -0,0 +1,235 @@
+"""
+Servidor de teste que imita a API de geração do Ollama (POST /api/generate).
+Responde JSON válido para os prompts do classificador (um item ou lote), com
+latência, vazão de tokens, paralelismo e injeção de erros configuráveis, para medir
+e ajustar concorrência, retentativas e lotes sem um modelo de verdade.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class StubConfig:
+    """Comportamento simulado do servidor."""
+    latency_ms: float = 200.0      # processamento do prompt, antes do primeiro token
+    jitter_ms: float = 50.0        # variação uniforme somada à latência
+    tokens_per_s: float = 50.0     # ritmo de geração de cada requisição
+    parallel: int = 1              # gerações simultâneas (como OLLAMA_NUM_PARALLEL)
+    error_rate: float = 0.0        # fração de requisições respondidas com HTTP 500
+    malformed_rate: float = 0.0    # fração de respostas fora do esquema JSON
+    tail_tokens: int = 20          # tokens de espaço após o objeto (até num_predict)
+    seed: int = 0
+
+
+class StubState:
+    """Configuração, fila de gerações e contadores compartilhados pelas conexões."""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.slots = threading.Semaphore(max(1, config.parallel))
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'errors_injected': 0, 'malformed': 0, 'cancelled': 0, 'completed': 0}
+
+    def count(self, name: str):
+        with self.lock:
+            self.counters[name] += 1
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return self.random.random() < rate
+
+    def jitter(self) -> float:
+        with self.lock:
+            return self.random.uniform(0, self.config.jitter_ms)
+
+
+def _verdict(text: str, item_id: int = None) -> dict:
+    """Veredicto determinístico a partir do hash do texto."""
+    digest = int(hashlib.sha1(f'{item_id}:{text}'.encode('utf-8')).hexdigest()[:8], 16)
+    verdict = {
+        'is_real_bug': digest % 2 == 0,
+        'confidence': round(0.5 + (digest % 50) / 100, 2),
+        'reason': 'resposta simulada pelo servidor de teste'
+    }
+    return dict({'id': item_id}, **verdict) if item_id is not None else verdict
+
+
+def fake_response(prompt: str) -> str:
+    """Resposta JSON no formato pedido pelo prompt (lote ou item único)."""
+    ids = [int(n) for n in re.findall(r'^### Item (\d+)', prompt, re.MULTILINE)]
+    if ids:
+        return json.dumps({'itens': [_verdict(prompt, item_id) for item_id in ids]}, ensure_ascii=False)
+    return json.dumps(_verdict(prompt), ensure_ascii=False)
+
+
+def _tokens(text: str):
+    """Divide o texto em pedaços de ~4 caracteres (um token cada)."""
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """
+    Endpoints:
+        POST /api/generate  {"model", "prompt", "stream", "format", "options"}
+        GET  /api/tags      modelos "instalados"
+        GET  /stats         contadores e configuração
+    """
+
+    state: StubState = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, payload):
+        line = json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n'
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send_json(200, {'models': [{'name': 'stub', 'model': 'stub'}]})
+        elif self.path == '/stats':
+            self._send_json(200, {'counters': dict(self.state.counters), 'config': asdict(self.state.config)})
+        else:
+            self._send_json(404, {'error': f'Endpoint desconhecido: {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/api/generate':
+            self._send_json(404, {'error': f'Endpoint desconhecido: {self.path}'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {'error': f'JSON inválido: {e}'})
+            return
+
+        state, config = self.state, self.state.config
+        state.count('requests')
+        if state.roll(config.error_rate):
+            state.count('errors_injected')
+            self._send_json(500, {'error': 'erro injetado pelo servidor de teste'})
+            return
+
+        prompt = payload.get('prompt', '')
+        text = fake_response(prompt)
+        if state.roll(config.malformed_rate):
+            state.count('malformed')
+            text = '{"resposta": "fora do esquema"}'
+        num_predict = (payload.get('options') or {}).get('num_predict') or 10 ** 6
+        tokens = (_tokens(text) + ['\n'] * config.tail_tokens)[:num_predict]
+        model = payload.get('model', 'stub')
+
+        # Espera uma vaga de geração (fila, como no Ollama) e processa o prompt
+        with state.slots:
+            time.sleep((config.latency_ms + state.jitter()) / 1000)
+            if payload.get('stream', True):
+                self._stream(model, prompt, tokens)
+            else:
+                time.sleep(len(tokens) / config.tokens_per_s)
+                self._send_json(200, self._final(model, prompt, tokens, ''.join(tokens)))
+                state.count('completed')
+
+    def _final(self, model: str, prompt: str, tokens, response: str) -> dict:
+        return {
+            'model': model, 'response': response, 'done': True, 'done_reason': 'stop',
+            'prompt_eval_count': max(1, len(prompt) // 4), 'eval_count': len(tokens)
+        }
+
+    def _stream(self, model: str, prompt: str, tokens):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for token in tokens:
+                time.sleep(1 / self.state.config.tokens_per_s)
+                self._write_chunk({'model': model, 'response': token, 'done': False})
+            self._write_chunk(self._final(model, prompt, tokens, ''))
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+            self.state.count('completed')
+        except (BrokenPipeError, ConnectionResetError):
+            # Cliente cancelou a geração (ex.: já recebeu o objeto JSON completo)
+            self.state.count('cancelled')
+            self.close_connection = True
+
+
+def create_server(config: StubConfig, host: str = '127.0.0.1', port: int = 11435):
+    """Cria o servidor (port=0 escolhe uma porta livre; veja server.server_address)."""
+    handler = type('BoundStubRequestHandler', (StubRequestHandler,), {'state': StubState(config)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(config: StubConfig, host: str = '127.0.0.1', port: int = 0):
+    """Sobe o servidor em uma thread de fundo; retorna (servidor, URL)."""
+    server = create_server(config, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def config_arguments(parser: argparse.ArgumentParser):
+    """Opções de StubConfig na linha de comando (também usadas pelo teste de carga)."""
+    defaults = StubConfig()
+    parser.add_argument('--latency-ms', type=float, default=defaults.latency_ms,
+                        help='Latência antes do primeiro token (ms)')
+    parser.add_argument('--jitter-ms', type=float, default=defaults.jitter_ms)
+    parser.add_argument('--tokens-per-s', type=float, default=defaults.tokens_per_s,
+                        help='Tokens gerados por segundo em cada requisição')
+    parser.add_argument('--parallel', type=int, default=defaults.parallel,
+                        help='Gerações simultâneas; as demais esperam na fila')
+    parser.add_argument('--error-rate', type=float, default=defaults.error_rate,
+                        help='Fração de requisições com HTTP 500')
+    parser.add_argument('--malformed-rate', type=float, default=defaults.malformed_rate,
+                        help='Fração de respostas fora do esquema JSON')
+    parser.add_argument('--tail-tokens', type=int, default=defaults.tail_tokens,
+                        help='Tokens de espaço após o objeto JSON')
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+
+
+def config_from_args(args) -> StubConfig:
+    return StubConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, tokens_per_s=args.tokens_per_s,
+                      parallel=args.parallel, error_rate=args.error_rate, malformed_rate=args.malformed_rate,
+                      tail_tokens=args.tail_tokens, seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servidor de teste compatível com a API do Ollama')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = create_server(config_from_args(args), args.host, args.port)
+    print(f"✓ Servidor de teste (API Ollama) ouvindo em http://{args.host}:{args.port} "
+          f"({args.parallel} gerações simultâneas, {args.tokens_per_s:.0f} tokens/s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[CANCELADO] Servidor encerrado pelo usuário")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
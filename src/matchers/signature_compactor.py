@@ -0,0 +1,112 @@
+"""
+Compactação offline da biblioteca de assinaturas.
+Agrupa assinaturas quase idênticas de cada padrão e guarda medoides + raios,
+para que o SimilarityMatcher pontue os medoides antes dos membros.
+"""
+import json
+import os
+import sys
+from typing import Dict, List
+
+from matchers.similarity_matcher import SimilarityMatcher
+
+
+class SignatureCompactor:
+    """
+    Agrupa as assinaturas de cada padrão pela mesma similaridade ponderada do matcher.
+
+    Distância entre assinaturas: 1 - similaridade ponderada (WEIGHTS do SimilarityMatcher).
+    Cada cluster guarda:
+        - medoid: assinatura com menor distância máxima aos demais membros
+        - radius: essa distância máxima (limite superior usado na poda)
+        - members: demais assinaturas do cluster
+    """
+
+    def __init__(self, max_radius: float = 0.15):
+        self.max_radius = max_radius
+        self.matcher = SimilarityMatcher.from_library({})
+
+    def distance(self, sig1: Dict, sig2: Dict) -> float:
+        """Distância ponderada entre duas assinaturas."""
+        score, _ = self.matcher.calculate_similarity(sig1, sig2)
+        return max(0.0, 1.0 - score)
+
+    def cluster_pattern(self, signatures: List[Dict]) -> List[Dict]:
+        """Agrupamento guloso (líder) seguido do recálculo do medoide de cada grupo."""
+        groups: List[List[Dict]] = []
+        leaders: List[Dict] = []
+
+        for sig in signatures:
+            for leader, group in zip(leaders, groups):
+                if self.distance(sig, leader) <= self.max_radius:
+                    group.append(sig)
+                    break
+            else:
+                leaders.append(sig)
+                groups.append([sig])
+
+        return [self._build_cluster(group) for group in groups]
+
+    def _build_cluster(self, group: List[Dict]) -> Dict:
+        """Escolhe o medoide (minimax) e calcula o raio do grupo."""
+        if len(group) == 1:
+            return {'medoid': group[0], 'radius': 0.0, 'members': []}
+
+        size = len(group)
+        dist = [[0.0] * size for _ in range(size)]
+        for i in range(size):
+            for j in range(i + 1, size):
+                dist[i][j] = dist[j][i] = self.distance(group[i], group[j])
+
+        medoid_idx = min(range(size), key=lambda i: max(dist[i]))
+        return {
+            'medoid': group[medoid_idx],
+            'radius': max(dist[medoid_idx]),
+            'members': [sig for i, sig in enumerate(group) if i != medoid_idx]
+        }
+
+    def compact_library(self, library: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+        """
+        Compacta biblioteca plana {pattern_id: [assinatura]}.
+        Padrões já compactados passam sem mudança (rodar de novo não aninha clusters);
+        um padrão que mistura clusters e assinaturas soltas é rejeitado.
+        """
+        compacted = {}
+        for pattern_id, entries in library.items():
+            clustered = [SimilarityMatcher.is_cluster(entry) for entry in entries]
+            if all(clustered) and entries:
+                compacted[pattern_id] = entries
+            elif any(clustered):
+                raise ValueError(f"Padrão {pattern_id} mistura clusters e assinaturas soltas")
+            else:
+                compacted[pattern_id] = self.cluster_pattern(entries)
+        return compacted
+
+    def compact_file(self, input_path: str, output_path: str) -> str:
+        """Lê biblioteca plana de JSON e grava a versão compactada."""
+        with open(input_path, 'r', encoding='utf-8') as f:
+            library = json.load(f)
+
+        compacted = self.compact_library(library)
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(compacted, f, indent=2, ensure_ascii=False)
+
+        total_sigs = sum(
+            1 + len(cluster['members']) for clusters in compacted.values() for cluster in clusters
+        )
+        total_clusters = sum(len(clusters) for clusters in compacted.values())
+        print(f"✓ Compactadas {total_sigs} assinaturas em {total_clusters} clusters ({output_path})")
+        return output_path
+
+
+if __name__ == '__main__':
+    # Uso: python -m matchers.signature_compactor entrada.json saida.json [raio_max]
+    input_path = sys.argv[1] if len(sys.argv) > 1 else 'outputs/defects4j_signatures.json'
+    output_path = sys.argv[2] if len(sys.argv) > 2 else input_path
+    max_radius = float(sys.argv[3]) if len(sys.argv) > 3 else 0.15
+    SignatureCompactor(max_radius).compact_file(input_path, output_path)
@@ -4,6 +4,7 @@ Compara características do código contra assinaturas de padrões.
 """
 import json
 import math
+import threading
 from typing import Dict, List, Tuple
 from dataclasses import dataclass
 
@@ -40,11 +41,47 @@ class SimilarityMatcher:
     }
     
     def __init__(self, signatures_path: str):
-        """Carrega assinaturas de padrões de JSON."""
+        """Carrega assinaturas de padrões de JSON (biblioteca plana ou compactada)."""
         with open(signatures_path, 'r', encoding='utf-8') as f:
-            self.signatures = json.load(f)
+            self._load_library(json.load(f))
         print(f"✓ Carregadas assinaturas para {len(self.signatures)} padrões")
     
+    @classmethod
+    def from_library(cls, library: Dict) -> 'SimilarityMatcher':
+        """Cria matcher a partir de uma biblioteca já carregada em memória."""
+        matcher = cls.__new__(cls)
+        matcher._load_library(library)
+        return matcher
+    
+    def _load_library(self, library: Dict):
+        """
+        Aceita {pattern_id: [assinatura]} ou a forma compactada
+        {pattern_id: [{'medoid', 'radius', 'members'}]} gerada por SignatureCompactor.
+        """
+        self.signatures = {}
+        self.clusters = {}
+        self.stats = {'matches': 0, 'comparisons': 0, 'clusters_scanned': 0, 'clusters_pruned': 0}
+        self._stats_lock = threading.Lock()
+        for pattern_id, entries in library.items():
+            if entries and self.is_cluster(entries[0]):
+                self.clusters[pattern_id] = entries
+                self.signatures[pattern_id] = [
+                    sig for cluster in entries
+                    for sig in [cluster['medoid']] + cluster['members']
+                ]
+            else:
+                self.signatures[pattern_id] = entries
+            for signature in self.signatures[pattern_id]:
+                # Um medoide sem características (ex.: cluster aninhado por compactar
+                # duas vezes) pontuaria errado sem aviso
+                if not isinstance(signature, dict) or 'ast_features' not in signature:
+                    raise ValueError(f"Assinatura inválida no padrão {pattern_id}: sem ast_features")
+    
+    @staticmethod
+    def is_cluster(entry: Dict) -> bool:
+        """Entrada da forma compactada ({'medoid', 'radius', 'members'})."""
+        return isinstance(entry, dict) and 'medoid' in entry and 'members' in entry
+    
     def cosine_similarity(self, vec1: Dict, vec2: Dict) -> float:
         """Similaridade do cosseno entre vetores de características."""
         all_keys = set(vec1.keys()) | set(vec2.keys())
@@ -139,17 +176,26 @@ class SimilarityMatcher:
     def match(self, features: Dict, threshold: float = 0.3) -> List[Match]:
         """Match features against all pattern signatures."""
         matches = []
+        # Contagens desta chamada, somadas a self.stats de uma vez sob o lock
+        # (o serviço residente chama match de várias threads)
+        counts = {'matches': 1, 'comparisons': 0, 'clusters_scanned': 0, 'clusters_pruned': 0}
         
         for pattern_id, pattern_sigs in self.signatures.items():
-            best_score = 0.0
-            best_breakdown = {}
-            
-            # Test against all signatures of this pattern
-            for signature in pattern_sigs:
-                score, breakdown = self.calculate_similarity(features, signature)
-                if score > best_score:
-                    best_score = score
-                    best_breakdown = breakdown
+            if pattern_id in self.clusters:
+                best_score, best_breakdown = self._best_in_clusters(
+                    features, self.clusters[pattern_id], threshold, counts
+                )
+            else:
+                best_score = 0.0
+                best_breakdown = {}
+                
+                # Test against all signatures of this pattern
+                counts['comparisons'] += len(pattern_sigs)
+                for signature in pattern_sigs:
+                    score, breakdown = self.calculate_similarity(features, signature)
+                    if score > best_score:
+                        best_score = score
+                        best_breakdown = breakdown
             
             # Add match if above threshold
             if best_score >= threshold:
@@ -164,9 +210,53 @@ class SimilarityMatcher:
                     feature_breakdown=best_breakdown
                 ))
         
+        with self._stats_lock:
+            for name, value in counts.items():
+                self.stats[name] += value
+        
         # Sort by score descending
         matches.sort(key=lambda x: x.similarity_score, reverse=True)
         return matches
+    
+    def stats_snapshot(self) -> Dict[str, int]:
+        """Cópia consistente de self.stats (seguro com match em outras threads)."""
+        with self._stats_lock:
+            return dict(self.stats)
+    
+    def _best_in_clusters(self, features: Dict, clusters: List[Dict], threshold: float,
+                          counts: Dict[str, int]) -> Tuple[float, Dict]:
+        """
+        Pontua os medoides primeiro e só desce nos membros de um cluster quando
+        score(medoide) + raio ainda pode superar o limiar e o melhor score atual.
+        Comparações e clusters varridos/podados são somados em counts.
+        """
+        best_score = 0.0
+        best_breakdown = {}
+        
+        medoid_scores = []
+        counts['comparisons'] += len(clusters)
+        for cluster in clusters:
+            score, breakdown = self.calculate_similarity(features, cluster['medoid'])
+            if score > best_score:
+                best_score = score
+                best_breakdown = breakdown
+            medoid_scores.append((score + cluster['radius'], cluster))
+        
+        # Clusters mais promissores primeiro: o melhor score sobe mais cedo e poda mais
+        medoid_scores.sort(key=lambda x: x[0], reverse=True)
+        for idx, (upper_bound, cluster) in enumerate(medoid_scores):
+            if upper_bound < threshold or upper_bound <= best_score:
+                counts['clusters_pruned'] += len(medoid_scores) - idx
+                break
+            counts['clusters_scanned'] += 1
+            counts['comparisons'] += len(cluster['members'])
+            for signature in cluster['members']:
+                score, breakdown = self.calculate_similarity(features, signature)
+                if score > best_score:
+                    best_score = score
+                    best_breakdown = breakdown
+        
+        return best_score, best_breakdown
 
 
 if __name__ == '__main__':
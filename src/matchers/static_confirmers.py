@@ -0,0 +1,163 @@
+"""
+Confirmação estática de padrões pela AST do método.
+Alguns padrões de Defects4JPatterns podem ser confirmados ou descartados com certeza
+só pela árvore sintática (ex.: catch vazio, String comparada com ==, stream aberto
+fora de try-with-resources). Esses casos dispensam o LLM; os demais ficam ambíguos.
+"""
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from extractors.java_parser import load_javalang
+
+
+# Tipos que seguram um recurso do sistema e precisam de close()
+CLOSEABLE_TYPE = re.compile(
+    r'(InputStream|OutputStream|Reader|Writer|Socket|Scanner|Channel|Connection|ZipFile|RandomAccessFile)$'
+)
+# Implementam Closeable mas não seguram recurso algum
+IN_MEMORY_TYPES = {
+    'ByteArrayInputStream', 'ByteArrayOutputStream', 'StringReader', 'StringWriter',
+    'CharArrayReader', 'CharArrayWriter', 'StringBufferInputStream'
+}
+PRIMITIVE_TYPES = {'int', 'long', 'short', 'byte', 'char', 'boolean', 'float', 'double'}
+
+Verdict = Optional[Tuple[bool, str]]
+
+
+class _Method:
+    """Método analisado: declaração, nós com seus caminhos e tipos declarados."""
+
+    def __init__(self, javalang, declaration):
+        self.jl = javalang
+        self.declaration = declaration
+        self.nodes = list(declaration)
+        self.types: Dict[str, str] = {}
+        for param in declaration.parameters:
+            self.types[param.name] = param.type.name
+        for _, node in self.find(javalang.tree.LocalVariableDeclaration):
+            for declarator in node.declarators:
+                self.types[declarator.name] = node.type.name
+
+    def find(self, node_type) -> List:
+        return [(path, node) for path, node in self.nodes if isinstance(node, node_type)]
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.declaration.body
+
+
+def parse_method(snippet: str) -> Optional[_Method]:
+    """Analisa o código de um método (ou construtor); None se não for possível."""
+    javalang = load_javalang()
+    if javalang is None or not snippet or not snippet.strip():
+        return None
+    try:
+        tree = javalang.parse.parse('class __Snippet__ {\n' + snippet + '\n}')
+    except Exception:
+        return None
+    body = tree.types[0].body if tree.types else []
+    for declaration in body:
+        if isinstance(declaration, (javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)):
+            return _Method(javalang, declaration)
+    return None
+
+
+def _check_empty_catch(method: _Method) -> Verdict:
+    catches = [node for _, node in method.find(method.jl.tree.CatchClause)]
+    if not catches:
+        return False, 'o método não tem bloco catch'
+    if any(not catch.block for catch in catches):
+        return True, 'bloco catch vazio'
+    return False, 'todos os blocos catch têm tratamento'
+
+
+def _literal_kind(node) -> Optional[str]:
+    """'string', 'null' ou 'other' para literais; None para o resto."""
+    value = getattr(node, 'value', None)
+    if type(node).__name__ != 'Literal' or value is None:
+        return None
+    if value.startswith('"'):
+        return 'string'
+    return 'null' if value == 'null' else 'other'
+
+
+def _declared_type(method: _Method, node) -> Optional[str]:
+    if type(node).__name__ == 'MemberReference' and not node.qualifier and not node.selectors:
+        return method.types.get(node.member)
+    return None
+
+
+def _check_string_equality(method: _Method) -> Verdict:
+    comparisons = [node for _, node in method.find(method.jl.tree.BinaryOperation)
+                   if node.operator in ('==', '!=')]
+    if not comparisons:
+        return False, 'o método não usa == nem !='
+    undecided = False
+    for node in comparisons:
+        operands = (node.operandl, node.operandr)
+        literals = [_literal_kind(op) for op in operands]
+        types = [_declared_type(method, op) for op in operands]
+        if 'null' in literals or 'other' in literals or any(t in PRIMITIVE_TYPES for t in types):
+            # Comparação com null, número/booleano ou tipo primitivo: legítima
+            continue
+        if 'string' in literals or types == ['String', 'String']:
+            return True, 'String comparada com == / !='
+        undecided = True
+    if undecided:
+        return None
+    return False, 'nenhuma comparação == / != envolve String'
+
+
+def _escapes(method: _Method, name: str) -> bool:
+    """A variável é retornada, passada adiante ou atribuída (a posse pode mudar)."""
+    return any(not node.qualifier and node.member == name
+               for _, node in method.find(method.jl.tree.MemberReference))
+
+
+def _is_closed(method: _Method, name: str) -> bool:
+    return any(node.qualifier == name and node.member == 'close'
+               for _, node in method.find(method.jl.tree.MethodInvocation))
+
+
+def _check_resource_leak(method: _Method) -> Verdict:
+    jl = method.jl
+    creations = [(path, node) for path, node in method.find(jl.tree.ClassCreator)
+                 if CLOSEABLE_TYPE.search(node.type.name) and node.type.name not in IN_MEMORY_TYPES]
+    if not creations and not method.find(jl.tree.MethodInvocation):
+        return False, 'o método não cria nem obtém recursos'
+    for path, node in creations:
+        if any(isinstance(parent, jl.tree.TryResource) for parent in path):
+            continue
+        declarator = path[-1] if path and isinstance(path[-1], jl.tree.VariableDeclarator) else None
+        if declarator is None:
+            continue
+        name = declarator.name
+        if not _escapes(method, name) and not _is_closed(method, name):
+            return True, f'{node.type.name} aberto fora de try-with-resources e nunca fechado'
+    return None
+
+
+CHECKS: Dict[str, Callable[[_Method], Verdict]] = {
+    'empty-exception-handler': _check_empty_catch,
+    'string-equality-operator': _check_string_equality,
+    'resource-leak': _check_resource_leak,
+}
+
+
+def confirm(snippet: str, pattern_id: str) -> Optional[Dict]:
+    """
+    Classificação definitiva (mesmo formato da do LLM, com 'origem': 'estatica'),
+    ou None se o caso for ambíguo e precisar do LLM.
+    """
+    method = parse_method(snippet)
+    if method is None:
+        return None
+    if method.is_empty:
+        verdict = (False, 'corpo do método vazio')
+    else:
+        check = CHECKS.get(pattern_id)
+        verdict = check(method) if check else None
+    if verdict is None:
+        return None
+    is_bug, reason = verdict
+    return {'eh_bug_real': is_bug, 'confianca': 1.0, 'motivo': reason, 'origem': 'estatica'}
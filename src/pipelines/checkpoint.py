@@ -0,0 +1,159 @@
+"""
+Checkpoint incremental do pipeline.
+Persiste, por arquivo Java, os métodos extraídos com características e matches
+em um diretório de execução, para que uma execução interrompida possa ser retomada.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class RunCheckpoint:
+    """
+    Diretório de execução:
+
+        run_dir/
+        ├── manifest.json      configuração, estágios concluídos e status
+        ├── completed.jsonl    diário append-only: uma linha por arquivo concluído
+        └── units/<hash>.json  métodos (com features e match) de cada arquivo
+
+    A unidade de trabalho é um arquivo Java. Uma unidade só entra no diário depois
+    de gravada por completo, então um crash perde no máximo o arquivo em andamento.
+    O hash do blob git do arquivo (do índice, ou do conteúdo para arquivos modificados)
+    é registrado no diário e um arquivo alterado desde então deixa de contar como
+    concluído; sem hash para comparar, o arquivo é processado de novo.
+    """
+
+    MANIFEST = 'manifest.json'
+    JOURNAL = 'completed.jsonl'
+    UNITS_DIR = 'units'
+
+    def __init__(self, run_dir: str, config: Dict, resume: bool = False):
+        self.run_dir = run_dir
+        self.config = config
+        self.units_dir = os.path.join(run_dir, self.UNITS_DIR)
+        self.manifest_path = os.path.join(run_dir, self.MANIFEST)
+        self.journal_path = os.path.join(run_dir, self.JOURNAL)
+        self.completed: Dict[str, Optional[str]] = {}
+
+        os.makedirs(self.units_dir, exist_ok=True)
+
+        if resume and os.path.exists(self.manifest_path):
+            self.manifest = self._read_json(self.manifest_path)
+            if self.manifest.get('config') != config:
+                raise ValueError(
+                    f"Configuração do checkpoint em '{run_dir}' difere da atual; "
+                    "use outro diretório ou execute sem --resume"
+                )
+            self.completed = self._read_journal()
+            print(f"✓ Retomando execução: {len(self.completed)} arquivos já concluídos em {run_dir}")
+        else:
+            self._reset()
+
+    def _reset(self):
+        """Inicia um checkpoint vazio, descartando unidades de execuções anteriores."""
+        for name in os.listdir(self.units_dir):
+            os.remove(os.path.join(self.units_dir, name))
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.manifest = {
+            'config': self.config,
+            'stages': [],
+            'status': 'running',
+            'started_at': datetime.now().isoformat(timespec='seconds')
+        }
+        self._write_manifest()
+
+    # ------------------------------------------------------------------
+    # Estágios e status
+    # ------------------------------------------------------------------
+
+    def stage_done(self, stage: str) -> bool:
+        return stage in self.manifest['stages']
+
+    def mark_stage(self, stage: str):
+        if stage not in self.manifest['stages']:
+            self.manifest['stages'].append(stage)
+            self._write_manifest()
+
+    def finish(self):
+        self.manifest['status'] = 'completed'
+        self.manifest['finished_at'] = datetime.now().isoformat(timespec='seconds')
+        self.manifest['units'] = len(self.completed)
+        self._write_manifest()
+
+    # ------------------------------------------------------------------
+    # Unidades (um arquivo Java cada)
+    # ------------------------------------------------------------------
+
+    def is_done(self, file_path: str, blob: Optional[str] = None) -> bool:
+        if file_path not in self.completed:
+            return False
+        recorded = self.completed[file_path]
+        return blob is not None and recorded == blob
+
+    def save_unit(self, file_path: str, methods: List[Dict], blob: Optional[str] = None):
+        """Grava métodos de um arquivo (com features e match) e registra no diário."""
+        unit_path = self._unit_path(file_path)
+        self._write_json_atomic(unit_path, {'file': file_path, 'methods': methods})
+
+        matched = sum(1 for m in methods if 'match' in m)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'file': file_path, 'methods': len(methods), 'matched': matched,
+                                'blob': blob}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.completed[file_path] = blob
+
+    def load_matches(self, file_path: str) -> List[Dict]:
+        """Métodos casados de um arquivo já concluído."""
+        unit = self._read_json(self._unit_path(file_path))
+        return [m for m in unit['methods'] if 'match' in m]
+
+    def _unit_path(self, file_path: str) -> str:
+        digest = hashlib.sha1(file_path.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.units_dir, f'{digest}.json')
+
+    # ------------------------------------------------------------------
+    # E/S
+    # ------------------------------------------------------------------
+
+    def _read_journal(self) -> Dict[str, Optional[str]]:
+        """Lê o diário (arquivo -> blob) e descarta uma última linha truncada por crash."""
+        completed = {}
+        if not os.path.exists(self.journal_path):
+            return completed
+        with open(self.journal_path, 'rb') as f:
+            data = f.read()
+
+        # Cortar a linha parcial para que novas entradas não sejam anexadas a ela
+        valid_size = data.rfind(b'\n') + 1
+        if valid_size < len(data):
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(valid_size)
+
+        for line in data[:valid_size].decode('utf-8').splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if os.path.exists(self._unit_path(entry['file'])):
+                completed[entry['file']] = entry.get('blob')
+        return completed
+
+    def _write_manifest(self):
+        self._write_json_atomic(self.manifest_path, self.manifest)
+
+    @staticmethod
+    def _write_json_atomic(path: str, data):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_json(path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
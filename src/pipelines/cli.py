@@ -0,0 +1,166 @@
+"""
+Ponto de entrada de linha de comando (console script `bugdetect`).
+
+Aqui só se importam módulos leves da stdlib: cada subcomando importa o que precisa
+ao ser executado, para que `--help` e a varredura de um único arquivo iniciem rápido.
+
+    bugdetect scan                 pipeline completo (configuração via .env)
+    bugdetect scan --file A.java   varre um único arquivo, sem clonar nada
+    bugdetect serve ...            serviço residente (ver service/scan_server.py)
+    bugdetect shard ...            varredura em shards (ver pipelines/sharding.py)
+"""
+import argparse
+import json
+import os
+import sys
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, 'false').lower() in ('1', 'true', 'yes')
+
+
+def _load_env():
+    """Carrega o .env se python-dotenv estiver instalado."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def _scan_file(args) -> int:
+    """Varre um único arquivo com o matcher, sem passo de setup."""
+    from service.scanner import ScannerService
+
+    threshold = float(os.environ.get('SIMILARITY_THRESHOLD', '0.3')) if args.threshold is None else args.threshold
+    service = ScannerService(args.signatures, root_dir='.', threshold=threshold)
+    # Arquivo indicado pelo próprio usuário local: lido direto, sem a restrição à raiz do serviço
+    with open(args.file, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+    results = [r for r in service.scan_source(args.file, content) if r['match']]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0
+
+
+def _scan(args) -> int:
+    """Executa o pipeline completo (antigo scripts/pipeline.py)."""
+    _load_env()
+
+    # Consoles cp1252 (Windows) não codificam '✓': substituir em vez de abortar a execução
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(errors='replace')
+
+    if args.file:
+        return _scan_file(args)
+
+    from pipelines.detection_pipeline import BugDetectionPipeline
+
+    # Configuration
+    repo_url = os.environ.get('REPO_URL', 'https://github.com/apache/commons-lang.git')
+    repo_path = os.environ.get('REPO_PATH', 'dados/commons-lang')
+    output_path = os.environ.get('OUTPUT_PATH', 'outputs/results.json')
+    threshold = float(os.environ.get('SIMILARITY_THRESHOLD', '0.3')) if args.threshold is None else args.threshold
+    top_k = int(os.environ.get('TOP_K', '50'))
+    compact_radius = os.environ.get('SIGNATURE_COMPACT_RADIUS')
+    streaming = _env_flag('STREAMING')
+    queue_size = int(os.environ.get('STREAMING_QUEUE_SIZE', '32'))
+    low_memory = _env_flag('LOW_MEMORY')
+    run_dir = args.run_dir or os.environ.get('RUN_DIR') or ('outputs/run' if args.resume else None)
+
+    # Run pipeline
+    pipeline = BugDetectionPipeline(
+        repo_url,
+        repo_path,
+        signatures_path=args.signatures,
+        compact_radius=float(compact_radius) if compact_radius else None,
+        low_memory=low_memory,
+        clone_strategy=args.clone_strategy or os.environ.get('CLONE_STRATEGY', 'full'),
+        clone_depth=int(os.environ.get('CLONE_DEPTH', '1')) if args.clone_depth is None else args.clone_depth,
+        revision=args.revision or os.environ.get('REPO_REVISION'),
+        mirror_dir=args.mirror_dir or os.environ.get('MIRROR_DIR', 'dados/mirrors'),
+        keep_worktree=args.keep_worktree,
+        zero_checkout=args.no_checkout or _env_flag('ZERO_CHECKOUT')
+    )
+    results = pipeline.run(
+        threshold=threshold,
+        top_k=top_k,
+        output_path=output_path,
+        streaming=streaming,
+        queue_size=queue_size,
+        run_dir=run_dir,
+        resume=args.resume,
+        metrics_prometheus=args.prometheus or _env_flag('METRICS_PROMETHEUS'),
+        results_jsonl=args.jsonl or os.environ.get('RESULTS_JSONL'),
+        results_columnar=args.columnar or os.environ.get('RESULTS_COLUMNAR')
+    )
+
+    print(f"\n✓ Analysis complete!")
+    print(f"  Found {len(results)} potential bugs")
+    print(f"  Results: {output_path}")
+    print(f"  CSV: {output_path.replace('.json', '.csv')}")
+    return 0
+
+
+def _serve(argv) -> int:
+    from service.scan_server import main as serve_main
+    serve_main(argv)
+    return 0
+
+
+def _shard(argv) -> int:
+    from pipelines.sharding import main as shard_main
+    shard_main(argv)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='bugdetect', description='Detecção de bugs por similaridade estrutural')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_scan = sub.add_parser('scan', help='Executa o pipeline de detecção (demais opções vêm do .env)')
+    p_scan.add_argument('--file', default=None, help='Varre apenas este arquivo .java (sem clonar)')
+    p_scan.add_argument('--signatures', default='outputs/defects4j_signatures.json')
+    p_scan.add_argument('--threshold', type=float, default=None,
+                        help='Limiar de similaridade (padrão: $SIMILARITY_THRESHOLD ou 0.3)')
+    p_scan.add_argument('--run-dir', default=None,
+                        help='Diretório de checkpoint incremental (padrão: $RUN_DIR)')
+    p_scan.add_argument('--resume', action='store_true',
+                        help='Retoma a partir do último arquivo concluído em --run-dir')
+    p_scan.add_argument('--prometheus', action='store_true',
+                        help='Exporta também metrics.prom (texto Prometheus)')
+    p_scan.add_argument('--clone-strategy', choices=['full', 'shallow', 'blobless', 'sparse'], default=None,
+                        help='Estratégia de clonagem (padrão: $CLONE_STRATEGY ou full)')
+    p_scan.add_argument('--clone-depth', type=int, default=None,
+                        help='Commits mantidos com --clone-strategy shallow (padrão: $CLONE_DEPTH ou 1)')
+    p_scan.add_argument('--revision', default=None,
+                        help='Varre esta revisão num worktree do espelho local (padrão: $REPO_REVISION)')
+    p_scan.add_argument('--mirror-dir', default=None,
+                        help='Diretório dos espelhos bare (padrão: $MIRROR_DIR ou dados/mirrors)')
+    p_scan.add_argument('--keep-worktree', action='store_true',
+                        help='Não remove o worktree de --revision ao terminar')
+    p_scan.add_argument('--no-checkout', action='store_true',
+                        help='Com --revision, lê os .java do banco de objetos do git sem criar worktree')
+    p_scan.add_argument('--jsonl', default=None,
+                        help='Grava todos os métodos casados em JSONL, em streaming (.gz comprime)')
+    p_scan.add_argument('--columnar', default=None,
+                        help='Grava todos os métodos casados em Parquet (.parquet) ou Arrow (.arrow); requer pyarrow')
+
+    # Opções de serve/shard são repassadas ao parser do próprio módulo
+    sub.add_parser('serve', help='Sobe o serviço residente de varredura', add_help=False)
+    sub.add_parser('shard', help='Varredura distribuída em shards', add_help=False)
+    return parser
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == 'serve':
+        return _serve(argv[1:])
+    if argv and argv[0] == 'shard':
+        return _shard(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    return _scan(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
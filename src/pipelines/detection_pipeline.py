@@ -6,14 +6,17 @@ import os
 import json
 import csv
 import concurrent.futures
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
 from pathlib import Path
 
-from utils.repo_cloner import clonar_repositorio_java
+from utils.repo_cloner import clonar_repositorio_java, criar_worktree, garantir_revisao, remover_worktree
 from extractors.java_parser import JavaMethodExtractor
 from extractors.feature_extractor import FeatureExtractor
-from matchers.signature_generator import SignatureGenerator
+from pipelines.checkpoint import RunCheckpoint
 from matchers.similarity_matcher import SimilarityMatcher
+from utils.metrics import MetricsCollector
+from utils.result_writers import open_result_writers
+from utils.file_inventory import build_inventory
 
 
 class BugDetectionPipeline:
@@ -28,12 +31,46 @@ class BugDetectionPipeline:
         5. Classificar e filtrar resultados
     """
     
-    def __init__(self, repo_url: str, repo_path: str, signatures_path: str = 'outputs/defects4j_signatures.json'):
+    def __init__(self, repo_url: str, repo_path: str, signatures_path: str = 'outputs/defects4j_signatures.json',
+                 compact_radius: Optional[float] = None, low_memory: bool = False,
+                 clone_strategy: str = 'full', clone_depth: int = 1, revision: Optional[str] = None,
+                 mirror_dir: str = 'dados/mirrors', keep_worktree: bool = False, zero_checkout: bool = False):
+        """
+        low_memory: após calcular as características, cada método guarda só arquivo e
+        linhas (sem 'code'); após o matching, descarta também 'features'. Os snippets
+        do top-K final são relidos do disco em _save_results. No modo sequencial, os
+        passos 2-4 passam a rodar arquivo a arquivo (run_per_file), como no streaming
+        e no checkpoint; sem isso o passo 2 ainda carregaria o código de todos os métodos.
+        
+        clone_strategy/clone_depth: ver utils/repo_cloner.py (full, shallow, blobless, sparse).
+        
+        revision: em vez de clonar, cria em repo_path um worktree dessa revisão a partir
+        do espelho bare em mirror_dir (compartilhado entre execuções); o worktree é
+        removido ao fim da execução, salvo com keep_worktree=True. Com zero_checkout=True,
+        nada é escrito em disco: os .java da revisão são lidos do banco de objetos do
+        espelho (utils/git_blob_source.py) e repo_path serve só de prefixo dos caminhos.
+        """
         self.repo_url = repo_url
         self.repo_path = repo_path
         self.signatures_path = signatures_path
+        self.compact_radius = compact_radius
+        self.low_memory = low_memory
+        self.clone_strategy = clone_strategy
+        self.clone_depth = clone_depth
+        self.revision = revision
+        self.mirror_dir = mirror_dir
+        self.keep_worktree = keep_worktree
+        self.zero_checkout = zero_checkout
         self.feature_extractor = FeatureExtractor()
         self.matcher = None
+        self.metrics = MetricsCollector()
+        # Writers de resultados em streaming (JSONL/colunar), abertos por run()
+        self.result_writers: List = []
+        # Inventário de arquivos Java (SourceFile) montado no passo 1 e reusado na extração
+        self.inventory: Optional[List] = None
+        # Leitor de código no lugar do disco (blobs do git no modo zero_checkout)
+        self.source_reader: Optional[Callable[[str], str]] = None
+        self.blob_source = None
     
     def step1_setup(self) -> tuple:
         """Passo 1: Clonar repo + Gerar assinaturas em paralelo."""
@@ -41,7 +78,7 @@ class BugDetectionPipeline:
         print("STEP 1: Setup (Parallel)")
         print("="*60)
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        with self.metrics.stage('setup'), concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
             future_clone = executor.submit(self._clone_repository)
             future_sigs = executor.submit(self._generate_signatures)
             
@@ -53,24 +90,69 @@ class BugDetectionPipeline:
         return clone_result, sig_result
     
     def _clone_repository(self) -> str:
-        """Clona repositório Java."""
-        success = clonar_repositorio_java(self.repo_url, self.repo_path)
+        """Clona repositório Java (ou cria o worktree da revisão pedida) e guarda o inventário."""
+        if self.revision and self.zero_checkout:
+            return "Success" if self._open_blob_source() else "Failed"
+        inventory = []
+        if self.revision:
+            success = criar_worktree(self.repo_url, self.revision, self.repo_path, self.mirror_dir,
+                                     sparse=self.clone_strategy == 'sparse', inventario=inventory)
+        else:
+            success = clonar_repositorio_java(self.repo_url, self.repo_path, strategy=self.clone_strategy,
+                                              depth=self.clone_depth, inventario=inventory)
+        if success:
+            self.inventory = inventory
+            self.metrics.update_counters('inventory', {
+                'files': len(inventory),
+                'bytes': sum(f.size for f in inventory),
+                'with_blob': sum(1 for f in inventory if f.blob)
+            })
         return "Success" if success else "Failed"
     
+    def _open_blob_source(self) -> bool:
+        """Modo zero_checkout: inventário e leitura de código direto do espelho, na revisão pedida."""
+        from utils.git_blob_source import GitBlobSource
+        
+        if self.blob_source is not None:
+            self.blob_source.close()
+        try:
+            mirror = garantir_revisao(self.repo_url, self.revision, self.mirror_dir)
+            self.blob_source = GitBlobSource(mirror, self.revision, self.repo_path)
+            self.inventory = self.blob_source.inventory()
+        except Exception as e:
+            print(f"✗ Erro ao ler {self.revision} do banco de objetos: {e}")
+            return False
+        self.source_reader = self.blob_source.read_source
+        print(f"✓ {len(self.inventory)} arquivos .java em {self.revision[:12]} (sem checkout)")
+        return bool(self.inventory)
+    
+    def _new_extractor(self) -> JavaMethodExtractor:
+        """Extrator sobre o inventário do passo 1 (ou varrendo a árvore, sem ele)."""
+        return JavaMethodExtractor(self.repo_path, inventory=self.inventory, source_reader=self.source_reader)
+    
     def _generate_signatures(self) -> str:
         """Gera assinaturas de padrões."""
+        from matchers.signature_generator import SignatureGenerator
         generator = SignatureGenerator()
         generator.save_signatures(self.signatures_path)
+        if self.compact_radius is not None:
+            from matchers.signature_compactor import SignatureCompactor
+            SignatureCompactor(self.compact_radius).compact_file(self.signatures_path, self.signatures_path)
+            return f"Saved (compacted) to {self.signatures_path}"
         return f"Saved to {self.signatures_path}"
     
-    def step2_extract_methods(self) -> List[Dict]:
-        """Passo 2: Extrair métodos de arquivos Java."""
+    def step2_extract_methods(self, files: Optional[List[str]] = None) -> List[Dict]:
+        """Passo 2: Extrair métodos de arquivos Java (todos, ou apenas files)."""
         print("\n" + "="*60)
         print("STEP 2: Method Extraction")
         print("="*60)
         
-        extractor = JavaMethodExtractor(self.repo_path)
-        methods = extractor.extract_from_directory()
+        extractor = self._new_extractor()
+        methods = []
+        with self.metrics.stage('extract'):
+            for java_file in (extractor.list_java_files() if files is None else files):
+                methods.extend(self._extract_file(extractor, java_file))
+        self.metrics.update_counters('extractor', extractor.stats)
         
         print(f"✓ Extraídos {len(methods)} métodos")
         return methods
@@ -81,15 +163,8 @@ class BugDetectionPipeline:
         print("STEP 3: Feature Computation")
         print("="*60)
         
-        methods_with_features = []
-        for method in methods:
-            code = method.get('code', '')
-            if not code:
-                continue
-            
-            features = self.feature_extractor.extract_all_features(code)
-            method['features'] = features
-            methods_with_features.append(method)
+        with self.metrics.stage('features'):
+            methods_with_features = [m for m in methods if self._compute_method_features(m)]
         
         print(f"✓ Características calculadas para {len(methods_with_features)} métodos")
         return methods_with_features
@@ -102,32 +177,9 @@ class BugDetectionPipeline:
         
         self.matcher = SimilarityMatcher(self.signatures_path)
         
-        matched_methods = []
-        for method in methods:
-            features = method.get('features')
-            if not features:
-                continue
-            
-            matches = self.matcher.match(features, threshold)
-            
-            if matches:
-                best_match = matches[0]
-                method['match'] = {
-                    'pattern_id': best_match.pattern_id,
-                    'pattern_name': best_match.pattern_name,
-                    'score': best_match.similarity_score,
-                    'confidence': best_match.confidence,
-                    'breakdown': best_match.feature_breakdown
-                }
-                method['all_matches'] = [
-                    {
-                        'pattern_id': m.pattern_id,
-                        'score': m.similarity_score,
-                        'confidence': m.confidence
-                    }
-                    for m in matches
-                ]
-                matched_methods.append(method)
+        with self.metrics.stage('match'):
+            matched_methods = [m for m in methods if self._match_method(m, threshold)]
+        self.metrics.update_counters('matcher', self.matcher.stats)
         
         print(f"✓ Encontrados {len(matched_methods)} métodos com correspondências de padrão")
         return matched_methods
@@ -138,45 +190,316 @@ class BugDetectionPipeline:
         print(f"PASSO 5: Classificação & Filtragem (top-{top_k})")
         print("="*60)
         
-        ranked = sorted(
-            matches,
-            key=lambda x: x.get('match', {}).get('score', 0),
-            reverse=True
-        )
+        with self.metrics.stage('rank') as stage:
+            stage.items += len(matches)
+            ranked = sorted(matches, key=self._rank_key, reverse=True)
+            top_results = ranked[:top_k]
+
+        print(f"✓ Selecionados top-{len(top_results)} resultados")
+        return top_results
+    
+    def _extract_file(self, extractor: JavaMethodExtractor, java_file: str) -> List[Dict]:
+        """Extrai métodos de um arquivo, medindo o tempo gasto nele."""
+        with self.metrics.item('extract', 'file', java_file):
+            return extractor.extract_from_file(java_file)
+    
+    @staticmethod
+    def _method_key(method: Dict) -> str:
+        """Identificador legível de um método para as métricas."""
+        return f"{method.get('file')}::{method.get('class')}.{method.get('name')}"
+    
+    def _compute_method_features(self, method: Dict) -> bool:
+        """Calcula características de um método; False se não houver código."""
+        code = method.get('code', '')
+        if not code:
+            return False
+        
+        with self.metrics.item('features', 'method', self._method_key(method)):
+            method['features'] = self.feature_extractor.extract_all_features(code)
+        if self.low_memory:
+            # Só file/start_line/end_line ficam; o snippet é relido no fim se entrar no top-K
+            del method['code']
+        return True
+    
+    def _match_method(self, method: Dict, threshold: float) -> bool:
+        """Anexa 'match' e 'all_matches' ao método; False se nenhum padrão passar do limiar."""
+        features = method.get('features')
+        if not features:
+            return False
+        
+        with self.metrics.item('match', 'method', self._method_key(method)):
+            matches = self.matcher.match(features, threshold)
+        if self.low_memory:
+            del method['features']
+        if not matches:
+            return False
+        
+        best_match = matches[0]
+        method['match'] = {
+            'pattern_id': best_match.pattern_id,
+            'pattern_name': best_match.pattern_name,
+            'score': best_match.similarity_score,
+            'confidence': best_match.confidence,
+            'breakdown': best_match.feature_breakdown
+        }
+        method['all_matches'] = [
+            {
+                'pattern_id': m.pattern_id,
+                'score': m.similarity_score,
+                'confidence': m.confidence
+            }
+            for m in matches
+        ]
+        self._emit_result(method)
+        return True
+    
+    def _emit_result(self, method: Dict):
+        """Entrega um método casado aos writers em streaming, assim que é produzido."""
+        for writer in self.result_writers:
+            writer.write(method)
+    
+    @staticmethod
+    def _rank_key(method: Dict) -> float:
+        """Chave de ordenação do passo 5."""
+        return method.get('match', {}).get('score', 0)
+    
+    def run_incremental(self, threshold: float, checkpoint: RunCheckpoint) -> List[Dict]:
+        """Passos 2-4 arquivo a arquivo, gravando cada arquivo no checkpoint."""
+        print("\n" + "="*60)
+        print(f"PASSOS 2-4: Execução Incremental (checkpoint={checkpoint.run_dir})")
+        print("="*60)
+        
+        self.matcher = SimilarityMatcher(self.signatures_path)
+        extractor = self._new_extractor()
+        
+        matched_methods = []
+        resumed = 0
+        with self.metrics.stage('incremental'):
+            for java_file in extractor.list_java_files():
+                blob = extractor.blob_of(java_file)
+                if checkpoint.is_done(java_file, blob):
+                    loaded = checkpoint.load_matches(java_file)
+                    for method in loaded:
+                        self._emit_result(method)
+                    matched_methods.extend(loaded)
+                    resumed += 1
+                    continue
+                
+                methods, matched = self._process_file(extractor, java_file, threshold)
+                matched_methods.extend(matched)
+                checkpoint.save_unit(java_file, methods, blob)
+        self.metrics.update_counters('extractor', extractor.stats)
+        self.metrics.update_counters('matcher', self.matcher.stats)
+        
+        print(f"✓ {len(checkpoint.completed)} arquivos concluídos ({resumed} retomados do checkpoint)")
+        print(f"✓ Encontrados {len(matched_methods)} métodos com correspondências de padrão")
+        return matched_methods
+    
+    def run_per_file(self, threshold: float) -> List[Dict]:
+        """
+        Passos 2-4 arquivo a arquivo (modo low_memory sequencial): só os métodos do
+        arquivo atual ficam em memória; dos demais, apenas os casados, sem código.
+        """
+        print("\n" + "="*60)
+        print("PASSOS 2-4: Execução Arquivo a Arquivo (baixa memória)")
+        print("="*60)
+        
+        self.matcher = SimilarityMatcher(self.signatures_path)
+        extractor = self._new_extractor()
+        
+        matched_methods = []
+        files = 0
+        with self.metrics.stage('per_file'):
+            for java_file in extractor.list_java_files():
+                _, matched = self._process_file(extractor, java_file, threshold)
+                matched_methods.extend(matched)
+                files += 1
+        self.metrics.update_counters('extractor', extractor.stats)
+        self.metrics.update_counters('matcher', self.matcher.stats)
+        
+        print(f"✓ {files} arquivos processados")
+        print(f"✓ Encontrados {len(matched_methods)} métodos com correspondências de padrão")
+        return matched_methods
+    
+    def _process_file(self, extractor: JavaMethodExtractor, java_file: str, threshold: float) -> tuple:
+        """Extrai, calcula características e casa os métodos de um arquivo; (métodos, casados)."""
+        methods = self._extract_file(extractor, java_file)
+        methods = [m for m in methods if self._compute_method_features(m)]
+        return methods, [m for m in methods if self._match_method(m, threshold)]
+    
+    def run_streaming(self, threshold: float = 0.3, top_k: int = 50, queue_size: int = 32,
+                      checkpoint: Optional[RunCheckpoint] = None) -> List[Dict]:
+        """Passos 2-5 como estágios concorrentes ligados por filas limitadas."""
+        print("\n" + "="*60)
+        print(f"PASSOS 2-5: Execução em Streaming (fila={queue_size}, top-{top_k})")
+        print("="*60)
+        
+        self.matcher = SimilarityMatcher(self.signatures_path)
+        from pipelines.streaming_pipeline import StreamingPipeline
+        streaming = StreamingPipeline(self, threshold=threshold, top_k=top_k, queue_size=queue_size,
+                                      checkpoint=checkpoint)
+        with self.metrics.stage('streaming'):
+            top_results = streaming.run()
+        self.metrics.update_counters('extractor', streaming.extractor.stats)
+        self.metrics.update_counters('matcher', self.matcher.stats)
         
-        top_results = ranked[:top_k]
+        print(f"✓ {streaming.counts['methods']} métodos extraídos de {streaming.counts['files']} arquivos")
+        if streaming.counts['resumed']:
+            print(f"✓ {streaming.counts['resumed']} arquivos retomados do checkpoint")
+        print(f"✓ {streaming.counts['matched']} métodos com correspondências de padrão")
         print(f"✓ Selecionados top-{len(top_results)} resultados")
         return top_results
     
-    def run(self, threshold: float = 0.3, top_k: int = 50, output_path: str = 'outputs/results.json'):
-        """Executa pipeline completo."""
+    def _checkpoint_config(self, threshold: float) -> Dict:
+        """Parâmetros que precisam coincidir para retomar um checkpoint."""
+        return {
+            'repo_url': self.repo_url,
+            'repo_path': self.repo_path,
+            'signatures_path': self.signatures_path,
+            'compact_radius': self.compact_radius,
+            'threshold': threshold,
+            **({'revision': self.revision} if self.revision else {})
+        }
+    
+    def run(self, threshold: float = 0.3, top_k: int = 50, output_path: str = 'outputs/results.json',
+            streaming: bool = False, queue_size: int = 32, run_dir: Optional[str] = None,
+            resume: bool = False, metrics_prometheus: bool = False,
+            results_jsonl: Optional[str] = None, results_columnar: Optional[str] = None):
+        """
+        Executa pipeline completo.
+        
+        Com run_dir, cada arquivo processado é persistido em um checkpoint;
+        resume=True retoma a partir dos arquivos já concluídos nesse diretório.
+        As métricas por estágio vão para metrics.json ao lado do output_path
+        (e metrics.prom com metrics_prometheus=True).
+        
+        results_jsonl / results_columnar recebem todos os métodos casados (não só o
+        top-K) à medida que o matching avança: JSONL (.jsonl ou .jsonl.gz) e
+        Parquet/Arrow (.parquet, .arrow), este último via pyarrow.
+        """
         print("\n" + "="*60)
         print(" PIPELINE DE DETECÇÃO DE BUGS - Correspondência Baseada em Similaridade")
         print("="*60)
         
-        # Executar passos
-        self.step1_setup()
-        methods = self.step2_extract_methods()
-        methods_with_features = self.step3_compute_features(methods)
-        matches = self.step4_match_patterns(methods_with_features, threshold)
-        top_results = self.step5_rank_and_filter(matches, top_k)
+        checkpoint = None
+        if run_dir:
+            checkpoint = RunCheckpoint(run_dir, self._checkpoint_config(threshold), resume=resume)
         
-        # Salvar resultados (JSON + CSV)
-        self._save_results(top_results, output_path)
-        self._export_to_csv(top_results, output_path.replace('.json', '.csv'))
+        # Executar passos; o worktree (ou o leitor de blobs) é liberado mesmo com erro ou Ctrl-C
+        try:
+            top_results = self._run_steps(threshold, top_k, output_path, streaming, queue_size, checkpoint,
+                                          results_jsonl, results_columnar)
+        finally:
+            self._release_checkout()
+        metrics_path = self._save_metrics(output_path, metrics_prometheus)
         
         print("\n" + "="*60)
         print(f"✓ Pipeline concluído.")
         print(f"  JSON: {output_path}")
         print(f"  CSV: {output_path.replace('.json', '.csv')}")
+        for path in (results_jsonl, results_columnar):
+            if path:
+                print(f"  Todos os casados: {path}")
+        print(f"  Métricas: {metrics_path}")
         print("="*60 + "\n")
         
         return top_results
     
-    def _save_results(self, results: List[Dict], output_path: str):
-        """Salva resultados em JSON."""
+    def _run_steps(self, threshold: float, top_k: int, output_path: str, streaming: bool, queue_size: int,
+                   checkpoint: Optional[RunCheckpoint], results_jsonl: Optional[str],
+                   results_columnar: Optional[str]) -> List[Dict]:
+        """Passos 1-5 e gravação dos resultados (corpo de run())."""
+        if checkpoint and checkpoint.stage_done('setup') and os.path.exists(self.signatures_path):
+            print("\n✓ Passo 1 já concluído (checkpoint)")
+            # Só o inventário é refeito: hashes atuais detectam arquivos alterados desde o checkpoint
+            if self.revision and self.zero_checkout:
+                self._open_blob_source()
+            elif self.revision and not os.path.exists(self.repo_path):
+                # Worktree removido ao fim da execução anterior: recria na mesma revisão
+                if self._clone_repository() != "Success":
+                    raise RuntimeError(f"Não foi possível recriar o worktree de {self.revision} em {self.repo_path}")
+            else:
+                self.inventory = build_inventory(self.repo_path)
+        else:
+            clone_result, _ = self.step1_setup()
+            if checkpoint and clone_result == "Success":
+                checkpoint.mark_stage('setup')
+        
+        self.result_writers = open_result_writers(results_jsonl, results_columnar)
+        try:
+            if streaming:
+                top_results = self.run_streaming(threshold, top_k, queue_size, checkpoint)
+            elif checkpoint:
+                matches = self.run_incremental(threshold, checkpoint)
+                top_results = self.step5_rank_and_filter(matches, top_k)
+            elif self.low_memory:
+                # Passos 2-4 por arquivo: o código de todos os métodos nunca fica em memória junto
+                matches = self.run_per_file(threshold)
+                top_results = self.step5_rank_and_filter(matches, top_k)
+            else:
+                methods = self.step2_extract_methods()
+                methods_with_features = self.step3_compute_features(methods)
+                matches = self.step4_match_patterns(methods_with_features, threshold)
+                top_results = self.step5_rank_and_filter(matches, top_k)
+        finally:
+            for writer in self.result_writers:
+                writer.close()
+            self.result_writers = []
+        
+        # Salvar resultados (JSON + CSV)
+        with self.metrics.stage('save') as stage:
+            stage.items += len(top_results)
+            clean_results = self._save_results(top_results, output_path)
+            self._export_to_csv(clean_results, output_path.replace('.json', '.csv'))
+        if checkpoint:
+            checkpoint.finish()
+        return top_results
+    
+    def _release_checkout(self):
+        """Fecha o leitor de blobs ou remove o worktree da revisão (salvo keep_worktree)."""
+        if self.blob_source is not None:
+            self.metrics.update_counters('git_blobs', self.blob_source.stats)
+            self.blob_source.close()
+            self.blob_source = None
+        elif self.revision and not self.keep_worktree and os.path.exists(self.repo_path):
+            remover_worktree(self.repo_path)
+    
+    def _save_metrics(self, output_path: str, prometheus: bool = False) -> str:
+        """Grava metrics.json (e metrics.prom) no diretório dos resultados."""
+        output_dir = os.path.dirname(output_path)
+        metrics_path = self.metrics.save_json(os.path.join(output_dir, 'metrics.json'))
+        if prometheus:
+            self.metrics.save_prometheus(os.path.join(output_dir, 'metrics.prom'))
+        return metrics_path
+    
+    def _read_source(self, file_path: str) -> str:
+        """Conteúdo de um arquivo-fonte (usado para reler snippets no modo low_memory)."""
+        if self.source_reader is not None:
+            return self.source_reader(file_path)
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+    
+    def _snippet(self, method: Dict, sources: Dict[str, List[str]]) -> str:
+        """Código do método; sem 'code' (low_memory), relê as linhas do arquivo."""
+        code = method.get('code')
+        if code is not None:
+            return code
+        file_path = method.get('file')
+        start, end = method.get('start_line'), method.get('end_line')
+        if not file_path or not start:
+            return ''
+        if file_path not in sources:
+            try:
+                sources[file_path] = self._read_source(file_path).split('\n')
+            except OSError:
+                sources[file_path] = []
+        return '\n'.join(sources[file_path][start - 1:end])
+    
+    def _save_results(self, results: List[Dict], output_path: str) -> List[Dict]:
+        """Salva resultados em JSON e retorna os registros gravados."""
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
+        sources: Dict[str, List[str]] = {}
         clean_results = []
         for r in results:
             clean = {
@@ -185,12 +508,13 @@ class BugDetectionPipeline:
                 'method': r.get('name'),
                 'match': r.get('match'),
                 'all_matches': r.get('all_matches', []),
-                'snippet': r.get('code', '')[:500]  # Visualização prévia
+                'snippet': self._snippet(r, sources)[:500]  # Visualização prévia
             }
             clean_results.append(clean)
         
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(clean_results, f, indent=2, ensure_ascii=False)
+        return clean_results
     
     def _export_to_csv(self, results: List[Dict], csv_path: str):
         """Exporta resultados em formato CSV."""
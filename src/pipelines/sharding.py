@@ -0,0 +1,233 @@
+"""
+Varredura distribuída em shards com merge determinístico.
+Os arquivos Java são particionados por hash estável do caminho relativo; cada shard
+roda o BugDetectionPipeline de forma independente e grava seu top-K parcial, e o merge
+reproduz exatamente o ranking global de step5_rank_and_filter.
+
+Protocolo baseado em arquivos (nós podem compartilhar um sistema de arquivos):
+
+    shard_dir/
+    ├── plan.json              parâmetros + lista ordenada de arquivos (caminhos relativos)
+    └── shard-0000-of-0004.json  top-K parcial de cada shard (gravação atômica = concluído)
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pipelines.detection_pipeline import BugDetectionPipeline
+from utils.file_inventory import build_inventory
+
+
+PLAN_FILE = 'plan.json'
+
+
+def shard_of(rel_path: str, num_shards: int) -> int:
+    """Shard de um arquivo: hash estável (sha1) do caminho relativo em formato POSIX."""
+    digest = hashlib.sha1(rel_path.encode('utf-8')).hexdigest()
+    return int(digest[:16], 16) % num_shards
+
+
+def shard_path(shard_dir: str, index: int, num_shards: int) -> str:
+    return os.path.join(shard_dir, f'shard-{index:04d}-of-{num_shards:04d}.json')
+
+
+def _write_json_atomic(path: str, data):
+    tmp_path = f'{path}.tmp.{os.getpid()}'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def create_plan(shard_dir: str, repo_path: str, num_shards: int, signatures_path: str,
+                threshold: float = 0.3, top_k: int = 50) -> Dict:
+    """Lista os arquivos uma única vez e grava plan.json para os workers."""
+    os.makedirs(shard_dir, exist_ok=True)
+    # Resultados de um plano anterior não valem para o novo
+    for name in os.listdir(shard_dir):
+        if name.startswith('shard-') and name.endswith('.json'):
+            os.remove(os.path.join(shard_dir, name))
+
+    files = [f.rel_path for f in build_inventory(repo_path)]
+
+    plan = {
+        'repo_path': repo_path,
+        'signatures_path': signatures_path,
+        'num_shards': num_shards,
+        'threshold': threshold,
+        'top_k': top_k,
+        'files': files,
+        'created_at': datetime.now().isoformat(timespec='seconds')
+    }
+    _write_json_atomic(os.path.join(shard_dir, PLAN_FILE), plan)
+    return plan
+
+
+def run_shard(shard_dir: str, index: int, repo_path: Optional[str] = None, quiet: bool = True) -> str:
+    """
+    Executa um shard: passos 2-5 do pipeline sobre os arquivos do shard.
+
+    repo_path permite que um nó use sua própria cópia do repositório (mesma revisão).
+    """
+    plan = _read_json(os.path.join(shard_dir, PLAN_FILE))
+    num_shards = plan['num_shards']
+    repo_path = repo_path or plan['repo_path']
+
+    rel_files = [f for f in plan['files'] if shard_of(f, num_shards) == index]
+    file_order = {rel: pos for pos, rel in enumerate(plan['files'])}
+    files = [os.path.join(repo_path, rel) for rel in rel_files]
+
+    pipeline = BugDetectionPipeline('', repo_path, signatures_path=plan['signatures_path'])
+    output = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+        methods = pipeline.step2_extract_methods(files)
+
+        # Chave de desempate global: (posição do arquivo no plano, índice do método no arquivo)
+        per_file: Dict[str, int] = {}
+        for method in methods:
+            rel = Path(method['file']).relative_to(repo_path).as_posix()
+            method['order'] = [file_order[rel], per_file.get(rel, 0)]
+            per_file[rel] = per_file.get(rel, 0) + 1
+
+        with_features = pipeline.step3_compute_features(methods)
+        matches = pipeline.step4_match_patterns(with_features, plan['threshold'])
+        top_results = pipeline.step5_rank_and_filter(matches, plan['top_k'])
+
+    for method in top_results:
+        method.pop('features', None)
+
+    path = shard_path(shard_dir, index, num_shards)
+    _write_json_atomic(path, {
+        'shard': index,
+        'num_shards': num_shards,
+        'files': len(files),
+        'methods': len(methods),
+        'matched': len(matches),
+        'results': top_results,
+        'metrics': pipeline.metrics.to_dict(),
+        'finished_at': datetime.now().isoformat(timespec='seconds')
+    })
+    return path
+
+
+def pending_shards(shard_dir: str) -> List[int]:
+    """Shards cujo arquivo de resultado ainda não existe."""
+    plan = _read_json(os.path.join(shard_dir, PLAN_FILE))
+    n = plan['num_shards']
+    return [i for i in range(n) if not os.path.exists(shard_path(shard_dir, i, n))]
+
+
+def merge_shards(shard_dir: str, top_k: Optional[int] = None) -> List[Dict]:
+    """
+    Combina os top-K parciais no ranking global.
+
+    Ordena por score decrescente e, em empate, pela ordem original (arquivo, método),
+    exatamente como o sort estável de step5_rank_and_filter numa execução única.
+    """
+    plan = _read_json(os.path.join(shard_dir, PLAN_FILE))
+    n = plan['num_shards']
+    top_k = plan['top_k'] if top_k is None else top_k
+
+    missing = pending_shards(shard_dir)
+    if missing:
+        raise FileNotFoundError(f"Shards ainda não concluídos em {shard_dir}: {missing}")
+
+    candidates = []
+    for i in range(n):
+        candidates.extend(_read_json(shard_path(shard_dir, i, n))['results'])
+
+    candidates.sort(key=lambda m: (-m.get('match', {}).get('score', 0), m['order']))
+    return candidates[:top_k]
+
+
+def run_local(repo_url: str, repo_path: str, shard_dir: str, num_shards: int, workers: int = None,
+              threshold: float = 0.3, top_k: int = 50, output_path: str = 'outputs/results.json',
+              signatures_path: str = 'outputs/defects4j_signatures.json') -> List[Dict]:
+    """Backend local: planeja, executa os shards em processos e faz o merge."""
+    pipeline = BugDetectionPipeline(repo_url, repo_path, signatures_path=signatures_path)
+    pipeline.step1_setup()
+
+    print("\n" + "="*60)
+    print(f"PASSOS 2-5: Varredura em {num_shards} shards ({shard_dir})")
+    print("="*60)
+
+    plan = create_plan(shard_dir, repo_path, num_shards, signatures_path, threshold, top_k)
+    print(f"✓ Plano com {len(plan['files'])} arquivos")
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers or num_shards) as executor:
+        futures = {executor.submit(run_shard, shard_dir, i): i for i in pending_shards(shard_dir)}
+        for future in concurrent.futures.as_completed(futures):
+            print(f"✓ Shard {futures[future]} concluído: {future.result()}")
+
+    top_results = merge_shards(shard_dir, top_k)
+    print(f"✓ Merge: top-{len(top_results)} resultados")
+
+    clean_results = pipeline._save_results(top_results, output_path)
+    pipeline._export_to_csv(clean_results, output_path.replace('.json', '.csv'))
+    print(f"  JSON: {output_path}")
+    return top_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Varredura em shards com merge determinístico')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_plan = sub.add_parser('plan', help='Gera plan.json com a lista de arquivos')
+    p_plan.add_argument('--shard-dir', required=True)
+    p_plan.add_argument('--repo-path', required=True)
+    p_plan.add_argument('--num-shards', type=int, required=True)
+    p_plan.add_argument('--signatures', default='outputs/defects4j_signatures.json')
+    p_plan.add_argument('--threshold', type=float, default=0.3)
+    p_plan.add_argument('--top-k', type=int, default=50)
+
+    p_worker = sub.add_parser('worker', help='Executa um shard do plano')
+    p_worker.add_argument('--shard-dir', required=True)
+    p_worker.add_argument('--index', type=int, required=True)
+    p_worker.add_argument('--repo-path', default=None, help='Cópia local do repositório (mesma revisão)')
+
+    p_merge = sub.add_parser('merge', help='Combina os shards no ranking global')
+    p_merge.add_argument('--shard-dir', required=True)
+    p_merge.add_argument('--output', default='outputs/results.json')
+
+    p_run = sub.add_parser('run', help='Plano + shards em processos locais + merge')
+    p_run.add_argument('--shard-dir', required=True)
+    p_run.add_argument('--repo-url', default=os.environ.get('REPO_URL', 'https://github.com/apache/commons-lang.git'))
+    p_run.add_argument('--repo-path', default=os.environ.get('REPO_PATH', 'dados/commons-lang'))
+    p_run.add_argument('--num-shards', type=int, required=True)
+    p_run.add_argument('--workers', type=int, default=None)
+    p_run.add_argument('--threshold', type=float, default=float(os.environ.get('SIMILARITY_THRESHOLD', '0.3')))
+    p_run.add_argument('--top-k', type=int, default=int(os.environ.get('TOP_K', '50')))
+    p_run.add_argument('--output', default=os.environ.get('OUTPUT_PATH', 'outputs/results.json'))
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'plan':
+        plan = create_plan(args.shard_dir, args.repo_path, args.num_shards, args.signatures,
+                           args.threshold, args.top_k)
+        print(f"✓ Plano com {len(plan['files'])} arquivos em {args.num_shards} shards")
+    elif args.command == 'worker':
+        print(f"✓ Shard concluído: {run_shard(args.shard_dir, args.index, args.repo_path)}")
+    elif args.command == 'merge':
+        results = merge_shards(args.shard_dir)
+        pipeline = BugDetectionPipeline('', '')
+        clean_results = pipeline._save_results(results, args.output)
+        pipeline._export_to_csv(clean_results, args.output.replace('.json', '.csv'))
+        print(f"✓ Merge: top-{len(results)} resultados em {args.output}")
+    else:
+        run_local(args.repo_url, args.repo_path, args.shard_dir, args.num_shards, args.workers,
+                  args.threshold, args.top_k, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Execução em streaming dos passos 2-5 do pipeline.
+Extração, características, matching e ranking rodam como estágios concorrentes
+ligados por filas limitadas (backpressure): o matching começa nos métodos do
+primeiro arquivo enquanto os seguintes ainda estão sendo analisados.
+"""
+import heapq
+import queue
+import threading
+from typing import List, Dict, Iterable, Optional, Tuple
+
+
+_DONE = object()
+
+
+class StreamingPipeline:
+    """
+    Estágios (uma thread cada), trocando lotes (arquivo, métodos, retomado) por arquivo:
+
+        extração → [fila] → características → [fila] → matching → [fila] → ranking
+
+    Com um RunCheckpoint, arquivos já concluídos são lidos do checkpoint e passam
+    direto pelos estágios; os demais são gravados logo após o matching.
+
+    O ranking mantém apenas um heap com os top-K, então a memória não cresce com o
+    número de métodos casados. O resultado é idêntico ao de step5_rank_and_filter
+    (empates mantêm a ordem de chegada, como no sort estável).
+    """
+
+    def __init__(self, pipeline, threshold: float = 0.3, top_k: int = 50, queue_size: int = 32,
+                 checkpoint=None):
+        self.pipeline = pipeline
+        self.checkpoint = checkpoint
+        self.threshold = threshold
+        self.top_k = top_k
+        self.queue_size = queue_size
+        self.counts = {'files': 0, 'methods': 0, 'matched': 0, 'resumed': 0}
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self._top: List = []
+        self.extractor = pipeline._new_extractor()
+
+    def run(self) -> List[Dict]:
+        """Executa os estágios até o fim e retorna os top-K ordenados."""
+        to_features = queue.Queue(maxsize=self.queue_size)
+        to_match = queue.Queue(maxsize=self.queue_size)
+        to_rank = queue.Queue(maxsize=self.queue_size)
+
+        stages = [
+            (self._extract_stage, None, to_features),
+            (self._feature_stage, to_features, to_match),
+            (self._match_stage, to_match, to_rank),
+            (self._rank_stage, to_rank, None),
+        ]
+        threads = [
+            threading.Thread(target=self._run_stage, args=stage, name=stage[0].__name__, daemon=True)
+            for stage in stages
+        ]
+        for t in threads:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(timeout=0.2)
+        except KeyboardInterrupt:
+            self._stop.set()
+            raise
+
+        if self._errors:
+            raise self._errors[0]
+
+        ranked = sorted(self._top, key=lambda e: (e[0], e[1]), reverse=True)
+        return [method for _, _, method in ranked]
+
+    # ------------------------------------------------------------------
+    # Estágios
+    # ------------------------------------------------------------------
+
+    def _run_stage(self, stage, in_q: Optional[queue.Queue], out_q: Optional[queue.Queue]):
+        """Executa um estágio e sempre sinaliza fim ao próximo, mesmo em erro."""
+        try:
+            if in_q is None:
+                stage(out_q)
+            elif out_q is None:
+                stage(self._consume(in_q))
+            else:
+                stage(self._consume(in_q), out_q)
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            if out_q is not None:
+                self._put(out_q, _DONE, force=True)
+
+    def _extract_stage(self, out_q: queue.Queue):
+        for java_file in self.extractor.list_java_files():
+            self.counts['files'] += 1
+            if self.checkpoint and self.checkpoint.is_done(java_file, self.extractor.blob_of(java_file)):
+                self.counts['resumed'] += 1
+                batch = (java_file, self.checkpoint.load_matches(java_file), True)
+            else:
+                methods = self.pipeline._extract_file(self.extractor, java_file)
+                self.counts['methods'] += len(methods)
+                batch = (java_file, methods, False)
+            if not self._put(out_q, batch):
+                return
+
+    def _feature_stage(self, batches: Iterable[Tuple], out_q: queue.Queue):
+        for java_file, methods, resumed in batches:
+            if not resumed:
+                methods = [m for m in methods if self.pipeline._compute_method_features(m)]
+            if not self._put(out_q, (java_file, methods, resumed)):
+                return
+
+    def _match_stage(self, batches: Iterable[Tuple], out_q: queue.Queue):
+        for java_file, methods, resumed in batches:
+            if not resumed:
+                matched = [m for m in methods if self.pipeline._match_method(m, self.threshold)]
+                if self.checkpoint:
+                    self.checkpoint.save_unit(java_file, methods, self.extractor.blob_of(java_file))
+                methods = matched
+            else:
+                for method in methods:
+                    self.pipeline._emit_result(method)
+            if methods and not self._put(out_q, (java_file, methods, resumed)):
+                return
+
+    def _rank_stage(self, batches: Iterable[Tuple]):
+        seq = 0
+        for _, methods, _ in batches:
+            for method in methods:
+                self.counts['matched'] += 1
+                # (score, -seq): em empate, quem chegou primeiro vence, como no sort estável
+                entry = (self.pipeline._rank_key(method), -seq, method)
+                seq += 1
+                if self.top_k <= 0:
+                    continue
+                if len(self._top) < self.top_k:
+                    heapq.heappush(self._top, entry)
+                elif entry[:2] > self._top[0][:2]:
+                    heapq.heapreplace(self._top, entry)
+
+    # ------------------------------------------------------------------
+    # Filas
+    # ------------------------------------------------------------------
+
+    def _put(self, q: queue.Queue, item, force: bool = False) -> bool:
+        """Put bloqueante (backpressure) que desiste se outro estágio falhou."""
+        while True:
+            if self._stop.is_set() and not force:
+                return False
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if self._stop.is_set():
+                    return False
+
+    def _consume(self, q: queue.Queue) -> Iterable:
+        """Itera lotes da fila até o sinal de fim."""
+        while True:
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            if item is _DONE:
+                return
+            yield item
@@ -0,0 +1,166 @@
+"""
+Serviço residente de varredura.
+Mantém o SimilarityMatcher e um cache de características em memória e responde
+a pedidos de varredura de métodos, arquivos ou diffs via HTTP local ou socket Unix,
+evitando o custo de inicialização a frio do scripts/pipeline.py a cada chamada.
+"""
+import argparse
+import json
+import os
+import socketserver
+import stat
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+from service.scanner import ScannerService, ServiceBusy
+
+
+class ScanRequestHandler(BaseHTTPRequestHandler):
+    """
+    Endpoints:
+        GET  /health
+        GET  /metrics[?format=prometheus]
+        POST /scan/method  {"code": "...", "threshold": 0.3}
+        POST /scan/file    {"path": "..."} ou {"file": "...", "content": "..."}
+        POST /scan/diff    {"diff": "..."}
+    """
+
+    service: ScannerService = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # Silencioso: client_address é vazio em sockets Unix e o volume de logs seria alto
+        pass
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status: int, text: str):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif url.path == '/metrics':
+            if parse_qs(url.query).get('format') == ['prometheus']:
+                self._send_text(200, self.service.metrics_prometheus())
+            else:
+                self._send_json(200, self.service.metrics())
+        else:
+            self._send_json(404, {'error': f'Endpoint desconhecido: {url.path}'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {'error': f'JSON inválido: {e}'})
+            return
+
+        service = self.service
+        threshold = payload.get('threshold')
+        try:
+            if url.path == '/scan/method':
+                result = service.handle('method', service.scan_method, payload['code'], threshold)
+            elif url.path == '/scan/file':
+                if 'content' in payload:
+                    result = service.handle('file', service.scan_source,
+                                            payload.get('file', '<memory>'), payload['content'], threshold)
+                else:
+                    result = service.handle('file', service.scan_file, payload['path'], threshold)
+            elif url.path == '/scan/diff':
+                result = service.handle('diff', service.scan_diff, payload['diff'], threshold)
+            else:
+                self._send_json(404, {'error': f'Endpoint desconhecido: {url.path}'})
+                return
+        except ServiceBusy as e:
+            self._send_json(503, {'error': str(e)})
+            return
+        except KeyError as e:
+            self._send_json(400, {'error': f'Campo obrigatório ausente: {e}'})
+            return
+        except FileNotFoundError as e:
+            self._send_json(404, {'error': str(e)})
+            return
+        except PermissionError as e:
+            self._send_json(403, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+
+        self._send_json(200, {'results': result})
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Servidor HTTP sobre socket Unix (uma thread por conexão)."""
+    daemon_threads = True
+
+    def server_bind(self):
+        # Só um socket que sobrou de outra execução é removido: um caminho errado em
+        # --unix-socket não pode apagar um arquivo comum
+        try:
+            mode = os.lstat(self.server_address).st_mode
+        except FileNotFoundError:
+            mode = None
+        if mode is not None:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(f"'{self.server_address}' existe e não é um socket Unix")
+            os.remove(self.server_address)
+        super().server_bind()
+
+
+def create_server(service: ScannerService, host: str = '127.0.0.1', port: int = 8765,
+                  unix_socket: Optional[str] = None):
+    """Cria o servidor HTTP (TCP local ou socket Unix) ligado ao serviço."""
+    handler = type('BoundScanRequestHandler', (ScanRequestHandler,), {'service': service})
+    if unix_socket:
+        return ThreadingUnixHTTPServer(unix_socket, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serviço residente de varredura de bugs')
+    parser.add_argument('--signatures', default='outputs/defects4j_signatures.json')
+    parser.add_argument('--root', default=os.environ.get('REPO_PATH', '.'),
+                        help='Raiz dos arquivos de /scan/file e /scan/diff (caminhos fora dela são recusados)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket', default=None, help='Escuta em socket Unix em vez de TCP')
+    parser.add_argument('--threshold', type=float, default=float(os.environ.get('SIMILARITY_THRESHOLD', '0.3')))
+    parser.add_argument('--max-concurrent', type=int, default=4)
+    parser.add_argument('--queue-timeout', type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    service = ScannerService(args.signatures, root_dir=args.root, threshold=args.threshold,
+                             max_concurrent=args.max_concurrent, queue_timeout=args.queue_timeout)
+    server = create_server(service, args.host, args.port, args.unix_socket)
+    where = args.unix_socket or f'http://{args.host}:{args.port}'
+    print(f"✓ Serviço de varredura ouvindo em {where} (máx. {args.max_concurrent} simultâneas)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[CANCELADO] Serviço encerrado pelo usuário")
+    finally:
+        server.server_close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""
+Núcleo do serviço de varredura, sem dependência de HTTP.
+ScannerService mantém o SimilarityMatcher e um cache de características em memória;
+é usado pelo servidor residente (scan_server.py) e pelo `bugdetect scan --file`.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from extractors.java_parser import JavaMethodExtractor
+from extractors.feature_extractor import FeatureExtractor
+from matchers.similarity_matcher import SimilarityMatcher
+
+
+class ServiceBusy(Exception):
+    """Limite de requisições simultâneas atingido."""
+
+
+class FeatureCache:
+    """Cache LRU de características indexado pelo hash do código do método."""
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._data: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, code: str) -> Dict:
+        key = hashlib.sha1(code.encode('utf-8')).hexdigest()
+        with self._lock:
+            features = self._data.get(key)
+            if features is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return features
+            self.misses += 1
+
+        features = FeatureExtractor.extract_all_features(code)
+        with self._lock:
+            self._data[key] = features
+            if len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return features
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RequestStats:
+    """Contadores e latências (janela recente) por endpoint."""
+
+    def __init__(self, window: int = 2048):
+        self.window = window
+        self.started_at = time.time()
+        self.in_flight = 0
+        self.endpoints: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, endpoint: str) -> Dict:
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = {
+                'requests': 0, 'errors': 0, 'rejected': 0,
+                'latencies_ms': deque(maxlen=self.window)
+            }
+        return self.endpoints[endpoint]
+
+    def record(self, endpoint: str, latency_ms: float, error: bool = False):
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry['requests'] += 1
+            entry['errors'] += int(error)
+            entry['latencies_ms'].append(latency_ms)
+
+    def reject(self, endpoint: str):
+        with self._lock:
+            self._entry(endpoint)['rejected'] += 1
+
+    @staticmethod
+    def _percentile(values: List[float], pct: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return round(ordered[idx], 3)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            endpoints = {}
+            for name, entry in self.endpoints.items():
+                latencies = list(entry['latencies_ms'])
+                endpoints[name] = {
+                    'requests': entry['requests'],
+                    'errors': entry['errors'],
+                    'rejected': entry['rejected'],
+                    'latency_ms': {
+                        'p50': self._percentile(latencies, 50),
+                        'p95': self._percentile(latencies, 95),
+                        'p99': self._percentile(latencies, 99),
+                    }
+                }
+            return {
+                'uptime_s': round(time.time() - self.started_at, 3),
+                'in_flight': self.in_flight,
+                'endpoints': endpoints
+            }
+
+
+def parse_unified_diff(diff_text: str) -> Dict[str, List[Tuple[int, int]]]:
+    """Intervalos de linhas alteradas (no arquivo novo) por arquivo de um diff unificado."""
+    changed: Dict[str, List[Tuple[int, int]]] = {}
+    current = None
+    hunk = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+
+    for line in diff_text.splitlines():
+        if line.startswith('+++ '):
+            path = line[4:].strip()
+            if path == '/dev/null':
+                current = None
+                continue
+            current = path[2:] if path.startswith('b/') else path
+            changed.setdefault(current, [])
+        elif current and line.startswith('@@'):
+            m = hunk.match(line)
+            if m:
+                start = int(m.group(1))
+                length = int(m.group(2)) if m.group(2) is not None else 1
+                changed[current].append((start, start + max(length, 1) - 1))
+    return {path: ranges for path, ranges in changed.items() if path.endswith('.java')}
+
+
+class ScannerService:
+    """
+    Estado quente compartilhado entre requisições.
+
+    - matcher: SimilarityMatcher carregado uma única vez
+    - cache: características por hash de código (métodos inalterados não são reprocessados)
+    - semaphore: limita varreduras simultâneas; excedentes esperam até queue_timeout e
+      então recebem 503
+    """
+
+    def __init__(self, signatures_path: str = 'outputs/defects4j_signatures.json', root_dir: str = '.',
+                 threshold: float = 0.3, max_concurrent: int = 4, queue_timeout: float = 2.0,
+                 cache_size: int = 50000):
+        if not os.path.exists(signatures_path):
+            from matchers.signature_generator import SignatureGenerator
+            SignatureGenerator().save_signatures(signatures_path)
+        self.matcher = SimilarityMatcher(signatures_path)
+        self.root_dir = root_dir
+        self.threshold = threshold
+        self.queue_timeout = queue_timeout
+        self.max_concurrent = max_concurrent
+        self.cache = FeatureCache(cache_size)
+        self.stats = RequestStats()
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._stats_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Varreduras
+    # ------------------------------------------------------------------
+
+    def _score(self, method: Dict, threshold: float) -> Dict:
+        """Pontua um método e devolve o registro no formato de results.json."""
+        matches = self.matcher.match(self.cache.get_or_compute(method['code']), threshold)
+        best = matches[0] if matches else None
+        return {
+            'file': method.get('file'),
+            'class': method.get('class'),
+            'method': method.get('name'),
+            'start_line': method.get('start_line'),
+            'end_line': method.get('end_line'),
+            'match': {
+                'pattern_id': best.pattern_id,
+                'pattern_name': best.pattern_name,
+                'score': best.similarity_score,
+                'confidence': best.confidence,
+                'breakdown': best.feature_breakdown
+            } if best else None,
+            'all_matches': [
+                {'pattern_id': m.pattern_id, 'score': m.similarity_score, 'confidence': m.confidence}
+                for m in matches
+            ]
+        }
+
+    def scan_method(self, code: str, threshold: Optional[float] = None) -> Dict:
+        method = {'file': None, 'class': None, 'name': None, 'code': code}
+        return self._score(method, self.threshold if threshold is None else threshold)
+
+    def scan_source(self, file_path: str, content: str, threshold: Optional[float] = None,
+                    line_ranges: Optional[List[Tuple[int, int]]] = None) -> List[Dict]:
+        """Pontua os métodos de um arquivo; com line_ranges, só os que tocam essas linhas."""
+        threshold = self.threshold if threshold is None else threshold
+        methods = JavaMethodExtractor(self.root_dir).extract_from_source(file_path, content)
+        if line_ranges is not None:
+            methods = [
+                m for m in methods
+                if any(m['start_line'] <= end and start <= m['end_line'] for start, end in line_ranges)
+            ]
+        return [self._score(m, threshold) for m in methods if m.get('code')]
+
+    def _resolve(self, path: str) -> str:
+        """Caminho real de path sob root_dir; PermissionError se ele sair da raiz."""
+        root = os.path.realpath(self.root_dir)
+        # join com um caminho absoluto o devolve inalterado: também é verificado
+        full_path = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, full_path]) != root:
+            raise PermissionError(f"Caminho fora de {self.root_dir}: {path}")
+        return full_path
+
+    def scan_file(self, path: str, threshold: Optional[float] = None) -> List[Dict]:
+        """Pontua os métodos de um arquivo de root_dir (caminhos fora dela são recusados)."""
+        full_path = self._resolve(path)
+        with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+        return self.scan_source(path, content, threshold)
+
+    def scan_diff(self, diff_text: str, threshold: Optional[float] = None) -> List[Dict]:
+        """Pontua os métodos alterados por um diff (arquivos lidos de root_dir, sem sair dela)."""
+        results = []
+        for path, ranges in parse_unified_diff(diff_text).items():
+            full_path = self._resolve(path)
+            if not os.path.exists(full_path):
+                continue
+            with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+            results.extend(self.scan_source(path, content, threshold, line_ranges=ranges))
+        return results
+
+    # ------------------------------------------------------------------
+    # Controle de concorrência e métricas
+    # ------------------------------------------------------------------
+
+    def handle(self, endpoint: str, func, *args):
+        """Executa func sob o limite de concorrência, registrando latência."""
+        if not self._semaphore.acquire(timeout=self.queue_timeout):
+            self.stats.reject(endpoint)
+            raise ServiceBusy(f"Mais de {self.max_concurrent} varreduras simultâneas")
+        with self._stats_lock:
+            self.stats.in_flight += 1
+        start = time.perf_counter()
+        error = False
+        try:
+            return func(*args)
+        except Exception:
+            error = True
+            raise
+        finally:
+            with self._stats_lock:
+                self.stats.in_flight -= 1
+            self._semaphore.release()
+            self.stats.record(endpoint, (time.perf_counter() - start) * 1000, error)
+
+    def metrics(self) -> Dict:
+        data = self.stats.to_dict()
+        data['cache'] = {'entries': len(self.cache), 'hits': self.cache.hits, 'misses': self.cache.misses}
+        data['matcher'] = self.matcher.stats_snapshot()
+        return data
+
+    def metrics_prometheus(self, prefix: str = 'bugdetect_service') -> str:
+        data = self.metrics()
+        lines = [
+            f'# TYPE {prefix}_in_flight gauge',
+            f'{prefix}_in_flight {data["in_flight"]}',
+            f'# TYPE {prefix}_requests_total counter',
+        ]
+        for name, entry in data['endpoints'].items():
+            lines.append(f'{prefix}_requests_total{{endpoint="{name}"}} {entry["requests"]}')
+        lines.append(f'# TYPE {prefix}_errors_total counter')
+        for name, entry in data['endpoints'].items():
+            lines.append(f'{prefix}_errors_total{{endpoint="{name}"}} {entry["errors"]}')
+        lines.append(f'# TYPE {prefix}_rejected_total counter')
+        for name, entry in data['endpoints'].items():
+            lines.append(f'{prefix}_rejected_total{{endpoint="{name}"}} {entry["rejected"]}')
+        lines.append(f'# TYPE {prefix}_latency_ms gauge')
+        for name, entry in data['endpoints'].items():
+            for q, value in entry['latency_ms'].items():
+                if value is not None:
+                    lines.append(f'{prefix}_latency_ms{{endpoint="{name}",quantile="{q}"}} {value}')
+        lines.append(f'# TYPE {prefix}_cache_hits_total counter')
+        lines.append(f'{prefix}_cache_hits_total {data["cache"]["hits"]}')
+        lines.append(f'# TYPE {prefix}_cache_misses_total counter')
+        lines.append(f'{prefix}_cache_misses_total {data["cache"]["misses"]}')
+        return '\n'.join(lines) + '\n'
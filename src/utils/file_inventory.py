@@ -0,0 +1,80 @@
+"""
+Inventário dos arquivos Java de um repositório.
+Em checkouts git vem do índice (`git ls-files -s`), com o hash do blob de cada arquivo,
+sem percorrer a árvore; fora do git, ou se o git falhar, cai para os.walk.
+O inventário é montado uma vez no passo 1 e repassado à extração.
+"""
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+@dataclass
+class SourceFile:
+    """Um arquivo do inventário."""
+    path: str                   # caminho no formato de JavaMethodExtractor.list_java_files
+    rel_path: str               # relativo à raiz, em formato POSIX
+    size: int                   # bytes
+    blob: Optional[str] = None  # hash do blob git (None fora do git ou se modificado)
+
+
+def content_blob_hash(path: str) -> Optional[str]:
+    """Hash do conteúdo atual no formato de blob do git (sha1 de "blob <tamanho>\\0" + bytes)."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def _git_entries(root_dir: str) -> Optional[Dict[str, Optional[str]]]:
+    """rel_path -> blob pelo índice; arquivos modificados no worktree ficam sem blob."""
+    if not os.path.exists(os.path.join(root_dir, '.git')):
+        return None
+    try:
+        import git
+        repo_git = git.Repo(root_dir).git
+        staged = repo_git.ls_files('-z', '-s', '--', '*.java')
+        modified = set(filter(None, repo_git.ls_files('-z', '-m', '--', '*.java').split('\0')))
+    except Exception:
+        return None
+
+    entries = {}
+    for record in filter(None, staged.split('\0')):
+        # "<modo> <blob> <estágio>\t<caminho>"; em conflitos o caminho se repete por estágio
+        meta, rel_path = record.split('\t', 1)
+        blob = meta.split()[1]
+        entries[rel_path] = None if rel_path in modified or rel_path in entries else blob
+    return entries
+
+
+def _walk_entries(root_dir: str) -> Dict[str, Optional[str]]:
+    entries = {}
+    for root, dirs, names in os.walk(root_dir):
+        for name in names:
+            if name.endswith('.java'):
+                rel_path = os.path.relpath(os.path.join(root, name), root_dir).replace(os.sep, '/')
+                entries[rel_path] = None
+    return entries
+
+
+def build_inventory(root_dir: str) -> List[SourceFile]:
+    """Arquivos .java em ordem determinística (mesma de list_java_files)."""
+    entries = _git_entries(root_dir)
+    if entries is None:
+        entries = _walk_entries(root_dir)
+
+    root = Path(root_dir)
+    inventory = []
+    for rel_path in sorted(entries):
+        path = str(root / rel_path)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            # No índice mas fora do worktree (removido, ou excluído de um sparse checkout)
+            continue
+        inventory.append(SourceFile(path, rel_path, size, entries[rel_path]))
+    return inventory
@@ -0,0 +1,119 @@
+"""
+Espera por mudanças em um arquivo: inotify no Linux (via ctypes, sem dependências)
+ou consulta periódica de tamanho e data de modificação nos demais sistemas.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    """Consulta stat() do arquivo a cada interval segundos."""
+
+    name = 'poll'
+
+    def __init__(self, path: str, interval: float = 1.0):
+        self.path = path
+        self.interval = interval
+        self._last = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_size, st.st_mtime_ns, st.st_ino
+        except OSError:
+            return None
+
+    def wait(self, timeout: float = None) -> bool:
+        """Bloqueia até o arquivo mudar ou timeout; True se mudou."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._stat()
+            if current != self._last:
+                self._last = current
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            remaining = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            time.sleep(max(0.0, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    inotify no diretório do arquivo (que pode ainda não existir ou ser recriado):
+    acorda em escrita, criação ou renomeação de qualquer arquivo com o mesmo nome.
+    """
+
+    name = 'inotify'
+
+    def __init__(self, path: str):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name or not hasattr(select, 'select'):
+            raise OSError('inotify indisponível')
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify indisponível')
+        self.path = path
+        self.filename = os.path.basename(path).encode()
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 falhou')
+        directory = os.path.dirname(os.path.abspath(path))
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self._fd, directory.encode(), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f'inotify_add_watch falhou em {directory}')
+
+    def _drain(self) -> bool:
+        """Lê os eventos pendentes; True se algum é do arquivo observado."""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            # struct inotify_event: wd, mask, cookie, len, name[len]
+            while offset + EVENT_HEADER.size <= len(data):
+                _, _, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                relevant = relevant or data[offset:offset + name_len].rstrip(b'\0') == self.filename
+                offset += name_len
+
+    def wait(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return False
+            if self._drain():
+                return True
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_watcher(path: str, mode: str = 'auto', interval: float = 1.0):
+    """mode 'poll', 'inotify' ou 'auto' (inotify quando disponível)."""
+    if mode == 'poll':
+        return PollingWatcher(path, interval)
+    try:
+        return InotifyWatcher(path)
+    except (OSError, AttributeError):
+        if mode == 'inotify':
+            raise
+        return PollingWatcher(path, interval)
@@ -0,0 +1,64 @@
+"""
+Leitura de arquivos Java direto do banco de objetos do git, sem checkout.
+Lista os .java de uma revisão (`git ls-tree`) e lê cada blob por um processo
+`git cat-file --batch` persistente (via GitPython), para que qualquer commit possa
+ser varrido sem tocar no worktree.
+"""
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+from utils.file_inventory import SourceFile
+
+
+class GitBlobSource:
+    """
+    Fonte de código de uma revisão (tree-ish) de um repositório git (bare ou não).
+
+    Os caminhos expostos são `<root_dir>/<caminho relativo>`, os mesmos de uma varredura
+    de um checkout em root_dir, então resultados e checkpoints são comparáveis.
+    """
+
+    def __init__(self, repo_dir: str, treeish: str, root_dir: str):
+        import git
+
+        self.repo_dir = repo_dir
+        self.treeish = treeish
+        self.root_dir = root_dir
+        self._git = git.Repo(repo_dir).git
+        self._lock = threading.Lock()
+        self._blobs: Dict[str, str] = {}
+        self.stats = {'blobs_read': 0, 'bytes_read': 0}
+
+    def inventory(self) -> List[SourceFile]:
+        """Arquivos .java da revisão, com tamanho e hash do blob, em ordem determinística."""
+        output = self._git.ls_tree('-r', '-z', '-l', '--full-tree', self.treeish)
+        root = Path(self.root_dir)
+        files = []
+        for record in filter(None, output.split('\0')):
+            # "<modo> <tipo> <objeto> <tamanho>\t<caminho>"
+            meta, rel_path = record.split('\t', 1)
+            _, kind, blob, size = meta.split()
+            if kind != 'blob' or not rel_path.endswith('.java'):
+                continue
+            files.append(SourceFile(str(root / rel_path), rel_path, int(size), blob))
+        files.sort(key=lambda f: f.rel_path)
+        self._blobs = {f.path: f.blob for f in files}
+        return files
+
+    def read_source(self, file_path: str) -> str:
+        """Conteúdo de um arquivo do inventário (source_reader de JavaMethodExtractor)."""
+        blob = self._blobs.get(file_path)
+        if blob is None:
+            raise FileNotFoundError(f"{file_path} não está em {self.treeish}")
+        # O processo cat-file --batch é compartilhado: uma leitura por vez; os contadores
+        # ficam sob o mesmo lock para não perder incrementos entre leitores
+        with self._lock:
+            _, _, _, data = self._git.get_object_data(blob)
+            self.stats['blobs_read'] += 1
+            self.stats['bytes_read'] += len(data)
+        return data.decode('utf-8', errors='ignore')
+
+    def close(self):
+        """Encerra o processo cat-file persistente."""
+        self._git.clear_cache()
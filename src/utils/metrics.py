@@ -0,0 +1,190 @@
+"""
+Métricas de desempenho por estágio do pipeline.
+Tempo de parede, tempo de CPU, pico de RSS, itens/s e itens mais lentos,
+exportados como JSON (metrics.json) e, opcionalmente, em texto Prometheus.
+"""
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Pico de memória residente do processo (VmHWM no Linux, ru_maxrss nos demais)."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def reset_peak_rss() -> bool:
+    """Zera o pico de RSS (Linux) para medir cada estágio isoladamente."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class StageMetrics:
+    """Acumula métricas de um estágio."""
+
+    def __init__(self, name: str, top_n: int):
+        self.name = name
+        self.top_n = top_n
+        self.wall_s: Optional[float] = None
+        self.cpu_s: Optional[float] = None
+        self.peak_rss_bytes: Optional[int] = None
+        self.items = 0
+        self.busy_wall_s = 0.0
+        self.busy_cpu_s = 0.0
+        self._slowest: Dict[str, List] = {}
+
+    def record_item(self, kind: str, key: str, wall_s: float, cpu_s: float):
+        self.items += 1
+        self.busy_wall_s += wall_s
+        self.busy_cpu_s += cpu_s
+        heap = self._slowest.setdefault(kind, [])
+        entry = (wall_s, key)
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def to_dict(self) -> Dict:
+        # Estágios intercalados (streaming/incremental) não têm contexto próprio:
+        # usa-se o tempo efetivamente gasto nos itens
+        wall = self.wall_s if self.wall_s is not None else self.busy_wall_s
+        cpu = self.cpu_s if self.cpu_s is not None else self.busy_cpu_s
+        return {
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'items': self.items,
+            'items_per_s': round(self.items / wall, 3) if wall > 0 else None,
+            'slowest': {
+                kind: [{'key': key, 'wall_s': round(w, 6)} for w, key in sorted(heap, reverse=True)]
+                for kind, heap in self._slowest.items()
+            }
+        }
+
+
+class MetricsCollector:
+    """
+    Coleta métricas por estágio.
+
+    Uso:
+        with metrics.stage('extract'):
+            with metrics.item('extract', 'file', path):
+                ...
+        metrics.save_json('outputs/metrics.json')
+    """
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.stages: Dict[str, StageMetrics] = {}
+        self.counters: Dict[str, float] = {}
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._lock = threading.Lock()
+
+    def _get(self, name: str) -> StageMetrics:
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = StageMetrics(name, self.top_n)
+            return self.stages[name]
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mede tempo de parede, CPU do processo e pico de RSS de um estágio inteiro."""
+        stage = self._get(name)
+        reset_peak_rss()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield stage
+        finally:
+            stage.wall_s = (stage.wall_s or 0.0) + time.perf_counter() - wall0
+            stage.cpu_s = (stage.cpu_s or 0.0) + time.process_time() - cpu0
+            peak = peak_rss_bytes()
+            if peak is not None:
+                stage.peak_rss_bytes = max(stage.peak_rss_bytes or 0, peak)
+
+    @contextmanager
+    def item(self, stage_name: str, kind: str, key: str):
+        """Mede um item (arquivo ou método) dentro de um estágio."""
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self._get(stage_name).record_item(
+                kind, key, time.perf_counter() - wall0, time.thread_time() - cpu0
+            )
+
+    def update_counters(self, prefix: str, values: Dict[str, float]):
+        """Registra contadores internos (ex.: matcher.comparisons)."""
+        for name, value in values.items():
+            self.counters[f'{prefix}.{name}'] = value
+
+    def to_dict(self) -> Dict:
+        return {
+            'started_at': self.started_at,
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'stages': {name: stage.to_dict() for name, stage in self.stages.items()},
+            'counters': dict(self.counters)
+        }
+
+    def save_json(self, path: str) -> str:
+        output_dir = os.path.dirname(path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        return path
+
+    def to_prometheus(self, prefix: str = 'bugdetect') -> str:
+        """Exporta no formato texto do Prometheus (gauges por estágio + contadores)."""
+        data = self.to_dict()
+        series = [
+            ('stage_wall_seconds', 'wall_s', 'Tempo de parede do estágio'),
+            ('stage_cpu_seconds', 'cpu_s', 'Tempo de CPU do estágio'),
+            ('stage_peak_rss_bytes', 'peak_rss_bytes', 'Pico de RSS ao fim do estágio'),
+            ('stage_items', 'items', 'Itens processados no estágio'),
+            ('stage_items_per_second', 'items_per_s', 'Vazão do estágio'),
+        ]
+        lines = []
+        for metric, field, help_text in series:
+            lines.append(f'# HELP {prefix}_{metric} {help_text}')
+            lines.append(f'# TYPE {prefix}_{metric} gauge')
+            for stage, values in data['stages'].items():
+                if values[field] is not None:
+                    lines.append(f'{prefix}_{metric}{{stage="{stage}"}} {values[field]}')
+        if data['counters']:
+            lines.append(f'# HELP {prefix}_counter Contadores internos do extrator e do matcher')
+            lines.append(f'# TYPE {prefix}_counter gauge')
+            for name, value in sorted(data['counters'].items()):
+                lines.append(f'{prefix}_counter{{name="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def save_prometheus(self, path: str) -> str:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        return path
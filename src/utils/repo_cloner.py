@@ -1,81 +1,252 @@
 """
 Repository cloner for Java projects.
 Handles git operations and validation.
+
+Estratégias de clonagem (CLONE_STRATEGY):
+    full      histórico e arquivos completos (padrão)
+    shallow   só os últimos `depth` commits (--depth)
+    blobless  clone parcial: conteúdos baixados sob demanda (--filter=blob:none)
+    sparse    blobless + sparse checkout não-cone com só '*.java'
+
+Todas funcionam com URLs file:// (ex.: um repositório bare local como fixture);
+para blobless/sparse o remoto precisa de uploadpack.allowFilter=true.
+
+Várias revisões do mesmo projeto (ex.: versões Defects4J) usam um espelho bare por
+remoto (atualizar_espelho, com fetch incremental) e um worktree leve por revisão
+(criar_worktree/remover_worktree): os objetos ficam uma única vez no espelho.
 """
+import hashlib
 import os
-import sys
-from pathlib import Path
+import re
+import shutil
+from typing import List, Optional
 
+from utils.file_inventory import build_inventory
 
-def instalar_dependencias():
-    """Instala GitPython dinamicamente se necessário."""
-    try:
-        import importlib
-        git = importlib.import_module('git')
-        globals()['git'] = git
-        print("GitPython já está instalado.")
-    except ImportError:
-        print("GitPython não encontrado. Instalando...")
-        import subprocess
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'GitPython'])
-        import importlib
-        git = importlib.import_module('git')
-        globals()['git'] = git
-        print("GitPython instalado com sucesso!")
 
+CLONE_STRATEGIES = ('full', 'shallow', 'blobless', 'sparse')
 
-def clonar_repositorio_java(url: str, destino: str) -> bool:
+
+def _opcoes_clone(strategy: str, depth: int) -> dict:
+    """Argumentos de git clone (no formato de kwargs do GitPython) por estratégia."""
+    if strategy == 'shallow':
+        return {'depth': depth}
+    if strategy == 'blobless':
+        return {'filter': 'blob:none'}
+    if strategy == 'sparse':
+        # Sem checkout inicial: os padrões esparsos são definidos antes de baixar os blobs
+        return {'filter': 'blob:none', 'no_checkout': True}
+    return {}
+
+
+def clonar_repositorio_java(url: str, destino: str, strategy: str = 'full', depth: int = 1,
+                            inventario: Optional[list] = None) -> bool:
     """
     Clona um repositório Git e valida se contém arquivos Java.
-    
+
     Args:
         url: URL do repositório Git
         destino: Caminho de destino para clonagem
-        
+        strategy: 'full', 'shallow', 'blobless' ou 'sparse' (ver docstring do módulo)
+        depth: Número de commits mantidos na estratégia 'shallow'
+        inventario: Lista preenchida com o inventário (SourceFile) usado na validação,
+            para ser reaproveitado pela extração
+
     Returns:
         True se bem-sucedido, False caso contrário
     """
-    instalar_dependencias()
-    
+    if strategy not in CLONE_STRATEGIES:
+        raise ValueError(f"Estratégia de clonagem inválida: {strategy} (use {', '.join(CLONE_STRATEGIES)})")
+
     print("--- Iniciando clonagem de repositório ---")
     print(f"URL: {url}")
     print(f"Destino: {os.path.abspath(destino)}")
-    
-    # Verifica se já existe
+
+    # Verifica se já existe (clone ou worktree, cujo .git é um arquivo)
     if os.path.exists(destino):
-        if os.path.isdir(os.path.join(destino, '.git')):
+        if os.path.exists(os.path.join(destino, '.git')):
             print(f"Repositório já existe em '{destino}'.")
             print("Mantendo repositório existente.")
-            return contar_arquivos_java(destino) > 0
+            return _validar_arquivos_java(destino, inventario)
         else:
             print(f"Erro: '{destino}' existe mas não é um repositório Git.")
             return False
-    
-    # Clona repositório
+
+    # Clona repositório (GitPython só é importado quando há clonagem de fato;
+    # dependências nunca são instaladas em tempo de execução)
+    try:
+        import git
+    except ImportError:
+        print("✗ GitPython não instalado. Execute: pip install GitPython")
+        return False
+
     try:
-        print("Clonando repositório...")
-        git.Repo.clone_from(url, destino)
+        print(f"Clonando repositório (estratégia: {strategy})...")
+        repo = git.Repo.clone_from(url, destino, **_opcoes_clone(strategy, depth))
+        if strategy == 'sparse':
+            repo.git.sparse_checkout('set', '--no-cone', '*.java')
+            repo.git.checkout()
         print("✓ Clonagem concluída")
     except Exception as e:
         print(f"✗ Erro ao clonar: {e}")
         return False
-    
+
     # Valida arquivos Java
-    java_count = contar_arquivos_java(destino)
-    if java_count > 0:
-        print(f"✓ Encontrados {java_count} arquivos .java")
-        return True
+    return _validar_arquivos_java(destino, inventario)
+
+
+def caminho_espelho(url: str, cache_dir: str) -> str:
+    """Diretório do espelho bare de um remoto: <nome>-<hash da URL>.git."""
+    nome = re.sub(r'[^A-Za-z0-9_.-]', '_', url.rstrip('/').split('/')[-1])
+    if nome.endswith('.git'):
+        nome = nome[:-4]
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir, f'{nome}-{digest}.git')
+
+
+def atualizar_espelho(url: str, cache_dir: str = 'dados/mirrors') -> str:
+    """
+    Cria (git clone --mirror) ou atualiza (git fetch --prune, incremental) o espelho
+    bare do remoto e retorna seu caminho.
+    """
+    import git
+
+    espelho = caminho_espelho(url, cache_dir)
+    if os.path.isdir(espelho):
+        print(f"Atualizando espelho {espelho}...")
+        git.Repo(espelho).git.fetch('--prune', 'origin')
     else:
-        print("✗ Nenhum arquivo .java encontrado")
+        print(f"Criando espelho {espelho}...")
+        os.makedirs(cache_dir, exist_ok=True)
+        git.Repo.clone_from(url, espelho, mirror=True)
+    return espelho
+
+
+def _tem_revisao(repo, revision: str) -> bool:
+    try:
+        repo.git.rev_parse('--verify', '--quiet', f'{revision}^{{commit}}')
+        return True
+    except Exception:
+        return False
+
+
+def _eh_sha_completo(revision: str) -> bool:
+    """SHA completo (sha1 ou sha256): nunca muda de commit, ao contrário de branch/tag."""
+    return re.fullmatch(r'[0-9a-f]{40}|[0-9a-f]{64}', revision) is not None
+
+
+def garantir_revisao(url: str, revision: str, cache_dir: str = 'dados/mirrors') -> str:
+    """
+    Caminho do espelho do remoto, atualizado (fetch incremental) antes do uso.
+    O fetch só é dispensado para um SHA completo que já está no espelho; branches,
+    tags e SHAs abreviados sempre buscam, para não ler um commit desatualizado.
+    """
+    import git
+
+    espelho = caminho_espelho(url, cache_dir)
+    if not (os.path.isdir(espelho) and _eh_sha_completo(revision)
+            and _tem_revisao(git.Repo(espelho), revision)):
+        atualizar_espelho(url, cache_dir)
+    return espelho
+
+
+def criar_worktree(url: str, revision: str, destino: str, cache_dir: str = 'dados/mirrors',
+                   sparse: bool = False, inventario: Optional[list] = None) -> bool:
+    """
+    Materializa `revision` em destino como worktree do espelho do remoto.
+
+    O espelho é atualizado antes (ver garantir_revisao). Um worktree antigo
+    em destino é substituído. Com sparse=True, só os '*.java' são escritos em disco.
+    """
+    try:
+        import git
+    except ImportError:
+        print("✗ GitPython não instalado. Execute: pip install GitPython")
         return False
 
+    print("--- Preparando worktree ---")
+    print(f"URL: {url}  Revisão: {revision}")
+    print(f"Destino: {os.path.abspath(destino)}")
+    try:
+        repo = git.Repo(garantir_revisao(url, revision, cache_dir))
+
+        if os.path.exists(destino):
+            if _espelho_do_worktree(destino) is None:
+                print(f"Erro: '{destino}' existe e não é um worktree.")
+                return False
+            remover_worktree(destino)
+        repo.git.worktree('prune')
+        repo.git.worktree('add', '--detach', '--no-checkout', os.path.abspath(destino), revision)
+
+        worktree = git.Repo(destino)
+        if sparse:
+            # Padrões só deste worktree, sem `git sparse-checkout set`: ele liga
+            # extensions.worktreeConfig no espelho, o que quebra os worktrees de um repo bare
+            info_dir = os.path.join(worktree.git_dir, 'info')
+            os.makedirs(info_dir, exist_ok=True)
+            with open(os.path.join(info_dir, 'sparse-checkout'), 'w', encoding='utf-8') as f:
+                f.write('*.java\n')
+            worktree.git.execute(['git', '-c', 'core.sparseCheckout=true', '-c', 'core.sparseCheckoutCone=false',
+                                  'checkout', '--detach', revision])
+        else:
+            worktree.git.checkout('--detach', revision)
+        print(f"✓ Worktree em {revision[:12]} pronto")
+    except Exception as e:
+        print(f"✗ Erro ao criar worktree: {e}")
+        return False
+
+    return _validar_arquivos_java(destino, inventario)
+
+
+def _espelho_do_worktree(destino: str):
+    """Espelho dono do worktree em destino, ou None se destino não for um worktree."""
+    git_file = os.path.join(destino, '.git')
+    if not os.path.isfile(git_file):
+        return None
+    # .git de um worktree aponta para <espelho>/worktrees/<nome>
+    with open(git_file, 'r', encoding='utf-8') as f:
+        gitdir = f.read().strip().split('gitdir:', 1)[-1].strip()
+    return os.path.dirname(os.path.dirname(gitdir))
+
+
+def remover_worktree(destino: str) -> bool:
+    """Remove o worktree e seus metadados no espelho (o espelho é mantido)."""
+    import git
+
+    espelho = _espelho_do_worktree(destino)
+    if espelho is None or not os.path.isdir(espelho):
+        print(f"[AVISO] '{destino}' não é um worktree; nada removido")
+        return False
+    repo = git.Repo(espelho)
+    try:
+        repo.git.worktree('remove', '--force', os.path.abspath(destino))
+    except Exception:
+        # Worktree já corrompido/parcial: remove o diretório e deixa o prune limpar
+        shutil.rmtree(destino, ignore_errors=True)
+    repo.git.worktree('prune')
+    return True
+
+
+def _validar_arquivos_java(destino: str, inventario: Optional[list]) -> bool:
+    """Monta o inventário (índice do git, sem percorrer a árvore) e exige ao menos um .java."""
+    arquivos = build_inventory(destino)
+    if inventario is not None:
+        inventario[:] = arquivos
+    if arquivos:
+        print(f"✓ Encontrados {len(arquivos)} arquivos .java")
+        return True
+    print("✗ Nenhum arquivo .java encontrado")
+    return False
+
+
+def listar_arquivos_java(diretorio: str) -> List[str]:
+    """Caminhos relativos dos arquivos .java (ver utils/file_inventory.py)."""
+    return [f.rel_path for f in build_inventory(diretorio)]
+
 
 def contar_arquivos_java(diretorio: str) -> int:
     """Conta arquivos .java no diretório."""
-    count = 0
-    for root, dirs, files in os.walk(diretorio):
-        count += sum(1 for f in files if f.endswith('.java'))
-    return count
+    return len(build_inventory(diretorio))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,242 @@
+"""
+Estatísticas dos relatórios (scripts/report_markdown.py e scripts/report_html.py)
+em uma única passada sobre o arquivo de resultados.
+Lê JSON (lista) ou JSONL, com ou sem gzip, um resultado por vez; só contadores,
+um heap com os N mais confiáveis e uma amostra limitada ficam em memória, então o
+consumo não cresce com o tamanho do arquivo. O diário do classify.py
+(results_with_llm.jsonl) também é aceito: suas classificações são juntadas a
+results.json, como na compactação.
+"""
+import bisect
+import gzip
+import heapq
+import itertools
+import json
+from collections import defaultdict
+from typing import Dict, Iterator, List
+
+from llm.progress import item_key
+
+CHUNK_CHARS = 1 << 16
+# Limites superiores (exclusivos) das faixas de confiança; a última vai até 1.0
+BUCKET_EDGES = [0.2, 0.4, 0.6, 0.8]
+
+_decoder = json.JSONDecoder()
+
+
+def is_confirmed(result: Dict) -> bool:
+    """Retorna True se a LLM confirmou o bug, aceitando chaves legadas."""
+    llm = result.get('llm_classification') or {}
+    return bool(llm.get('eh_bug_real', llm.get('eh_realmente_bug', llm.get('is_real_bug', False))))
+
+
+def _open_text(path: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def _iter_json_array(f) -> Iterator[Dict]:
+    """Elementos de uma lista JSON lidos em blocos de CHUNK_CHARS (parse incremental)."""
+    buffer, pos, eof = '', 0, False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(CHUNK_CHARS)
+        eof = not chunk
+        # Descarta o que já foi consumido antes de acrescentar
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    def skip(chars: str):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip(' \t\r\n')
+    if buffer[pos:pos + 1] != '[':
+        raise ValueError('Arquivo JSON de resultados deve conter uma lista')
+    pos += 1
+    while True:
+        skip(' \t\r\n,')
+        if pos >= len(buffer):
+            raise ValueError('Lista JSON de resultados truncada')
+        if buffer[pos] == ']':
+            return
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Elemento incompleto: lê mais um bloco e tenta de novo
+                fill()
+        pos = end
+        yield value
+
+
+def _is_journal_record(record: Dict) -> bool:
+    """Linha do diário do classify.py: evento ou {index, key, llm_classification}, sem match."""
+    return 'event' in record or ('index' in record and 'key' in record and 'match' not in record)
+
+
+def _iter_journal(records: Iterator[Dict], base_path: str) -> Iterator[Dict]:
+    """
+    Junta o diário a base_path (results.json): cada resultado com a última classificação
+    registrada para o seu índice, se o candidato ainda coincidir (mesma chave).
+    Guarda só índice -> (chave, classificação) do diário, não os resultados.
+    """
+    classified = {}
+    for record in records:
+        if isinstance(record.get('index'), int) and 'event' not in record:
+            classified[record['index']] = (record.get('key'), record.get('llm_classification'))
+    for index, result in enumerate(iter_results(base_path)):
+        key, classification = classified.get(index, (None, None))
+        if key is not None and key == item_key(result):
+            result['llm_classification'] = classification
+        yield result
+
+
+def _iter_jsonl(f) -> Iterator[Dict]:
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_results(path: str, base_path: str = 'outputs/results.json') -> Iterator[Dict]:
+    """
+    Resultados de results*.json (lista) ou .jsonl, também .gz, sem carregar o arquivo
+    inteiro. Um diário do classify.py é juntado a base_path (results.json).
+    """
+    with _open_text(path) as f:
+        name = path[:-3] if path.endswith('.gz') else path
+        if not name.endswith('.jsonl'):
+            yield from _iter_json_array(f)
+            return
+        records = _iter_jsonl(f)
+        first = next(records, None)
+        if first is None:
+            return
+        if _is_journal_record(first):
+            yield from _iter_journal(itertools.chain([first], records), base_path)
+            return
+        yield first
+        for record in records:
+            if _is_journal_record(record):
+                raise ValueError(f"{path} mistura resultados e linhas do diário de classificação")
+            yield record
+
+
+def _summary(result: Dict) -> Dict:
+    """Campos exibidos nas listas dos relatórios (sem snippet)."""
+    match = result.get('match') or {}
+    llm = result.get('llm_classification') or {}
+    return {
+        'pattern': match.get('pattern_name') or '?',
+        'class': result.get('class') or '?',
+        'method': result.get('method') or '?',
+        'confianca': llm.get('confianca') or 0,
+        'score': match.get('score') or 0,
+        'motivo': llm.get('motivo') or 'N/A',
+        'confirmed': is_confirmed(result)
+    }
+
+
+class ReportStats:
+    """
+    Agregados de todos os relatórios, atualizados por add(resultado):
+    totais, confiança média, faixas de confiança, estatísticas por padrão, os top_n
+    mais confiáveis (confiança, depois score) e os primeiros sample_n não confirmados.
+    """
+
+    def __init__(self, top_n: int = 10, sample_n: int = 5):
+        self.top_n = top_n
+        self.sample_n = sample_n
+        self.total = 0
+        self.verified = 0
+        self.classified = 0
+        self.confidence_sum = 0.0
+        self.buckets = [0] * (len(BUCKET_EDGES) + 1)
+        self.patterns = defaultdict(lambda: {'total': 0, 'verified': 0, 'score_sum': 0.0})
+        self.not_confirmed_sample: List[Dict] = []
+        self._top = []
+
+    def add(self, result: Dict):
+        confirmed = is_confirmed(result)
+        match = result.get('match') or {}
+        llm = result.get('llm_classification')
+        self.total += 1
+        self.verified += confirmed
+
+        if llm:
+            confidence = llm.get('confianca') or 0
+            self.classified += 1
+            self.confidence_sum += confidence
+            self.buckets[bisect.bisect_right(BUCKET_EDGES, confidence)] += 1
+
+        pattern = self.patterns[match.get('pattern_name') or 'Unknown']
+        pattern['total'] += 1
+        pattern['verified'] += confirmed
+        pattern['score_sum'] += match.get('score') or 0
+
+        if not confirmed and len(self.not_confirmed_sample) < self.sample_n:
+            self.not_confirmed_sample.append(_summary(result))
+        # Empate: o que aparece primeiro no arquivo fica à frente (-total)
+        key = ((llm or {}).get('confianca') or 0, match.get('score') or 0, -self.total)
+        if len(self._top) < self.top_n:
+            heapq.heappush(self._top, (key, _summary(result)))
+        elif key > self._top[0][0]:
+            heapq.heapreplace(self._top, (key, _summary(result)))
+
+    @property
+    def not_verified(self) -> int:
+        return self.total - self.verified
+
+    @property
+    def avg_confidence(self) -> float:
+        return self.confidence_sum / self.classified if self.classified else 0.0
+
+    @property
+    def unclassified(self) -> int:
+        return self.total - self.classified
+
+    def rate(self, count: int) -> float:
+        """count em % do total (0 sem resultados)."""
+        return count / self.total * 100 if self.total else 0.0
+
+    def pattern_rows(self) -> List[Dict]:
+        """Uma linha por padrão, em ordem alfabética: total, verified, taxa (%) e avg_score."""
+        rows = []
+        for name in sorted(self.patterns):
+            data = self.patterns[name]
+            rows.append({
+                'pattern': name,
+                'total': data['total'],
+                'verified': data['verified'],
+                'taxa': data['verified'] / data['total'] * 100 if data['total'] else 0,
+                'avg_score': data['score_sum'] / data['total'] if data['total'] else 0
+            })
+        return rows
+
+    def top_results(self) -> List[Dict]:
+        """Os top_n mais confiáveis, do maior para o menor."""
+        return [summary for _, summary in sorted(self._top, key=lambda item: item[0], reverse=True)]
+
+    @staticmethod
+    def bucket_bounds() -> List[tuple]:
+        """(início, fim) de cada faixa de confiança."""
+        edges = [0.0] + BUCKET_EDGES + [1.0]
+        return list(zip(edges[:-1], edges[1:]))
+
+
+def aggregate(path: str, top_n: int = 10, sample_n: int = 5,
+              base_path: str = 'outputs/results.json') -> ReportStats:
+    """Uma passada sobre o arquivo de resultados (base_path: ver iter_results)."""
+    stats = ReportStats(top_n, sample_n)
+    for result in iter_results(path, base_path):
+        stats.add(result)
+    return stats
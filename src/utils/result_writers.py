@@ -0,0 +1,155 @@
+"""
+Gravação incremental dos métodos casados.
+Cada método é gravado assim que o matching o produz, sem montar a lista inteira:
+
+- JsonlResultWriter: uma linha JSON por método (gzip se o caminho terminar em .gz)
+- ColumnarResultWriter: uma linha por método com as notas de cada componente em
+  colunas, em Parquet (.parquet) ou Arrow IPC (.arrow/.feather); requer pyarrow
+"""
+import gzip
+import json
+import os
+from typing import Dict, List, Optional
+
+
+# Componentes do feature_breakdown do SimilarityMatcher, na ordem do CSV
+SCORE_COMPONENTS = ['ast', 'control_flow', 'methods', 'operators', 'tokens']
+
+
+def result_record(method: Dict) -> Dict:
+    """Registro de um método casado no formato de results.json (sem snippet)."""
+    return {
+        'file': method.get('file'),
+        'class': method.get('class'),
+        'method': method.get('name'),
+        'start_line': method.get('start_line'),
+        'end_line': method.get('end_line'),
+        'match': method.get('match'),
+        'all_matches': method.get('all_matches', [])
+    }
+
+
+def result_row(method: Dict) -> Dict:
+    """Linha achatada para o formato colunar: uma coluna por nota."""
+    match = method.get('match') or {}
+    breakdown = match.get('breakdown') or {}
+    row = {
+        'file': method.get('file'),
+        'class': method.get('class'),
+        'method': method.get('name'),
+        'start_line': method.get('start_line'),
+        'end_line': method.get('end_line'),
+        'pattern_id': match.get('pattern_id'),
+        'pattern_name': match.get('pattern_name'),
+        'score': match.get('score'),
+        'confidence': match.get('confidence'),
+    }
+    for component in SCORE_COMPONENTS:
+        row[f'{component}_score'] = breakdown.get(component)
+    row['all_matches'] = method.get('all_matches', [])
+    return row
+
+
+def _ensure_dir(path: str):
+    output_dir = os.path.dirname(path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+
+class JsonlResultWriter:
+    """Anexa um JSON por linha; com .gz, comprime em streaming."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        _ensure_dir(path)
+        if path.endswith('.gz'):
+            self._file = gzip.open(path, 'wt', encoding='utf-8')
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, method: Dict):
+        self._file.write(json.dumps(result_record(method), ensure_ascii=False))
+        self._file.write('\n')
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+
+class ColumnarResultWriter:
+    """
+    Grava em lotes de batch_size linhas com schema fixo, para que a leitura possa
+    selecionar só as colunas necessárias (ex.: pyarrow.parquet.read_table(columns=[...])).
+    """
+
+    def __init__(self, path: str, batch_size: int = 10000):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("Exportação colunar requer pyarrow. Execute: pip install pyarrow")
+        self.pa = pa
+        self.path = path
+        self.batch_size = batch_size
+        self.count = 0
+        self._rows: List[Dict] = []
+        self.schema = self._schema()
+        _ensure_dir(path)
+
+        if path.endswith(('.arrow', '.feather')):
+            self._writer = pa.ipc.new_file(path, self.schema)
+        else:
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def _schema(self):
+        pa = self.pa
+        fields = [
+            ('file', pa.string()),
+            ('class', pa.string()),
+            ('method', pa.string()),
+            ('start_line', pa.int32()),
+            ('end_line', pa.int32()),
+            ('pattern_id', pa.string()),
+            ('pattern_name', pa.string()),
+            ('score', pa.float64()),
+            ('confidence', pa.float64()),
+        ]
+        fields += [(f'{component}_score', pa.float64()) for component in SCORE_COMPONENTS]
+        fields.append(('all_matches', pa.list_(pa.struct([
+            ('pattern_id', pa.string()),
+            ('score', pa.float64()),
+            ('confidence', pa.float64()),
+        ]))))
+        return pa.schema(fields)
+
+    def write(self, method: Dict):
+        self._rows.append(result_row(method))
+        self.count += 1
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        self._writer.write_table(self.pa.Table.from_pylist(self._rows, schema=self.schema))
+        self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def open_result_writers(jsonl_path: Optional[str] = None, columnar_path: Optional[str] = None) -> List:
+    """Abre os writers configurados (nenhum, um ou ambos)."""
+    writers = []
+    try:
+        if jsonl_path:
+            writers.append(JsonlResultWriter(jsonl_path))
+        if columnar_path:
+            writers.append(ColumnarResultWriter(columnar_path))
+    except Exception:
+        for writer in writers:
+            writer.close()
+        raise
+    return writers
@@ -0,0 +1,141 @@
+"""
+Gerador de corpus Java sintético para benchmarks.
+Produz classes com métodos de aninhamento realista (if/for/while/try/switch),
+incluindo trechos parecidos com os padrões Defects4J, de forma determinística.
+"""
+import os
+import random
+from typing import List
+
+
+# Trechos de uma linha usados como folhas dos métodos
+_STATEMENTS = [
+    'total += values[i];',
+    'result.append(name);',
+    'count++;',
+    'map.put(key, value);',
+    'list.add(item.toString());',
+    'System.out.println(message);',
+    'value = compute(value, offset);',
+    'index = text.indexOf(separator);',
+    'builder.setLength(0);',
+    'cache.remove(key);',
+]
+
+# Trechos que lembram os padrões de bug da biblioteca
+_BUGGY = [
+    'if (name == "default") { return true; }',
+    'InputStream is = new FileInputStream(file);',
+    'try { reader.close(); } catch (IOException ignored) { }',
+    'for (int j = 0; j <= values.length; j++) { total += values[j]; }',
+    'if (obj.equals(other)) { count++; }',
+    'return item.getValue().trim();',
+]
+
+_CONDITIONS = [
+    'value > 0',
+    'name != null',
+    'i < values.length',
+    'map.containsKey(key)',
+    'text.isEmpty()',
+    'count % 2 == 0',
+    'flag && other != null',
+]
+
+
+class SyntheticCorpusGenerator:
+    """Gera arquivos .java sintéticos com N métodos no total."""
+
+    def __init__(self, seed: int = 0, methods_per_file: int = 10, max_depth: int = 3):
+        self.rng = random.Random(seed)
+        self.methods_per_file = methods_per_file
+        self.max_depth = max_depth
+
+    def _block(self, depth: int, indent: int) -> List[str]:
+        """Bloco de comandos com aninhamento aleatório até max_depth."""
+        pad = '    ' * indent
+        lines = []
+        for _ in range(self.rng.randint(1, 3)):
+            roll = self.rng.random()
+            if depth < self.max_depth and roll < 0.45:
+                lines.extend(self._control(depth + 1, indent))
+            elif roll < 0.55:
+                lines.append(pad + self.rng.choice(_BUGGY))
+            else:
+                lines.append(pad + self.rng.choice(_STATEMENTS))
+        return lines
+
+    def _control(self, depth: int, indent: int) -> List[str]:
+        """Estrutura de controle com bloco interno."""
+        pad = '    ' * indent
+        kind = self.rng.choice(['if', 'if-else', 'for', 'while', 'try', 'switch'])
+        cond = self.rng.choice(_CONDITIONS)
+        body = self._block(depth, indent + 1)
+
+        if kind == 'if':
+            return [f'{pad}if ({cond}) {{'] + body + [f'{pad}}}']
+        if kind == 'if-else':
+            other = self._block(depth, indent + 1)
+            return [f'{pad}if ({cond}) {{'] + body + [f'{pad}}} else {{'] + other + [f'{pad}}}']
+        if kind == 'for':
+            return [f'{pad}for (int i = 0; i < values.length; i++) {{'] + body + [f'{pad}}}']
+        if kind == 'while':
+            return [f'{pad}while ({cond}) {{'] + body + [f'{pad}    break;', f'{pad}}}']
+        if kind == 'try':
+            return ([f'{pad}try {{'] + body +
+                    [f'{pad}}} catch (Exception e) {{', f'{pad}    throw new IllegalStateException(e);', f'{pad}}}'])
+        inner = '    ' * (indent + 1)
+        return ([f'{pad}switch (count) {{', f'{inner}case 0:'] +
+                ['    ' + line for line in body] +
+                [f'{inner}    break;', f'{inner}default:', f'{inner}    count = 0;', f'{pad}}}'])
+
+    def method(self, idx: int) -> List[str]:
+        """Um método completo com corpo aninhado."""
+        lines = [f'    public int method{idx}(String name, Object obj, int[] values) {{',
+                 '        int total = 0;',
+                 '        int count = 0;']
+        lines.extend(self._block(0, 2))
+        lines.append('        return total + count;')
+        lines.append('    }')
+        return lines
+
+    def java_file(self, package: str, class_name: str, n_methods: int) -> str:
+        """Conteúdo de uma classe com n_methods métodos."""
+        lines = [f'package {package};', '',
+                 'import java.io.*;', 'import java.util.*;', '',
+                 f'public class {class_name} {{',
+                 '    private Map<String, Object> map = new HashMap<>();', '']
+        for i in range(n_methods):
+            lines.extend(self.method(i))
+            lines.append('')
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+    def generate(self, root_dir: str, n_methods: int) -> List[str]:
+        """Grava o corpus em root_dir e retorna os caminhos dos arquivos gerados."""
+        paths = []
+        remaining = n_methods
+        file_idx = 0
+        while remaining > 0:
+            n = min(self.methods_per_file, remaining)
+            package_dir = f'pkg{file_idx // 50}'
+            class_name = f'Synthetic{file_idx}'
+            target_dir = os.path.join(root_dir, 'src', 'main', 'java', 'bench', package_dir)
+            os.makedirs(target_dir, exist_ok=True)
+
+            path = os.path.join(target_dir, f'{class_name}.java')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.java_file(f'bench.{package_dir}', class_name, n))
+            paths.append(path)
+
+            remaining -= n
+            file_idx += 1
+        return paths
+
+
+if __name__ == '__main__':
+    import sys
+    target = sys.argv[1] if len(sys.argv) > 1 else 'dados/synthetic'
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    files = SyntheticCorpusGenerator().generate(target, size)
+    print(f"✓ Gerados {size} métodos em {len(files)} arquivos ({target})")